@@ -0,0 +1,36 @@
+"""Compares encode/decode throughput and payload size of the JSON and binary wire codecs.
+
+Usage: python bench_codec.py [iterations]
+"""
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from engine.network.codec import JSON, BINARY
+
+SAMPLES = {
+    'MOVE': {'type': 'MOVE', 'id': 7, 'x': 1234, 'y': 876, 'facing': (0, 1), 'is_moving': True, 'seq': 5021},
+    'MOVE_ACK': {'type': 'MOVE_ACK', 'seq': 5021, 'x': 1234, 'y': 876},
+    'WORLD_SNAPSHOT': {'type': 'WORLD_SNAPSHOT', 'tick': 4821, 'full': False, 'entities': [[i, 100 + i * 32, 200 + i * 16, 1, 0, 1] for i in range(12)]},
+    'TIME_SYNC': {'type': 'TIME_SYNC', 'phase_idx': 3, 'day': 2, 'phase_end': 18342.625, 'ts': 18301.375},
+    'UPDATE_STATS': {'type': 'UPDATE_STATS', 'id': 7, 'hp': 80, 'max_hp': 100, 'ap': 55, 'max_ap': 100, 'coins': 12, 'emotion': 'ANXIETY', 'action': 'Working'},
+    'STATS_DELTA': {'type': 'STATS_DELTA', 'table': 'stats', 'base': 40, 'v': 41, 'changed': [[i, {'hp': 90 - i, 'ap': 50}] for i in range(8)], 'removed': []},
+}
+
+def bench(codec, msg, n):
+    t0 = time.perf_counter()
+    for _ in range(n): payload = codec.encode(msg)
+    t1 = time.perf_counter()
+    view = memoryview(payload)
+    for _ in range(n): codec.decode(view)
+    t2 = time.perf_counter()
+    return len(payload), n / (t1 - t0), n / (t2 - t1)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print(f"{'message':<16}{'codec':<6}{'bytes':>7}{'enc/s':>12}{'dec/s':>12}")
+    for name, msg in SAMPLES.items():
+        for codec in (JSON, BINARY):
+            size, enc, dec = bench(codec, msg, n)
+            print(f"{name:<16}{codec.name:<6}{size:>7}{enc:>12,.0f}{dec:>12,.0f}")
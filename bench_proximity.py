@@ -0,0 +1,90 @@
+"""Frame time against NPC count, and the proximity queries against the linear scans they replaced.
+
+Runs an offline PlayState at NIGHT (separation, danger checks and the heartbeat
+are all active) with N bots for each N, then times the two query shapes that used
+to be O(N) per caller on the same world: every NPC looking for same-role NPCs
+within 48 px (separation, O(N^2) per frame) and the nearest MAFIA to the player
+(heartbeat, V action, CCTV and bullets have the same shape).
+
+NPCs are scattered over every walkable tile, as in a game under way; --clustered
+keeps them at the zone 1 spawn points where the match starts (the grid's worst
+case: everyone shares a few cells).
+
+Usage: python bench_proximity.py [frames] [--npcs 25,50,100,200,400] [--draw] [--clustered]
+"""
+import sys
+import os
+import time
+import math
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+from engine.core.game_engine import GameEngine
+from states.play_state import PlayState
+from settings import TILE_SIZE
+
+ROLES = ['CITIZEN', 'MAFIA', 'POLICE', 'DOCTOR', 'FARMER', 'MINER', 'FISHER']
+
+def make_world(n, clustered=False):
+    random.seed(n)
+    g = GameEngine()
+    g.shared_data['participants'] = [{'id': 0, 'name': 'P', 'role': 'CITIZEN', 'type': 'PLAYER', 'group': 'PLAYER'}] + \
+        [{'id': i, 'name': f'B{i}', 'role': ROLES[i % len(ROLES)], 'type': 'BOT', 'group': 'PLAYER'} for i in range(1, n + 1)]
+    ps = PlayState(g); g.state_machine.push(ps)
+    ts = ps.time_system
+    ts.current_phase_idx = ts.phases.index('NIGHT'); ts.current_phase = 'NIGHT'; ts.state_timer = 10 ** 6
+    if not clustered:
+        mm = ps.world.map_manager
+        free = [(x * TILE_SIZE, y * TILE_SIZE) for y in range(mm.height) for x in range(mm.width) if not mm.check_any_collision(x, y)]
+        for e in [ps.player] + ps.npcs:
+            e.pos_x, e.pos_y = random.choice(free); e.rect.x, e.rect.y = e.pos_x, e.pos_y
+            ps.world.spatial_grid.update_entity(e)
+    return g, ps
+
+def per_call(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat): fn()
+    return (time.perf_counter() - t0) / repeat
+
+def linear_separation(npcs):
+    for me in npcs:
+        for n in npcs:
+            if n is not me and n.role == me.role and n.alive and (me.pos_x - n.pos_x) ** 2 + (me.pos_y - n.pos_y) ** 2 < 48 ** 2: pass
+
+def grid_separation(world, npcs):
+    for me in npcs: world.query_entities(me.rect.centerx, me.rect.centery, 48, (me.role,), me)
+
+def linear_nearest(player, npcs):
+    return min([math.hypot(n.rect.centerx - player.rect.centerx, n.rect.centery - player.rect.centery) for n in npcs if n.role == "MAFIA" and n.alive] + [float('inf')])
+
+def main():
+    parser = argparse.ArgumentParser(description="PxANIC proximity benchmark")
+    parser.add_argument('frames', nargs='?', type=int, default=120)
+    parser.add_argument('--npcs', default="25,50,100,200,400")
+    parser.add_argument('--draw', action='store_true', help="include draw() in the frame time")
+    parser.add_argument('--clustered', action='store_true', help="leave the NPCs at the spawn points")
+    args = parser.parse_args()
+
+    print(f"{'npcs':>6}{'frame p50':>11}{'frame p95':>11}{'sep linear':>12}{'sep grid':>10}{'near linear':>13}{'near grid':>11}")
+    for n in [int(v) for v in args.npcs.split(',')]:
+        g, ps = make_world(n, args.clustered)
+        frames = []
+        for _ in range(args.frames):
+            t0 = time.perf_counter()
+            g.update(1 / 60)
+            if args.draw: g.draw()
+            frames.append(time.perf_counter() - t0)
+        frames.sort()
+        world, npcs, p = ps.world, ps.npcs, ps.player
+        sep_lin = per_call(lambda: linear_separation(npcs), 3)
+        sep_grid = per_call(lambda: grid_separation(world, npcs), 3)
+        near_lin = per_call(lambda: linear_nearest(p, npcs), 200)
+        near_grid = per_call(lambda: world.nearest_entity(p.rect.centerx, p.rect.centery, 640, ("MAFIA",), p), 200)
+        print(f"{n:>6}{frames[len(frames) // 2] * 1000:>9.2f}ms{frames[int(len(frames) * 0.95)] * 1000:>9.2f}ms"
+              f"{sep_lin * 1000:>10.2f}ms{sep_grid * 1000:>8.2f}ms{near_lin * 1e6:>11.1f}us{near_grid * 1e6:>9.1f}us")
+
+if __name__ == "__main__":
+    main()
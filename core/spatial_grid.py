@@ -1,79 +1,211 @@
+import heapq
+from operator import itemgetter
 from settings import TILE_SIZE
 
+_by_dist = itemgetter(0)
+
 class SpatialGrid:
+    """Uniform grid over the map for proximity queries.
+
+    [Optimization] Flat storage instead of a dict of sets: cells are a dense index
+    (gy * cols + gx) into `head`, each holding the first slot of an intrusive doubly
+    linked list threaded through the per-slot `next`/`prev` lists. Every tracked uid
+    owns a slot with its pixel position, so radius queries filter on the exact
+    distance and return candidates sorted nearest first. Plain lists are used as
+    the flat arrays (indexing them is cheaper than array.array in CPython).
+
+    Positions outside the map are clamped into the border cells; queries stay exact
+    because they always test the stored position. A grid created without a map size
+    (the server) grows when a point lands beyond its current extent.
+    """
     def __init__(self, map_width, map_height, cell_size=10):
         self.map_width = map_width
         self.map_height = map_height
         self.cell_size = cell_size # in Tiles
         self.inv_cell_size = 1.0 / cell_size # [Optimization] Precompute inverse
-        
-        self.cells = {} # {(gx, gy): {entity_uid, ...}}
-        self.entity_locations = {} # {entity_uid: (gx, gy)}
+        self.cell_px = cell_size * TILE_SIZE
+        self.inv_cell_px = 1.0 / self.cell_px
+        self.cols = max(1, -(-map_width // cell_size))
+        self.rows = max(1, -(-map_height // cell_size))
+        self.head = [-1] * (self.cols * self.rows) # {cell: first slot} as a dense list, -1 = empty
+
+        # Per-slot storage; freed slots are reused
+        self.slot_of = {} # {uid: slot}
+        self.uids = []
+        self.xs = []
+        self.ys = []
+        self.cell = []
+        self.next = []
+        self.prev = []
+        self.ents = []  # Entity object for add/update_entity slots, None for points
+        self.roles = [] # Role given to move_point (entity slots read entity.role live)
+        self.free = []
+
+    # --- Storage ---
+    def _cell_index(self, x, y):
+        gx = int(x * self.inv_cell_px); gy = int(y * self.inv_cell_px)
+        if gx >= self.cols or gy >= self.rows:
+            if self.map_width: gx = min(gx, self.cols - 1); gy = min(gy, self.rows - 1)
+            else: self._grow(max(gx + 1, self.cols * 2) if gx >= self.cols else self.cols, max(gy + 1, self.rows * 2) if gy >= self.rows else self.rows)
+        return (gy if gy > 0 else 0) * self.cols + (gx if gx > 0 else 0)
+
+    def _grow(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.head = [-1] * (cols * rows)
+        for s in self.slot_of.values():
+            self.cell[s] = -1; self._link(s, self._cell_index(self.xs[s], self.ys[s]))
+
+    def _link(self, s, c):
+        h = self.head[c]
+        self.next[s] = h; self.prev[s] = -1
+        if h != -1: self.prev[h] = s
+        self.head[c] = s; self.cell[s] = c
+
+    def _unlink(self, s):
+        n, p = self.next[s], self.prev[s]
+        if p != -1: self.next[p] = n
+        else: self.head[self.cell[s]] = n
+        if n != -1: self.prev[n] = p
 
-    def _get_cell_coords(self, tx, ty):
-        # [Optimization] Use multiplication instead of division
-        return int(tx * self.inv_cell_size), int(ty * self.inv_cell_size)
+    def _place(self, uid, x, y, ent, role):
+        s = self.slot_of.get(uid)
+        if s is None:
+            c = self._cell_index(x, y) # May grow (and relink) the grid: before the new slot is registered
+            if self.free: s = self.free.pop()
+            else:
+                s = len(self.uids)
+                for lst in (self.uids, self.xs, self.ys, self.cell, self.next, self.prev, self.ents, self.roles): lst.append(None)
+            self.slot_of[uid] = s
+            self.uids[s] = uid; self.ents[s] = ent; self.roles[s] = role
+            self.xs[s] = x; self.ys[s] = y
+            self._link(s, c)
+            return
+        self.xs[s] = x; self.ys[s] = y
+        if role is not None: self.roles[s] = role
+        c = self._cell_index(x, y)
+        if c != self.cell[s]: self._unlink(s); self._link(s, c)
 
+    def _release(self, uid):
+        s = self.slot_of.pop(uid, None)
+        if s is None: return
+        self._unlink(s)
+        self.ents[s] = None; self.uids[s] = None
+        self.free.append(s)
+
+    def position(self, uid):
+        """Pixel position last stored for uid, or None."""
+        s = self.slot_of.get(uid)
+        return None if s is None else (self.xs[s], self.ys[s])
+
+    # --- Entity API: positions are rect centers ---
     def add(self, entity):
         if not hasattr(entity, 'uid'): return
-        
-        tx = int(entity.rect.centerx / TILE_SIZE)
-        ty = int(entity.rect.centery / TILE_SIZE)
-        gx, gy = self._get_cell_coords(tx, ty)
-        
-        if (gx, gy) not in self.cells:
-            self.cells[(gx, gy)] = set()
-            
-        self.cells[(gx, gy)].add(entity.uid)
-        self.entity_locations[entity.uid] = (gx, gy)
+        self._place(entity.uid, entity.rect.centerx, entity.rect.centery, entity, None)
 
     def remove(self, entity):
         if not hasattr(entity, 'uid'): return
-        loc = self.entity_locations.get(entity.uid)
-        if loc:
-            gx, gy = loc
-            if (gx, gy) in self.cells and entity.uid in self.cells[(gx, gy)]:
-                self.cells[(gx, gy)].remove(entity.uid)
-                if not self.cells[(gx, gy)]:
-                    del self.cells[(gx, gy)]
-            del self.entity_locations[entity.uid]
+        self._release(entity.uid)
 
     def update_entity(self, entity):
         if not hasattr(entity, 'uid'): return
-        
-        tx = int(entity.rect.centerx / TILE_SIZE)
-        ty = int(entity.rect.centery / TILE_SIZE)
-        new_gx, new_gy = self._get_cell_coords(tx, ty)
-        
-        old_loc = self.entity_locations.get(entity.uid)
-        
-        if old_loc != (new_gx, new_gy):
-            self.remove(entity) # Remove from old
-            self.add(entity)    # Add to new
+        self._place(entity.uid, entity.rect.centerx, entity.rect.centery, entity, None)
 
     def get_nearby_entities(self, entity, radius_tiles=None):
+        """uids in the square of cells around the entity (no distance filter), excluding itself."""
         if not hasattr(entity, 'uid'): return set()
-        
-        tx = int(entity.rect.centerx / TILE_SIZE)
-        ty = int(entity.rect.centery / TILE_SIZE)
-        gx, gy = self._get_cell_coords(tx, ty)
-        
-        search_radius = 1
-        if radius_tiles:
-            search_radius = int(radius_tiles * self.inv_cell_size) + 1
-            
+        gx = int(entity.rect.centerx * self.inv_cell_px); gy = int(entity.rect.centery * self.inv_cell_px)
+        search_radius = int(radius_tiles * self.inv_cell_size) + 1 if radius_tiles else 1
         nearby_uids = set()
-        
-        # [Optimization] Local var access
-        cells = self.cells
-        
-        for dy in range(-search_radius, search_radius + 1):
-            for dx in range(-search_radius, search_radius + 1):
-                cell_key = (gx + dx, gy + dy)
-                if cell_key in cells:
-                    nearby_uids.update(cells[cell_key])
-                    
-        if entity.uid in nearby_uids:
-            nearby_uids.remove(entity.uid)
-            
-        return nearby_uids
\ No newline at end of file
+        head, nxt, uids = self.head, self.next, self.uids
+        for cy in range(max(0, gy - search_radius), min(self.rows - 1, gy + search_radius) + 1):
+            row = cy * self.cols
+            for cx in range(max(0, gx - search_radius), min(self.cols - 1, gx + search_radius) + 1):
+                s = head[row + cx]
+                while s != -1: nearby_uids.add(uids[s]); s = nxt[s]
+        nearby_uids.discard(entity.uid)
+        return nearby_uids
+
+    # --- Point API: uid + pixel position, for callers without entity objects (e.g. the server) ---
+    def move_point(self, uid, x, y, role=None):
+        self._place(uid, x, y, None, role)
+
+    def remove_point(self, uid):
+        self._release(uid)
+
+    def query_point(self, x, y, radius_tiles, out=None):
+        """uids registered via move_point within radius_tiles of pixel (x, y). Adds to `out` if given."""
+        result = set() if out is None else out
+        result.update(uid for _, uid in self._scan(x, y, radius_tiles * TILE_SIZE, None, None))
+        return result
+
+    # --- Distance queries (pixels) ---
+    def _scan(self, x, y, r, roles, exclude):
+        """Unsorted [(squared distance, uid)] within r of (x, y)."""
+        inv, r_sq = self.inv_cell_px, r * r
+        cx, cy = self.cols - 1, self.rows - 1 # Clamped like stored positions, so off-map queries see the border cells
+        gx0 = min(max(0, int((x - r) * inv)), cx); gx1 = max(min(cx, int((x + r) * inv)), 0)
+        gy0 = min(max(0, int((y - r) * inv)), cy); gy1 = max(min(cy, int((y + r) * inv)), 0)
+        head, nxt, xs, ys, uids, cols, ents, proles = self.head, self.next, self.xs, self.ys, self.uids, self.cols, self.ents, self.roles
+        out = []
+        for gy in range(gy0, gy1 + 1):
+            row = gy * cols
+            for gx in range(gx0, gx1 + 1):
+                s = head[row + gx]
+                while s != -1:
+                    dx = xs[s] - x; dy = ys[s] - y; d = dx * dx + dy * dy
+                    if d <= r_sq and uids[s] != exclude:
+                        if roles is None: out.append((d, uids[s]))
+                        else:
+                            e = ents[s]
+                            if (e.role if e is not None else proles[s]) in roles: out.append((d, uids[s]))
+                    s = nxt[s]
+        return out
+
+    def query_radius(self, x, y, r, roles=None, exclude=None):
+        """[(distance, uid)] within r pixels of (x, y), nearest first.
+        roles: only uids whose role is in this collection; exclude: a uid to skip (usually the caller)."""
+        out = self._scan(x, y, r, roles, exclude)
+        out.sort(key=_by_dist)
+        return [(d ** 0.5, uid) for d, uid in out]
+
+    def k_nearest(self, x, y, k, predicate=None, roles=None, exclude=None, max_radius=None):
+        """Up to k [(distance, uid)] nearest to (x, y), nearest first, optionally within max_radius pixels.
+        predicate(uid) filters candidates. Searches rings of cells outward and stops once no
+        unvisited cell can hold anything closer than the k-th best so far."""
+        if k <= 0: return []
+        inv, cp, cols, rows = self.inv_cell_px, self.cell_px, self.cols, self.rows
+        head, nxt, xs, ys, uids, ents, proles = self.head, self.next, self.xs, self.ys, self.uids, self.ents, self.roles
+        cgx = min(max(int(x * inv), 0), cols - 1); cgy = min(max(int(y * inv), 0), rows - 1)
+        lim = float('inf') if max_radius is None else max_radius * max_radius
+        best = [] # Max-heap of (-squared distance, n, uid)
+        n = 0
+        ring = 0
+        while True:
+            gy0, gy1, gx0, gx1 = cgy - ring, cgy + ring, cgx - ring, cgx + ring
+            for gy in range(max(0, gy0), min(rows - 1, gy1) + 1):
+                edge_row = gy == gy0 or gy == gy1
+                for gx in (range(max(0, gx0), min(cols - 1, gx1) + 1) if edge_row else (gx0, gx1)):
+                    if gx < 0 or gx >= cols: continue
+                    s = head[gy * cols + gx]
+                    while s != -1:
+                        dx = xs[s] - x; dy = ys[s] - y; d = dx * dx + dy * dy
+                        uid = uids[s]
+                        if d <= lim and uid != exclude and (len(best) < k or d < -best[0][0]):
+                            e = ents[s]
+                            if (roles is None or (e.role if e is not None else proles[s]) in roles) and (predicate is None or predicate(uid)):
+                                n += 1
+                                if len(best) < k: heapq.heappush(best, (-d, n, uid))
+                                else: heapq.heapreplace(best, (-d, n, uid))
+                        s = nxt[s]
+            # Distance from (x, y) to the nearest side of the searched block that still has cells beyond it
+            bound = float('inf')
+            if gx0 > 0: bound = min(bound, x - gx0 * cp)
+            if gx1 < cols - 1: bound = min(bound, (gx1 + 1) * cp - x)
+            if gy0 > 0: bound = min(bound, y - gy0 * cp)
+            if gy1 < rows - 1: bound = min(bound, (gy1 + 1) * cp - y)
+            if bound == float('inf'): break # Whole grid searched
+            bound = max(bound, 0.0); bound *= bound
+            if bound > lim or (len(best) == k and bound >= -best[0][0]): break
+            ring += 1
+        best.sort(key=lambda e: -e[0])
+        return [((-nd) ** 0.5, uid) for nd, _, uid in best]
@@ -1,3 +1,4 @@
+import math
 import random
 import uuid
 import pygame
@@ -47,8 +48,10 @@ class GameWorld:
         """Creates entities based on participants list from server/lobby"""
         participants = self.game.shared_data.get('participants', [])
         my_id = -1
+        server_bots = False
         if hasattr(self.game, 'network') and self.game.network.connected:
             my_id = self.game.network.my_id
+            server_bots = self.game.shared_data.get('server_bots', False)
         else:
             my_id = 0 # Default for offline
 
@@ -89,8 +92,8 @@ class GameWorld:
                 n = Dummy(sx, sy, None, mw, mh, name=name, role=role, zone_map=zm, map_manager=self.map_manager)
                 n.uid = pid
                 
-                # Logic: Master if I am host AND it's a BOT. Otherwise Slave.
-                if p_type == 'BOT' and my_id == 0:
+                # Logic: Master if I am host AND it's a BOT (unless the server simulates bots). Otherwise Slave.
+                if p_type == 'BOT' and my_id == 0 and not server_bots:
                     n.is_master = True
                 else:
                     n.is_master = False
@@ -121,4 +124,30 @@ class GameWorld:
     def get_nearby_entities(self, entity, radius_tiles=None):
         if not self.spatial_grid: return []
         uids = self.spatial_grid.get_nearby_entities(entity, radius_tiles)
-        return [self.entities_by_id[uid] for uid in uids if uid in self.entities_by_id and self.entities_by_id[uid].alive]
\ No newline at end of file
+        return [self.entities_by_id[uid] for uid in uids if uid in self.entities_by_id and self.entities_by_id[uid].alive]
+
+    # --- [Optimization] Proximity service: "who is near (x, y)" goes through the spatial grid ---
+    def query_entities(self, x, y, radius, roles=None, exclude=None, where=None):
+        """Living entities whose center is within radius pixels of (x, y), as [(distance, entity)] nearest first.
+        roles: allowed roles; exclude: an entity to skip (usually the caller); where(entity): extra filter."""
+        ents = self.entities_by_id
+        if not self.spatial_grid:
+            found = [(math.hypot(e.rect.centerx - x, e.rect.centery - y), e) for e in ents.values() if e is not exclude]
+            return sorted([(d, e) for d, e in found if d <= radius and e.alive and (roles is None or e.role in roles) and (where is None or where(e))], key=lambda t: t[0])
+        out = []
+        for d, uid in self.spatial_grid.query_radius(x, y, radius, roles, getattr(exclude, 'uid', None)):
+            e = ents.get(uid)
+            if e is not None and e.alive and (where is None or where(e)): out.append((d, e))
+        return out
+
+    def nearest_entity(self, x, y, radius=None, roles=None, exclude=None, where=None):
+        """(distance, entity) of the nearest living match within radius pixels (anywhere if None), else (None, None)."""
+        if not self.spatial_grid:
+            found = self.query_entities(x, y, float('inf') if radius is None else radius, roles, exclude, where)
+            return found[0] if found else (None, None)
+        ents = self.entities_by_id
+        def match(uid):
+            e = ents.get(uid)
+            return e is not None and e.alive and (where is None or where(e))
+        found = self.spatial_grid.k_nearest(x, y, 1, match, roles, getattr(exclude, 'uid', None), radius)
+        return (found[0][0], ents[found[0][1]]) if found else (None, None)
@@ -61,6 +61,7 @@ class GameEngine:
 
     def update(self, dt):
         self.state_machine.update(dt)
+        if hasattr(self, 'network'): self.network.flush() # [Network] One write per frame for everything the states sent
 
     def draw(self):
         self.state_machine.draw(self.screen)
@@ -1,7 +1,11 @@
 import socket
 import threading
-import json
-import queue
+import time
+from settings import NETWORK_CODEC, DEFAULT_ROOM, RECV_BUFFER_SIZE, CLOCK_SYNC_INTERVAL, RECONNECT_TIMEOUT, NETWORK_UDP, NETWORK_UDP_PORT
+from engine.network.codec import JSON, CODECS
+from engine.network.protocol import decode_payload
+from engine.network.clock import ClockSync
+from engine.network.udp import UdpLink
 
 class NetworkClient:
     def __init__(self, ip="127.0.0.1", port=5000):
@@ -9,13 +13,32 @@ class NetworkClient:
         self.port = port
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.connected = False
-        self.msg_queue = queue.Queue()
+        self.events = [] # Decoded messages, handed to the main thread in one swap
+        self.events_lock = threading.Lock()
         self.my_id = -1 
+        self.room_code = DEFAULT_ROOM # Sent as JOIN_ROOM right after connecting
+        self.table_versions = {} # {table: version} of replicated server tables
+        self.codec = JSON # Outbound codec, upgraded during the WELCOME handshake
+        self.send_lock = threading.Lock() # The receive thread also sends (codec handshake)
+        self.outbox = [] # [Optimization] Messages queued this frame, written out together by flush()
+        self.outbox_moves = {} # {entity id: outbox index} so a newer MOVE replaces the queued one
+        self.clock = ClockSync() # [Clock Sync] Server clock estimate from PING/PONG round trips
+        self.next_ping = 0
+        self.session = None # [Reconnect] Token from WELCOME, presented again after a dropped connection
+        self.closing = False # disconnect() was called: do not reconnect
+        self.reconnecting = False
+        self.reconnect_started = None
+        self.reconnects = 0
+        self.last_reconnect_ms = None
+        self.udp = None # [UDP] Datagram path for MOVE/snapshots when the server offers one in WELCOME
 
     def connect(self):
         try:
+            self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # Batched per frame, so Nagle only adds latency
             self.client.connect((self.ip, self.port))
-            self.connected = True
+            self.connected = True; self.closing = False; self.session = None
+            self._handshake()
             print(f"[NET] Connected to {self.ip}:{self.port}")
             thread = threading.Thread(target=self.receive_loop, daemon=True)
             thread.start()
@@ -24,66 +47,209 @@ class NetworkClient:
             print(f"[NET] Connection Failed: {e}")
             return False
 
-    def recv_safe(self, size):
-        data = b""
-        while len(data) < size:
+    def _handshake(self, session=None):
+        """Resets per-connection state and opens the stream with JOIN_ROOM (plus the session token when resuming)."""
+        self.table_versions = {}; self.codec = JSON
+        with self.send_lock: self.outbox = []; self.outbox_moves = {}
+        self.clock.reset(); self.next_ping = 0
+        self._close_udp()
+        join = {"type": "JOIN_ROOM", "room": self.room_code}
+        if session: join['session'] = session
+        payload = JSON.encode(join)
+        self.client.sendall(len(payload).to_bytes(4, 'big') + payload)
+
+    def _reconnect(self):
+        """Re-dials after the connection dropped and presents the session token. Gives up after RECONNECT_TIMEOUT."""
+        self.reconnecting = True
+        self.reconnect_started = ClockSync.now()
+        print("[NET] Connection lost, reconnecting...")
+        try:
+            self.client.close()
+        except OSError:
+            pass
+        delay = 0.1
+        while not self.closing and ClockSync.now() - self.reconnect_started < RECONNECT_TIMEOUT:
             try:
-                packet = self.client.recv(size - len(data))
-                if not packet:
-                    return None
-                data += packet
-            except socket.error as e:
-                print(f"[NET] Socket Error: {e}")
-                return None
-        return data
+                sock = socket.create_connection((self.ip, self.port), timeout=2.0)
+                sock.settimeout(None)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.client = sock
+                self._handshake(self.session)
+                self.reconnecting = False
+                return True
+            except OSError:
+                time.sleep(delay); delay = min(delay * 2, 1.0)
+        self.reconnecting = False; self.reconnect_started = None
+        print("[NET] Reconnect failed")
+        return False
 
     def receive_loop(self):
+        # [Reconnect] A dropped stream is re-dialled with the session token instead of ending the game
+        while True:
+            self._receive()
+            if self.closing or not self.session or not self._reconnect(): break
+        self.connected = False
+        print("[NET] Receiver thread ended.")
+
+    def _receive(self):
+        # [Optimization] recv_into a reusable buffer; every complete frame in it is decoded
+        # in one pass and the batch is published with a single locked list extend.
+        buf = bytearray(RECV_BUFFER_SIZE)
+        view = memoryview(buf)
+        start = end = 0 # Unparsed bytes are buf[start:end]
         while self.connected:
             try:
-                # 1. Read Header (4 bytes)
-                header = self.recv_safe(4)
-                if not header:
-                    print("[NET] Disconnected (No Header)")
-                    break
-                
-                msg_len = int.from_bytes(header, byteorder='big')
-                
-                # 2. Read Payload
-                data = self.recv_safe(msg_len)
-                if not data:
-                    print("[NET] Disconnected (No Body)")
+                if end == len(buf):
+                    pending = end - start
+                    need = int.from_bytes(buf[start:start + 4], 'big') + 4 if pending >= 4 else 4
+                    if start == 0 or need > len(buf):
+                        # Frame larger than the buffer: grow (a bytearray with live views can't resize)
+                        view.release()
+                        grown = bytearray(max(len(buf) * 2, need))
+                        grown[:pending] = buf[start:end]
+                        buf = grown; view = memoryview(buf)
+                    else:
+                        buf[:pending] = buf[start:end] # Compact
+                    start, end = 0, pending
+
+                n = self.client.recv_into(view[end:])
+                if not n:
+                    print("[NET] Disconnected by server")
                     break
-                
-                try:
-                    payload = json.loads(data.decode('utf-8'))
-                    self.msg_queue.put(payload)
-                except json.JSONDecodeError as e:
-                    print(f"[NET] JSON Error: {e}")
+                end += n
+
+                batch = []
+                while end - start >= 4:
+                    size = int.from_bytes(buf[start:start + 4], 'big')
+                    if end - start - 4 < size: break
+                    try:
+                        payload = decode_payload(view[start + 4:start + 4 + size])
+                        ptype = payload.get('type')
+                        if ptype == 'PONG': self.clock.add(payload['t0'], payload['ts']) # Timed here, not a frame later
+                        else:
+                            if ptype == 'WELCOME': self._on_welcome(payload, batch)
+                            batch.append(payload)
+                    except (ValueError, KeyError, IndexError) as e:
+                        print(f"[NET] Decode Error: {e}")
+                    start += 4 + size
+                if start == end: start = end = 0
+                if batch:
+                    with self.events_lock: self.events.extend(batch)
+            except OSError as e:
+                if self.connected: print(f"[NET] Socket Error: {e}")
+                break
             except Exception as e:
                 print(f"[NET] Receive Loop Error: {e}")
-                self.connected = False
                 break
-        self.connected = False
-        print("[NET] Receiver thread ended.")
+
+    def _on_welcome(self, welcome, batch):
+        if self.reconnect_started is not None:
+            ms = (ClockSync.now() - self.reconnect_started) * 1000
+            self.reconnect_started = None
+            if welcome.get('resumed'):
+                self.reconnects += 1; self.last_reconnect_ms = ms
+                print(f"[NET] Session resumed as {welcome.get('my_id')} in {ms:.0f} ms")
+            else:
+                print(f"[NET] Session expired, rejoined as a new player after {ms:.0f} ms")
+                batch.append({"type": "SESSION_LOST"})
+        self.session = welcome.get('session')
+        self._negotiate_codec(welcome)
+        if NETWORK_UDP and welcome.get('udp') and self.session:
+            try:
+                self.udp = UdpLink(self.ip, NETWORK_UDP_PORT or welcome['udp'], self.session, self._publish)
+            except OSError as e:
+                print(f"[NET] UDP unavailable, staying on TCP: {e}")
+
+    def _publish(self, msg):
+        with self.events_lock: self.events.append(msg)
+
+    def _close_udp(self):
+        if self.udp: self.udp.close(); self.udp = None
+
+    def _negotiate_codec(self, welcome):
+        """Switches to the preferred codec if the server offers it. SET_CODEC itself goes out as JSON."""
+        if NETWORK_CODEC in welcome.get('codecs', []) and NETWORK_CODEC != self.codec.name:
+            self.send({"type": "SET_CODEC", "codec": NETWORK_CODEC})
+            self.flush()
+            self.codec = CODECS[NETWORK_CODEC]
 
     def send(self, data):
+        """Queues a message for the next flush(). Within one flush only the latest MOVE per entity is kept."""
         if not self.connected: return
-        try:
-            if self.my_id != -1 and 'id' not in data:
-                data['id'] = self.my_id
-            serialized = json.dumps(data).encode('utf-8')
-            self.client.sendall(len(serialized).to_bytes(4, 'big') + serialized)
-        except Exception as e:
-            print(f"[NET] Send Error: {e}")
+        if self.my_id != -1 and 'id' not in data:
+            data['id'] = self.my_id
+        with self.send_lock:
+            if data.get('type') == 'MOVE':
+                idx = self.outbox_moves.get(data.get('id'))
+                if idx is not None:
+                    self.outbox[idx] = data
+                    return
+                self.outbox_moves[data.get('id')] = len(self.outbox)
+            self.outbox.append(data)
+
+    def flush(self):
+        """Writes every queued message in one sendall. Called once per frame by the engine."""
+        if self.reconnecting: return # Kept until the new stream is up (the handshake clears it)
+        if self.my_id != -1 and self.connected:
+            now = ClockSync.now()
+            if now >= self.next_ping:
+                # A quick burst until half the sample window is filled, then a slow refresh
+                warm = len(self.clock.samples) >= self.clock.samples.maxlen // 2
+                self.next_ping = now + (CLOCK_SYNC_INTERVAL if warm else 0.25)
+                self.send({"type": "PING", "t0": now})
+        udp = self.udp
+        if (not self.outbox and not udp) or not self.connected: return
+        with self.send_lock:
+            outbox, self.outbox, self.outbox_moves = self.outbox, [], {}
+            try:
+                if udp:
+                    # [UDP] MOVEs go out as datagrams once the server's datagrams reach us; the rest stays on TCP
+                    moves = [self.codec.encode(d) for d in outbox if d.get('type') == 'MOVE'] if udp.ready() else None
+                    if moves:
+                        udp.send_moves(moves); outbox = [d for d in outbox if d.get('type') != 'MOVE']
+                    udp.tick(bool(moves))
+                    if not outbox: return
+                frames = []
+                for data in outbox:
+                    serialized = self.codec.encode(data)
+                    frames.append(len(serialized).to_bytes(4, 'big')); frames.append(serialized)
+                self.client.sendall(b''.join(frames))
+            except Exception as e:
+                print(f"[NET] Send Error: {e}")
+
+    def accept_delta(self, packet):
+        """Checks a PLAYER_LIST/*_DELTA table packet against the local version and acks it.
+        Returns False if the patch does not apply to what we have (stale or out of order)."""
+        table, v = packet.get('table'), packet.get('v', 0)
+        cur = self.table_versions.get(table)
+        if not packet.get('full') and (cur is None or not (packet.get('base', 0) <= cur < v)): return False
+        self.table_versions[table] = v
+        self.send({"type": "ACK", "table": table, "v": v})
+        return True
 
     def get_events(self):
-        events = []
-        while not self.msg_queue.empty():
-            events.append(self.msg_queue.get())
+        if not self.events: return []
+        with self.events_lock:
+            events, self.events = self.events, []
         return events
 
+    def dispatch(self, handlers):
+        """Calls handlers[type](msg) for every message received since the last call."""
+        for e in self.get_events():
+            handler = handlers.get(e.get('type'))
+            if handler: handler(e)
+
     def disconnect(self):
+        self.closing = True
+        self._close_udp()
+        if self.connected and not self.reconnecting:
+            self.send({"type": "LEAVE"}) # Server drops the player now instead of holding the session
+            self.flush() # Last words (e.g. ENTITY_DIED) still go out
         self.connected = False
+        try:
+            self.client.shutdown(socket.SHUT_RDWR) # Wakes the receive thread so the server sees the disconnect
+        except OSError:
+            pass
         try:
             self.client.close()
         except:
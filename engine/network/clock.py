@@ -0,0 +1,44 @@
+import time
+from collections import deque
+from settings import CLOCK_SYNC_SAMPLES
+
+class ClockSync:
+    """Estimates the offset between the local clock and the server clock (NTP style).
+
+    Each PING carries the local send time t0; the PONG adds the server time ts.
+    With t1 the local receive time, rtt = t1 - t0 and the server clock read
+    ts + rtt / 2 at t1. The estimate uses the last CLOCK_SYNC_SAMPLES samples:
+    only the samples whose RTT is at most the median RTT are kept, and the offset is
+    the median of theirs, so queueing spikes do not move it.
+    """
+    def __init__(self, samples=CLOCK_SYNC_SAMPLES):
+        self.samples = deque(maxlen=samples) # [(rtt, offset)]
+        self.offset = None # server - local seconds
+        self.rtt = 0.0
+
+    @staticmethod
+    def now():
+        return time.monotonic()
+
+    def reset(self):
+        self.samples.clear(); self.offset = None; self.rtt = 0.0
+
+    @property
+    def ready(self): return bool(self.samples)
+
+    def add(self, t0, ts, t1=None):
+        """Records one PING/PONG round trip."""
+        if t1 is None: t1 = self.now()
+        rtt = max(0.0, t1 - t0)
+        self.samples.append((rtt, ts + rtt / 2 - t1))
+        rtts = sorted(s[0] for s in self.samples)
+        self.rtt = rtts[len(rtts) // 2]
+        good = sorted(off for r, off in self.samples if r <= self.rtt)
+        self.offset = good[len(good) // 2]
+
+    def observe(self, ts):
+        """Rough offset from a server timestamp alone, used until the first PONG arrives."""
+        if not self.samples: self.offset = ts - self.now()
+
+    def server_now(self):
+        return self.now() + (self.offset or 0.0)
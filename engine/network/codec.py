@@ -0,0 +1,196 @@
+import json
+import struct
+
+# [Wire Format] Payload codecs. JSON payloads always start with '{', so a binary payload is
+# recognised by its leading type byte (< 0x7B) and both can share one stream.
+
+class JsonCodec:
+    name = 'json'
+
+    def handles(self, mtype): return False
+
+    def encode(self, data):
+        return json.dumps(data).encode('utf-8')
+
+    def decode(self, payload):
+        if isinstance(payload, memoryview): payload = payload.tobytes()
+        return json.loads(payload)
+
+    # Per-entity snapshot records are encoded once per tick and joined per recipient
+    def encode_entity(self, rec):
+        return json.dumps(rec).encode('utf-8')
+
+    def encode_snapshot(self, tick, full, parts):
+        return b'{"type": "WORLD_SNAPSHOT", "tick": %d, "full": %s, "entities": [%s]}' % (tick, b'true' if full else b'false', b', '.join(parts))
+
+
+def _pack_str(s):
+    b = (s or '').encode('utf-8')[:255]
+    return bytes((len(b),)) + b
+
+def _unpack_str(buf, off):
+    n = buf[off]; off += 1
+    return bytes(buf[off:off + n]).decode('utf-8', 'ignore'), off + n
+
+def _num(v):
+    return int(v) if v.is_integer() else v
+
+
+# --- Hot message layouts (little endian) ---
+T_MOVE, T_SNAPSHOT, T_TIME_SYNC, T_UPDATE_STATS, T_STATS_DELTA, T_ACK, T_MOVE_ACK = 1, 2, 3, 4, 5, 6, 7
+
+_MOVE = struct.Struct('<BIiibbBI')       # type, id, x, y, fx, fy, moving, input seq (0 = none)
+_SNAP_HEAD = struct.Struct('<BIBH')      # type, tick, full, count
+_SNAP_ENT = struct.Struct('<Iiibbb')     # id, x, y, fx, fy, moving
+_TIME = struct.Struct('<BBHdd')          # type, phase_idx, day, phase_end, server send time
+_STATS_HEAD = struct.Struct('<BI5f')     # type, id, hp, max_hp, ap, max_ap, coins (+ emotion, action strings)
+_DELTA_HEAD = struct.Struct('<BBIIH')    # type, full, v, base, count
+_DELTA_ROW = struct.Struct('<IB')        # id, field mask
+_F32 = struct.Struct('<f')
+_ACK = struct.Struct('<BBI')             # type, table, v
+_MOVE_ACK = struct.Struct('<BIii')       # type, seq, x, y
+
+STAT_NUMS = ('hp', 'max_hp', 'ap', 'max_ap', 'coins')
+STAT_STRS = ('emotion', 'action')
+ACK_TABLES = ('roster', 'stats')
+
+
+def _enc_move(d):
+    fx, fy = d.get('facing') or (0, 1)
+    return _MOVE.pack(T_MOVE, d['id'], d['x'], d['y'], fx, fy, 1 if d.get('is_moving') else 0, d.get('seq') or 0)
+
+def _dec_move(buf):
+    _, mid, x, y, fx, fy, mv, seq = _MOVE.unpack_from(buf)
+    d = {'type': 'MOVE', 'id': mid, 'x': x, 'y': y, 'facing': [fx, fy], 'is_moving': bool(mv)}
+    if seq: d['seq'] = seq
+    return d
+
+def _enc_snapshot(d):
+    ents = d['entities']
+    out = [_SNAP_HEAD.pack(T_SNAPSHOT, d['tick'], 1 if d.get('full') else 0, len(ents))]
+    out.extend(_SNAP_ENT.pack(*e) for e in ents)
+    return b''.join(out)
+
+def _dec_snapshot(buf):
+    _, tick, full, n = _SNAP_HEAD.unpack_from(buf)
+    ents = [list(e) for e in _SNAP_ENT.iter_unpack(buf[_SNAP_HEAD.size:_SNAP_HEAD.size + n * _SNAP_ENT.size])]
+    return {'type': 'WORLD_SNAPSHOT', 'tick': tick, 'full': bool(full), 'entities': ents}
+
+def _enc_time(d):
+    return _TIME.pack(T_TIME_SYNC, d['phase_idx'], d['day'], d['phase_end'], d['ts'])
+
+def _dec_time(buf):
+    _, idx, day, phase_end, ts = _TIME.unpack_from(buf)
+    return {'type': 'TIME_SYNC', 'phase_idx': idx, 'day': day, 'phase_end': phase_end, 'ts': ts}
+
+def _enc_stats(d):
+    return _STATS_HEAD.pack(T_UPDATE_STATS, d['id'], *(d[f] for f in STAT_NUMS)) + b''.join(_pack_str(d.get(f)) for f in STAT_STRS)
+
+def _dec_stats(buf):
+    vals = _STATS_HEAD.unpack_from(buf)
+    d = {'type': 'UPDATE_STATS', 'id': vals[1]}
+    for f, v in zip(STAT_NUMS, vals[2:]): d[f] = _num(v)
+    off = _STATS_HEAD.size
+    for f in STAT_STRS: d[f], off = _unpack_str(buf, off)
+    return d
+
+def _enc_stats_delta(d):
+    full = bool(d.get('full'))
+    rows = [(r['id'], r) for r in d.get('rows', [])] if full else d.get('changed', [])
+    out = [_DELTA_HEAD.pack(T_STATS_DELTA, full, d['v'], d.get('base') or 0, len(rows))]
+    for rid, fields in rows:
+        mask, body = 0, []
+        for i, f in enumerate(STAT_NUMS):
+            if f in fields: mask |= 1 << i; body.append(_F32.pack(fields[f]))
+        for i, f in enumerate(STAT_STRS, len(STAT_NUMS)):
+            if f in fields: mask |= 1 << i; body.append(_pack_str(fields[f]))
+        out.append(_DELTA_ROW.pack(rid, mask)); out.extend(body)
+    removed = d.get('removed', [])
+    out.append(struct.pack(f'<H{len(removed)}I', len(removed), *removed))
+    return b''.join(out)
+
+def _dec_stats_delta(buf):
+    _, full, v, base, n = _DELTA_HEAD.unpack_from(buf)
+    off = _DELTA_HEAD.size
+    rows = []
+    for _ in range(n):
+        rid, mask = _DELTA_ROW.unpack_from(buf, off); off += _DELTA_ROW.size
+        fields = {}
+        for i, f in enumerate(STAT_NUMS):
+            if mask & (1 << i): fields[f] = _num(_F32.unpack_from(buf, off)[0]); off += 4
+        for i, f in enumerate(STAT_STRS, len(STAT_NUMS)):
+            if mask & (1 << i): fields[f], off = _unpack_str(buf, off)
+        rows.append((rid, fields))
+    (rn,) = struct.unpack_from('<H', buf, off)
+    removed = list(struct.unpack_from(f'<{rn}I', buf, off + 2))
+    if full: return {'type': 'STATS_DELTA', 'table': 'stats', 'v': v, 'full': True, 'rows': [dict(f, id=rid) for rid, f in rows]}
+    return {'type': 'STATS_DELTA', 'table': 'stats', 'base': base, 'v': v, 'changed': [[rid, f] for rid, f in rows], 'removed': removed}
+
+def _enc_ack(d):
+    return _ACK.pack(T_ACK, ACK_TABLES.index(d['table']), d['v'])
+
+def _dec_ack(buf):
+    _, t, v = _ACK.unpack_from(buf)
+    return {'type': 'ACK', 'table': ACK_TABLES[t], 'v': v}
+
+def _enc_move_ack(d):
+    return _MOVE_ACK.pack(T_MOVE_ACK, d['seq'], d['x'], d['y'])
+
+def _dec_move_ack(buf):
+    _, seq, x, y = _MOVE_ACK.unpack_from(buf)
+    return {'type': 'MOVE_ACK', 'seq': seq, 'x': x, 'y': y}
+
+
+class BinaryCodec(JsonCodec):
+    """Struct-packed records for the high-frequency message types; everything else stays JSON.
+    A message only takes the binary path if all of its keys are covered by the layout."""
+    name = 'bin1'
+
+    LAYOUTS = {
+        # type: (type byte, keys the layout carries, encoder, decoder)
+        'MOVE': (T_MOVE, {'type', 'id', 'x', 'y', 'facing', 'is_moving', 'seq'}, _enc_move, _dec_move),
+        'WORLD_SNAPSHOT': (T_SNAPSHOT, {'type', 'tick', 'full', 'entities'}, _enc_snapshot, _dec_snapshot),
+        'TIME_SYNC': (T_TIME_SYNC, {'type', 'phase_idx', 'day', 'phase_end', 'ts'}, _enc_time, _dec_time),
+        'UPDATE_STATS': (T_UPDATE_STATS, {'type', 'id'} | set(STAT_NUMS) | set(STAT_STRS), _enc_stats, _dec_stats),
+        'STATS_DELTA': (T_STATS_DELTA, {'type', 'table', 'full', 'base', 'v', 'rows', 'changed', 'removed'}, _enc_stats_delta, _dec_stats_delta),
+        'ACK': (T_ACK, {'type', 'table', 'v', 'id'}, _enc_ack, _dec_ack),
+        'MOVE_ACK': (T_MOVE_ACK, {'type', 'seq', 'x', 'y'}, _enc_move_ack, _dec_move_ack),
+    }
+    DECODERS = {tid: dec for tid, _, _, dec in LAYOUTS.values()}
+
+    def handles(self, mtype): return mtype in self.LAYOUTS
+
+    def encode_entity(self, rec):
+        return _SNAP_ENT.pack(*rec)
+
+    def encode_snapshot(self, tick, full, parts):
+        return _SNAP_HEAD.pack(T_SNAPSHOT, tick, 1 if full else 0, len(parts)) + b''.join(parts)
+
+    def encode(self, data):
+        layout = self.LAYOUTS.get(data.get('type'))
+        if layout and data.keys() <= layout[1]:
+            try: return layout[2](data)
+            except (struct.error, KeyError, TypeError, ValueError, OverflowError): pass # Out-of-range or missing values: send as JSON
+        return super().encode(data)
+
+    def decode(self, payload):
+        if payload[0] == 0x7B: return super().decode(payload)
+        return self.DECODERS[payload[0]](payload)
+
+
+JSON = JsonCodec()
+BINARY = BinaryCodec()
+CODECS = {c.name: c for c in (JSON, BINARY)}
+
+
+# Binary type byte -> message type, for peeking at already encoded payloads
+TYPE_NAMES = {layout[0]: mtype for mtype, layout in BinaryCodec.LAYOUTS.items()}
+
+def payload_type(payload):
+    """Message type of an encoded payload without decoding it (every message is built with 'type' first)."""
+    if payload[0] != 0x7B: return TYPE_NAMES.get(payload[0], '?')
+    head = bytes(payload[:48])
+    i = head.find(b'"type": "')
+    if i < 0: return '?'
+    j = head.find(b'"', i + 9)
+    return head[i + 9:j].decode('utf-8', 'ignore') if j > 0 else '?'
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import deque
+from settings import SEND_QUEUE_LIMIT, SEND_BUFFER_SOFT_LIMIT, SEND_BUFFER_HARD_LIMIT, SLOW_CLIENT_GRACE, UDP_MAX_PAYLOAD
+from engine.network.codec import JSON
+from engine.network.protocol import HEADER_SIZE
+from engine.network.recording import OUT
+
+class ClientConnection:
+    """Server-side handle for one client stream.
+
+    Outbound frames go into a bounded queue that a dedicated writer task drains,
+    so a slow peer only ever delays its own traffic. Frames queued with a
+    coalesce key (e.g. the MOVE of one entity) replace an older queued frame with
+    the same key, and are the first to be dropped when the queue is full.
+    Frames without a key (lobby, chat, deaths) are never dropped.
+
+    Backpressure is measured in bytes: our queue plus what the transport still
+    buffers. Above SEND_BUFFER_SOFT_LIMIT the stale keyed frames (snapshots,
+    stats tables, move acks) are shed oldest first; a client that stays above it
+    for SLOW_CLIENT_GRACE seconds, or passes SEND_BUFFER_HARD_LIMIT with reliable
+    frames alone, is disconnected (and may resume its session).
+
+    Frames where only the latest matters (snapshots, move acks) bypass the
+    queue through send_latest() while the client has a live UDP path.
+    """
+    def __init__(self, reader, writer, pid, max_queue=SEND_QUEUE_LIMIT):
+        self.reader = reader
+        self.writer = writer
+        self.pid = pid
+        self.max_queue = max_queue
+        self.addr = writer.get_extra_info('peername')
+        self.codec = JSON # Switched by SET_CODEC after the WELCOME handshake
+
+        self.queue = deque()  # [[key, packet], ...]
+        self.queued_bytes = 0
+        self.pending = {}     # {key: entry} for queued coalescible frames
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.left = False # Said LEAVE: the player is removed instead of held for a reconnect
+
+        self.visible = set() # Entity ids inside this client's area of interest last tick
+        self.recorder = None # [Recording] MatchRecorder of the server, if it records
+        self.metrics = None # [Metrics] ServerMetrics counting what is actually written
+        self.udp = None # [UDP] UdpPeer registered for this connection's session, if the server has a UDP channel
+
+        # Delta baselines per replicated table: {table: version}
+        self.acked = {}
+        self.sent = {}
+        self.sent_at = {}
+
+        # Stats
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.coalesced = 0
+        self.behind_since = None # When the backlog last rose above the soft limit
+        self.kicked = False
+
+    def enqueue(self, packet, key=None):
+        if self.closed: return False
+
+        if key is not None:
+            entry = self.pending.get(key)
+            if entry is not None:
+                self.queued_bytes += len(packet) - len(entry[1])
+                entry[1] = packet
+                self.coalesced += 1
+                if self.metrics: self.metrics.frames_coalesced += 1
+                return True
+
+        if len(self.queue) >= self.max_queue and not self._drop_oldest():
+            # Queue is full of reliable frames: the peer is hopelessly behind.
+            self.kick(f"send queue overflow ({len(self.queue)} frames)")
+            return False
+
+        entry = [key, packet]
+        self.queue.append(entry)
+        self.queued_bytes += len(packet)
+        if key is not None: self.pending[key] = entry
+        self.wakeup.set()
+        self._check_backlog()
+        return not self.closed
+
+    def send_latest(self, packet, key):
+        """Sends a frame that a newer one supersedes: as a datagram when the client's UDP
+        path is alive and the payload fits, otherwise queued on the stream under key."""
+        udp = self.udp
+        if self.closed or udp is None or not udp.alive() or len(packet) - HEADER_SIZE > UDP_MAX_PAYLOAD:
+            return self.enqueue(packet, key)
+        payload = packet[HEADER_SIZE:]
+        if self.recorder: self.recorder.record(OUT, self.pid, payload)
+        if self.metrics: self.metrics.count_out(packet, HEADER_SIZE)
+        udp.send(payload)
+        return True
+
+    def backlog(self):
+        """Bytes written by the server but not yet accepted by the peer's TCP window."""
+        transport = self.writer.transport
+        return self.queued_bytes + (transport.get_write_buffer_size() if transport else 0)
+
+    def _check_backlog(self):
+        backlog = self.backlog()
+        if backlog <= SEND_BUFFER_SOFT_LIMIT:
+            self.behind_since = None; return
+        shed = 0
+        while backlog > SEND_BUFFER_SOFT_LIMIT:
+            size = self._drop_oldest()
+            if not size: break
+            backlog -= size; shed += 1
+        now = time.monotonic()
+        if self.behind_since is None:
+            self.behind_since = now
+            print(f"[SERVER] Client {self.pid} is {backlog // 1024} KiB behind, shed {shed} stale frames")
+        if backlog > SEND_BUFFER_HARD_LIMIT: self.kick(f"{backlog // 1024} KiB of reliable frames pending")
+        elif backlog > SEND_BUFFER_SOFT_LIMIT and now - self.behind_since > SLOW_CLIENT_GRACE:
+            self.kick(f"over {SEND_BUFFER_SOFT_LIMIT // 1024} KiB behind for {now - self.behind_since:.1f}s")
+
+    def kick(self, reason):
+        if self.closed: return
+        print(f"[SERVER] Disconnecting slow client {self.pid}: {reason} (dropped {self.dropped} frames, {self.dropped_bytes // 1024} KiB)")
+        self.kicked = True
+        self.close()
+        transport = self.writer.transport
+        if transport: transport.abort() # close() would wait for the peer to take the buffered bytes
+
+    def _drop_oldest(self):
+        """Drops the oldest keyed frame. Returns its size, 0 if only reliable frames are queued."""
+        for i, entry in enumerate(self.queue):
+            if entry[0] is not None:
+                del self.queue[i]
+                del self.pending[entry[0]]
+                size = len(entry[1])
+                self.queued_bytes -= size
+                self.dropped += 1; self.dropped_bytes += size
+                if self.metrics: self.metrics.frames_dropped += 1; self.metrics.bytes_dropped += size
+                return size
+        return 0
+
+    async def writer_loop(self):
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+
+                batch = [entry[1] for entry in self.queue]
+                self.queue.clear()
+                self.pending.clear()
+                self.queued_bytes = 0
+
+                if self.recorder:
+                    for frame in batch: self.recorder.record(OUT, self.pid, frame[HEADER_SIZE:])
+                if self.metrics:
+                    for frame in batch: self.metrics.count_out(frame, HEADER_SIZE)
+                self.writer.writelines(batch)
+                await self.writer.drain()
+        except (ConnectionError, OSError) as e:
+            print(f"[SERVER] Send Error to {self.pid}: {e}")
+        finally:
+            self.close()
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self.wakeup.set()
+        try: self.writer.close()
+        except Exception: pass
@@ -0,0 +1,116 @@
+import json
+from collections import deque
+from settings import DELTA_HISTORY
+from engine.network.protocol import frame_payload
+from engine.network.codec import JSON
+
+class DeltaTracker:
+    """Versioned table of {id: {field: value}} rows replicated to clients as per-field patches.
+
+    Writers call update()/remove() as the source data changes and commit() once
+    per flush; each commit bumps the version and records what changed. A client
+    that acked version `base` is sent the merged changes since `base`. Clients
+    that never acked, or whose baseline fell out of the bounded history, get
+    the full table instead.
+    """
+    def __init__(self, name, fields, full_type, delta_type, full_key='rows', history=DELTA_HISTORY):
+        self.name = name
+        self.fields = fields
+        self.full_type = full_type
+        self.delta_type = delta_type
+        self.full_key = full_key
+
+        self.rows = {}     # {id: {field: value}}
+        self.version = 0
+        self.history = deque(maxlen=history) # [(version, changed, removed), ...]
+
+        self._changed = {} # Uncommitted {id: {field: value}}
+        self._removed = set()
+        self._row_json = {} # {id: bytes} serialized rows for full snapshots
+        self._frames = {}   # {(base, codec name): frame} for the current version
+
+    def update(self, rid, data):
+        """Copies the tracked fields of data into row rid. Returns True if anything changed."""
+        row = self.rows.get(rid)
+        if row is None: row = self.rows[rid] = {}
+        diff = {f: data[f] for f in self.fields if f in data and (f not in row or row[f] != data[f])}
+        if not diff: return False
+
+        row.update(diff)
+        self._row_json.pop(rid, None)
+        self._removed.discard(rid)
+        self._changed.setdefault(rid, {}).update(diff)
+        return True
+
+    def remove(self, rid):
+        if rid not in self.rows: return False
+        del self.rows[rid]
+        self._row_json.pop(rid, None)
+        self._changed.pop(rid, None)
+        self._removed.add(rid)
+        return True
+
+    def commit(self):
+        if self._changed or self._removed:
+            self.version += 1
+            self.history.append((self.version, self._changed, self._removed))
+            self._changed = {}; self._removed = set()
+            self._frames.clear()
+        return self.version
+
+    def diff(self, base):
+        """Merged (changed, removed) since base, or None if base is no longer covered by history."""
+        if not self.history or base < self.history[0][0] - 1: return None
+        changed, removed = {}, set()
+        for v, ch, rm in self.history:
+            if v <= base: continue
+            for rid in rm: changed.pop(rid, None); removed.add(rid)
+            for rid, fields in ch.items(): removed.discard(rid); changed.setdefault(rid, {}).update(fields)
+        return changed, removed
+
+    def _full_payload(self):
+        parts = []
+        for rid, row in self.rows.items():
+            frag = self._row_json.get(rid)
+            if frag is None: frag = self._row_json[rid] = json.dumps(row).encode('utf-8')
+            parts.append(frag)
+        head = json.dumps({"type": self.full_type, "table": self.name, "v": self.version, "full": True})[:-1].encode('utf-8')
+        return head + b', "' + self.full_key.encode('utf-8') + b'": [' + b', '.join(parts) + b']}'
+
+    def frame_for(self, base, codec=JSON):
+        """Returns the (shared) frame that brings a client at base up to the current version."""
+        frame = self._frames.get((base, codec.name))
+        if frame is None:
+            d = self.diff(base) if base is not None else None
+            if d is None:
+                if codec.handles(self.full_type):
+                    payload = codec.encode({"type": self.full_type, "table": self.name, "v": self.version, "full": True, self.full_key: list(self.rows.values())})
+                else:
+                    payload = self._full_payload()
+            else:
+                changed, removed = d
+                payload = codec.encode({
+                    "type": self.delta_type, "table": self.name, "base": base, "v": self.version,
+                    "changed": [[rid, fields] for rid, fields in changed.items()], "removed": list(removed)
+                })
+            frame = self._frames[(base, codec.name)] = frame_payload(payload)
+        return frame
+
+
+def iter_delta(packet, key='rows'):
+    """Yields (id, fields) for every row touched by a full or delta table packet."""
+    if packet.get('full'):
+        for row in packet.get(key, []): yield row.get('id'), row
+    else:
+        for rid, fields in packet.get('changed', []): yield rid, fields
+
+
+def apply_delta(rows, packet, key='rows'):
+    """Patches a client-side {id: row} dict in place with a full or delta table packet."""
+    if packet.get('full'): rows.clear()
+    for rid in packet.get('removed', []): rows.pop(rid, None)
+    for rid, fields in iter_delta(packet, key):
+        row = rows.get(rid)
+        if row is None: rows[rid] = dict(fields)
+        else: row.update(fields)
+    return rows
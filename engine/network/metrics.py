@@ -0,0 +1,94 @@
+import asyncio
+import bisect
+import json
+from engine.network.codec import payload_type
+
+# [Metrics] Counters and histograms of one GameServer, served as JSON over HTTP
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds (cheap enough to observe every call)."""
+    BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1; self.total += ms
+        if ms > self.max: self.max = ms
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count: return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank: return self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def report(self):
+        buckets = {str(b): n for b, n in zip(self.BOUNDS, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {'count': self.count, 'avg_ms': self.total / self.count if self.count else 0.0, 'max_ms': self.max,
+                'p50_ms': self.quantile(0.5), 'p99_ms': self.quantile(0.99), 'buckets': buckets}
+
+
+class ServerMetrics:
+    def __init__(self):
+        self.messages_in = {}  # {type: [messages, bytes]} client -> server
+        self.messages_out = {} # {type: [frames, bytes]} server -> client, counted when written
+        self.broadcast = Histogram()
+        self.tick = Histogram()
+        self.tick_overruns = 0 # Ticks that started late because the previous one ran long
+        self.decode_errors = 0
+        self.slow_kicks = 0 # Clients disconnected for falling too far behind (ClientConnection.kick)
+        self.frames_dropped = 0 # Keyed frames shed unsent from full or backed-up queues (all clients, including gone ones)
+        self.bytes_dropped = 0
+        self.frames_coalesced = 0 # Keyed frames replaced in the queue by a newer one before being sent
+
+    def count_in(self, mtype, size):
+        c = self.messages_in.get(mtype)
+        if c is None: c = self.messages_in[mtype] = [0, 0]
+        c[0] += 1; c[1] += size
+
+    def count_out(self, frame, header_size):
+        mtype = payload_type(frame[header_size:])
+        c = self.messages_out.get(mtype)
+        if c is None: c = self.messages_out[mtype] = [0, 0]
+        c[0] += 1; c[1] += len(frame)
+
+    def report(self):
+        table = lambda d: {t: {'messages': n, 'bytes': b} for t, (n, b) in sorted(d.items(), key=lambda kv: -kv[1][1])}
+        return {
+            'in': table(self.messages_in), 'out': table(self.messages_out),
+            'bytes_in': sum(b for _, b in self.messages_in.values()), 'bytes_out': sum(b for _, b in self.messages_out.values()),
+            'broadcast': self.broadcast.report(), 'tick_time': self.tick.report(),
+            'tick_overruns': self.tick_overruns, 'decode_errors': self.decode_errors, 'slow_kicks': self.slow_kicks,
+            'frames_dropped': self.frames_dropped, 'bytes_dropped': self.bytes_dropped, 'frames_coalesced': self.frames_coalesced,
+        }
+
+
+async def serve_metrics(host, port, collect):
+    """Answers any HTTP request on host:port with collect() as JSON (curl http://host:port/)."""
+    async def handle(reader, writer):
+        try:
+            while (await asyncio.wait_for(reader.readline(), 2.0)).strip(): pass # Request line and headers
+            body = json.dumps(collect(), indent=1).encode('utf-8')
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"[SERVER] Metrics Error: {e}")
+        finally:
+            writer.close()
+    try:
+        server = await asyncio.start_server(handle, host, port, reuse_address=True)
+    except OSError as e:
+        print(f"[SERVER] Metrics port {port} unavailable: {e}"); return None
+    print(f"[SERVER] Metrics on http://{host}:{port}/")
+    return server
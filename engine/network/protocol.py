@@ -0,0 +1,15 @@
+from engine.network.codec import BINARY
+
+# [Wire Format] Every message is a 4-byte big-endian length prefix followed by the payload.
+HEADER_SIZE = 4
+
+
+def frame_payload(payload):
+    """Prefixes an already-serialized payload and returns a shareable read-only view of the frame."""
+    return memoryview(len(payload).to_bytes(HEADER_SIZE, 'big') + payload)
+
+
+def decode_payload(payload):
+    """Decodes a frame body (without the length prefix) back into a message dict.
+    Accepts both JSON and binary-codec payloads."""
+    return BINARY.decode(payload)
@@ -0,0 +1,57 @@
+import os
+import struct
+import time
+from settings import RECORD_DIR
+
+# [Recording] Match record stream: MAGIC, then one record per message in the order seen.
+# Each record is a fixed header followed by the payload exactly as it was on the wire
+# (JSON or binary codec, without the 4-byte length prefix).
+MAGIC = b'PXREC1'
+RECORD = struct.Struct('<dBIi') # seconds since recording start, direction, payload length, peer id
+IN, OUT = 0, 1 # Client -> server, server -> client
+
+
+class MatchRecorder:
+    """Appends every inbound and outbound message of a GameServer to a record file.
+    Outbound frames are recorded per recipient when they are written to the socket,
+    so snapshots filtered by area of interest or coalesced away are recorded as sent."""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.t0 = time.monotonic()
+        self.records = 0
+
+    @classmethod
+    def create(cls, room=None):
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        path = os.path.join(RECORD_DIR, f"{room or 'match'}_{time.strftime('%Y%m%d_%H%M%S')}.pxrec")
+        print(f"[SERVER] Recording to {path}")
+        return cls(path)
+
+    def record(self, direction, pid, payload):
+        if self.file is None: return
+        self.file.write(RECORD.pack(time.monotonic() - self.t0, direction, len(payload), pid))
+        self.file.write(payload)
+        self.records += 1
+
+    def flush(self):
+        if self.file: self.file.flush()
+
+    def close(self):
+        if self.file is None: return
+        self.file.close(); self.file = None
+        print(f"[SERVER] Recording closed: {self.records} messages in {self.path}")
+
+
+def read_recording(path):
+    """Yields (t, direction, pid, payload) for every complete record in a recording."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC: raise ValueError(f"{path} is not a PxANIC recording")
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size: return
+            t, direction, size, pid = RECORD.unpack(head)
+            payload = f.read(size)
+            if len(payload) < size: return # Truncated tail (server killed mid-write)
+            yield t, direction, pid, payload
@@ -0,0 +1,162 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+from settings import UDP_TIMEOUT
+from engine.network.protocol import decode_payload
+from engine.network.recording import IN
+
+# [UDP] Optional datagram channel for messages where only the latest one matters
+# (MOVE up, WORLD_SNAPSHOT / MOVE_ACK down). Everything else stays on the TCP stream.
+#
+# client -> server: <8sIB token, seq, receiving> + payload (empty = hello/keepalive)
+# server -> client: <I seq> + payload (empty = reply to a hello)
+#
+# The token is the session token from WELCOME. Each side drops datagrams whose seq is
+# not newer than the last one it accepted. The server only routes traffic over UDP
+# while the client reports that it is receiving datagrams, and answers every
+# keepalive so the client can tell. Either side falls back to TCP after UDP_TIMEOUT.
+CLIENT_HEAD = struct.Struct('<8sIB')
+SERVER_HEAD = struct.Struct('<I')
+UDP_TYPES = ('MOVE',) # Accepted from clients over UDP
+
+
+class UdpPeer:
+    """Server-side datagram path of one client connection."""
+    def __init__(self, channel, token, server, conn):
+        self.channel = channel
+        self.token = token
+        self.server = server
+        self.conn = conn
+        self.addr = None
+        self.seq_in = 0
+        self.seq_out = 0
+        self.last_seen = 0.0
+        self.receiving = False # Client says our datagrams are arriving
+
+    def alive(self):
+        return self.receiving and self.addr is not None and time.monotonic() - self.last_seen < UDP_TIMEOUT
+
+    def send(self, payload):
+        self.seq_out += 1
+        self.channel.transport.sendto(SERVER_HEAD.pack(self.seq_out) + payload, self.addr)
+
+
+class UdpChannel(asyncio.DatagramProtocol):
+    """One UDP socket shared by every GameServer of a process; datagrams are routed by session token."""
+    def __init__(self):
+        self.transport = None
+        self.port = None
+        self.peers = {} # {token bytes: UdpPeer}
+
+    @classmethod
+    async def open(cls, host, port):
+        try:
+            transport, channel = await asyncio.get_running_loop().create_datagram_endpoint(cls, local_addr=(host, port))
+        except OSError as e:
+            print(f"[SERVER] UDP port {port} unavailable: {e}"); return None
+        channel.port = port
+        print(f"[SERVER] UDP channel on {host}:{port}")
+        return channel
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def register(self, token, server, conn):
+        peer = self.peers[bytes.fromhex(token)] = UdpPeer(self, bytes.fromhex(token), server, conn)
+        return peer
+
+    def unregister(self, token):
+        self.peers.pop(bytes.fromhex(token), None)
+
+    def datagram_received(self, data, addr):
+        if len(data) < CLIENT_HEAD.size: return
+        token, seq, receiving = CLIENT_HEAD.unpack_from(data)
+        peer = self.peers.get(token)
+        if peer is None or peer.conn.closed or seq <= peer.seq_in: return # Unknown, gone, stale or duplicate
+        peer.seq_in = seq; peer.addr = addr; peer.last_seen = time.monotonic(); peer.receiving = bool(receiving)
+        if len(data) == CLIENT_HEAD.size:
+            peer.send(b''); return # Keepalive: answer so the client knows the way back works
+        payload = data[CLIENT_HEAD.size:]
+        try:
+            msg = decode_payload(payload)
+        except (ValueError, KeyError, IndexError, struct.error):
+            peer.server.metrics.decode_errors += 1; return
+        if msg.get('type') not in UDP_TYPES: return
+        peer.server.metrics.count_in(msg['type'], len(data))
+        if peer.server.recorder: peer.server.recorder.record(IN, peer.conn.pid, payload) # [Recording] Same payload bytes as a TCP message, so replays see UDP moves too
+        peer.server.process_packet(peer.conn.pid, msg, peer.conn)
+
+
+class UdpLink:
+    """Client side of the channel: a connected UDP socket plus its receive thread."""
+    KEEPALIVE = 1.0      # Seconds between keepalives once datagrams flow
+    PROBE = 0.25         # ... and while waiting for the first reply
+    REPEAT_FOR = 0.5     # The last MOVEs are repeated this long after they stop changing,
+    REPEAT_EVERY = 0.1   # so a lost final position is still delivered (> 1 / TICK_RATE)
+
+    def __init__(self, host, port, session, publish):
+        self.token = bytes.fromhex(session)
+        self.publish = publish # Called with each decoded message from the receive thread
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+        self.seq_out = 0
+        self.seq_in = 0
+        self.last_recv = 0.0
+        self.last_sent = 0.0
+        self.closed = False
+        self.last_moves = []
+        self.repeat_until = 0.0
+        self.next_repeat = 0.0
+        threading.Thread(target=self._receive, daemon=True).start()
+        self._send(b'')
+
+    def ready(self):
+        return time.monotonic() - self.last_recv < UDP_TIMEOUT
+
+    def _send(self, payload):
+        self.seq_out += 1
+        try:
+            self.sock.send(CLIENT_HEAD.pack(self.token, self.seq_out, 1 if self.ready() else 0) + payload)
+        except OSError:
+            pass # Unreachable for now; the keepalive retries and TCP carries the traffic meanwhile
+        self.last_sent = time.monotonic()
+
+    def send_moves(self, payloads):
+        for p in payloads: self._send(p)
+        now = time.monotonic()
+        self.last_moves = payloads
+        self.repeat_until = now + self.REPEAT_FOR
+        self.next_repeat = now + self.REPEAT_EVERY # Longer than the MOVE send interval: no repeats while walking
+
+    def tick(self, sent_moves):
+        """Called once per flush: repeats the last MOVEs for a while and keeps the path open."""
+        now = time.monotonic()
+        if not sent_moves and now < self.repeat_until and now >= self.next_repeat:
+            self.next_repeat = now + self.REPEAT_EVERY
+            for p in self.last_moves: self._send(p)
+        elif now - self.last_sent >= (self.KEEPALIVE if self.ready() else self.PROBE):
+            self._send(b'')
+
+    def _receive(self):
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except OSError:
+                if self.closed: break
+                continue # e.g. ICMP port unreachable before the server listens
+            if len(data) < SERVER_HEAD.size: continue
+            (seq,) = SERVER_HEAD.unpack_from(data)
+            if seq <= self.seq_in: continue # Reordered or duplicated: an older state than we have
+            self.seq_in = seq; self.last_recv = time.monotonic()
+            if len(data) == SERVER_HEAD.size: continue
+            try:
+                self.publish(decode_payload(memoryview(data)[SERVER_HEAD.size:]))
+            except (ValueError, KeyError, IndexError, struct.error) as e:
+                print(f"[NET] UDP Decode Error: {e}")
+
+    def close(self):
+        self.closed = True
+        try: self.sock.close()
+        except OSError: pass
@@ -4,12 +4,13 @@ import math
 import heapq
 import threading
 from settings import *
-from world.tiles import check_collision, get_tile_function, BED_TILES, HIDEABLE_TILES, get_tile_interaction, get_tile_category, get_tile_name, TRANSPARENT_TILES
+from world.tiles import check_collision, get_tile_function, BED_TILES, HIDEABLE_TILES, get_tile_interaction, get_tile_category, get_tile_name
 from systems.logger import GameLogger
 from colors import *
 from game.entities.character import Character
 from systems.renderer import CharacterRenderer
 from systems.behavior_tree import BTNode, Composite, Selector, Sequence, Action, Condition, BTState
+from systems.interpolation import Interpolator, SnapshotClock
 
 FONT_POPUP = None
 
@@ -81,9 +82,8 @@ class Dummy(Character):
         else:
             self.tree = None
 
-        # [Slave Mode Interpolation]
-        self.target_pos = (x, y)
-        self.lerp_factor = 0.1
+        # [Slave Mode Interpolation] Time-stamped snapshots, drawn INTERP_DELAY in the past
+        self.interp = Interpolator()
         
         # [Optimization] AI Tick Rate
         self.ai_timer = random.randint(0, 10) # Stagger updates
@@ -243,7 +243,10 @@ class Dummy(Character):
         danger_roles = ["MAFIA"]
         if self.role == "MAFIA": danger_roles = ["POLICE"]
 
-        for n in bb.get('targets', []):
+        targets = bb.get('targets', [])
+        world = getattr(self, 'world', None)
+        if world: targets = [n for _, n in world.query_entities(self.rect.centerx, self.rect.centery, vision_rad_tiles * TILE_SIZE, danger_roles, self)] # [Optimization] Nearest first
+        for n in targets:
             if n != self and n.alive and n.role in danger_roles:
                 dist = math.hypot(self.rect.centerx - n.rect.centerx, self.rect.centery - n.rect.centery)
                 if dist > vision_rad_tiles * TILE_SIZE: continue
@@ -472,7 +475,7 @@ class Dummy(Character):
 
                 if self.tree:
                      # Re-evaluate tree
-                     blackboard = {'phase': phase, 'player': player, 'npcs': npcs, 'targets': npcs + [player], 'noise_list': noise_list, 'bloody_footsteps': bloody_footsteps, 'day_count': day_count, 'is_mafia_frozen': is_mafia_frozen}
+                     blackboard = {'phase': phase, 'player': player, 'npcs': npcs, 'targets': npcs + [player] if player else npcs, 'noise_list': noise_list, 'bloody_footsteps': bloody_footsteps, 'day_count': day_count, 'is_mafia_frozen': is_mafia_frozen}
                      result = self.tree.tick(self, blackboard)
                      
                      # [Logging] Logic Decision Change
@@ -490,57 +493,44 @@ class Dummy(Character):
             return None
 
     def _update_slave_movement(self):
-        # Simple lerp to target position
-        dx = self.target_pos[0] - self.pos_x
-        dy = self.target_pos[1] - self.pos_y
-        dist = math.sqrt(dx**2 + dy**2)
-        
-        if dist > 1.0:
-            move_x = dx * self.lerp_factor
-            move_y = dy * self.lerp_factor
-            self.pos_x += move_x
-            self.pos_y += move_y
-            self.rect.x = round(self.pos_x)
-            self.rect.y = round(self.pos_y)
-            
-            # Update facing
-            if abs(dx) > abs(dy):
-                self.facing_dir = (1, 0) if dx > 0 else (-1, 0)
-            else:
-                self.facing_dir = (0, 1) if dy > 0 else (0, -1)
-            self.is_moving = True
-        else:
-            self.is_moving = False
+        # Interpolate between the snapshots around the shared render time (frame-rate independent)
+        state = self.interp.sample(SnapshotClock.get_instance().render_time)
+        if state is None: self.is_moving = False; return
+        x, y, self.facing_dir, self.is_moving = state
+        self.pos_x, self.pos_y = x, y
+        self.rect.x = round(x)
+        self.rect.y = round(y)
+        if hasattr(self, 'world') and self.world.spatial_grid: self.world.spatial_grid.update_entity(self) # Radius queries use exact positions
 
     def sync_stats(self, data):
-        """Called by STATS_UPDATE packet"""
+        """Called by STATS_DELTA packets. data may hold only the fields that changed."""
         self.hp = data.get('hp', self.hp)
         self.max_hp = data.get('max_hp', self.max_hp)
         self.ap = data.get('ap', self.ap)
         self.max_ap = data.get('max_ap', self.max_ap)
         self.coins = data.get('coins', self.coins)
         
-        emo = data.get('emotion')
-        if emo and emo != "Neutral":
-            self.emotions = {emo: 1}
-        else:
-            self.emotions = {}
-            
-        self.current_action_text = data.get('action', "Idle")
-
-    def sync_state(self, x, y, hp, ap, role, is_moving, facing):
-        """Called by network manager to update slave state"""
-        self.target_pos = (x, y)
-        # If distance is too big, teleport
-        if math.hypot(x - self.pos_x, y - self.pos_y) > TILE_SIZE * 5:
+        if 'emotion' in data:
+            emo = data['emotion']
+            self.emotions = {emo: 1} if emo and emo != "Neutral" else {}
+        if 'action' in data:
+            self.current_action_text = data['action'] or "Idle"
+
+    def sync_state(self, x, y, hp, ap, role, is_moving, facing, t=None):
+        """Called by network manager to update slave state. t is the snapshot's server time;
+        without one the entity is placed directly."""
+        if t is None:
+            self.interp.samples.clear()
             self.pos_x, self.pos_y = x, y
             self.rect.x, self.rect.y = int(x), int(y)
+            self.is_moving = is_moving
+            self.facing_dir = facing
+            if hasattr(self, 'world') and self.world.spatial_grid: self.world.spatial_grid.update_entity(self)
+        else:
+            self.interp.push(t, x, y, facing, is_moving)
             
         self.hp = hp
         self.ap = ap
-        # Role shouldn't change often but sync it anyway if needed
-        self.is_moving = is_moving
-        self.facing_dir = facing
 
     def set_destination(self, tx, ty, reason="Unknown"):
         if self.is_hiding: self.is_hiding = False; self.hiding_type = 0
@@ -569,16 +559,18 @@ class Dummy(Character):
             # start_gx, start_gy는 인자로 받음 (self.rect 접근 제거)
             if (start_gx, start_gy) == (target_gx, target_gy): self.pending_path = []; return
             open_set = []; heapq.heappush(open_set, (0, start_gx, start_gy)); came_from = {}; g_score = {(start_gx, start_gy): 0}
+            mm = self.map_manager
+            if mm: blocks_sight, is_glass, is_door, mw = mm.blocks_sight, mm.is_glass, mm.is_door, mm.width # [Optimization] Flag grids instead of tile lookups
             while open_set and len(came_from) < 5000:
                 _, cx, cy = heapq.heappop(open_set)
                 if (cx, cy) == (target_gx, target_gy): break
                 for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
                     nx, ny = cx + dx, cy + dy
                     if 0 <= nx < self.map_width and 0 <= ny < self.map_height:
-                        tid_obj = self.map_manager.get_tile(nx, ny, 'object') if self.map_manager else 0
-                        tid_wall = self.map_manager.get_tile(nx, ny, 'wall') if self.map_manager else self.map_data[ny][nx]
-                        blocked = check_collision(tid_wall) or (tid_obj != 0 and check_collision(tid_obj))
-                        if get_tile_category(tid_obj) == 5: blocked = False
+                        if mm:
+                            i = ny * mw + nx
+                            blocked = (blocks_sight[i] or is_glass[i]) and not is_door[i] # Any solid wall/object; doors are passable
+                        else: blocked = check_collision(self.map_data[ny][nx])
                         if (nx, ny) == (target_gx, target_gy): blocked = False
                         if not blocked:
                             new_g = g_score[(cx, cy)] + 1
@@ -623,6 +615,10 @@ class Dummy(Character):
         
         # [New] Separation Force: Push away from other NPCs of same group at night
         if phase in ['EVENING', 'NIGHT', 'DAWN'] and npcs:
+            world = getattr(self, 'world', None)
+            if world: # [Optimization] Same-role NPCs within 48 px from the grid (the player does not push)
+                pl = world.player
+                npcs = [n for _, n in world.query_entities(self.rect.centerx, self.rect.centery, 48, (self.role,), self, lambda n: n is not pl)]
             for n in npcs:
                 if n != self and n.role == self.role and n.alive:
                     dist_sq = (self.pos_x - n.pos_x)**2 + (self.pos_y - n.pos_y)**2
@@ -634,6 +630,7 @@ class Dummy(Character):
                         self.pos_x += (dx / dist) * force
                         self.pos_y += (dy / dist) * force
                         self.rect.x, self.rect.y = round(self.pos_x), round(self.pos_y)
+            if world and world.spatial_grid: world.spatial_grid.update_entity(self)
         
         # [New] Update Emotion State (AI)
         if self.role == "MAFIA" and self.chase_target:
@@ -762,6 +759,7 @@ class Dummy(Character):
             
         # 2. Wall Check (Raycasting using Bresenham's Algorithm)
         if not self.map_manager: return True
+        wall_blocks, object_blocks, mw = self.map_manager.wall_blocks_sight, self.map_manager.object_blocks_sight, self.map_manager.width
         
         # Start and End points in Tile Coordinates
         x0, y0 = int(self.rect.centerx // TILE_SIZE), int(self.rect.centery // TILE_SIZE)
@@ -782,19 +780,10 @@ class Dummy(Character):
             if not (x0 == int(self.rect.centerx // TILE_SIZE) and y0 == int(self.rect.centery // TILE_SIZE)):
                 # Check bounds
                 if 0 <= x0 < self.map_width and 0 <= y0 < self.map_height:
-                    tid_wall = self.map_manager.get_tile(x0, y0, 'wall')
-                    tid_obj = self.map_manager.get_tile(x0, y0, 'object')
-                    
-                    # Check Wall Layer
-                    if tid_wall != 0 and check_collision(tid_wall):
-                        if tid_wall not in TRANSPARENT_TILES: return False
-                    
-                    # Check Object Layer
-                    if tid_obj != 0 and check_collision(tid_obj):
-                        # Allow hiding spots and transparent objects to be seen through?
-                        # Generally if it has collision, it blocks view, EXCEPT transparent ones.
-                        if tid_obj not in TRANSPARENT_TILES and tid_obj not in HIDEABLE_TILES:
-                            return False
+                    # Check Wall Layer, then Object Layer (hiding spots are seen over, glass through)
+                    i = y0 * mw + x0
+                    if wall_blocks[i]: return False
+                    if object_blocks[i]: return False
 
             e2 = 2 * err
             if e2 > -dy:
@@ -12,6 +12,7 @@ from entities.bullet import Bullet
 
 # Logic Modules
 from entities.player_logic.movement import MovementLogic
+from systems.prediction import MovePredictor
 from entities.player_logic.status import StatusLogic
 from entities.player_logic.actions import ActionLogic
 from entities.player_logic.inventory import InventoryLogic
@@ -43,6 +44,7 @@ class Player(Character):
         self.logic_status = StatusLogic(self)
         self.logic_action = ActionLogic(self)
         self.logic_inventory = InventoryLogic(self)
+        self.predictor = MovePredictor() # [Network] Sequenced inputs for server reconciliation
 
         self.logger.info("PLAYER", f"Initialized at ({x}, {y}) Role: {self.role}")
         
@@ -221,7 +223,9 @@ class Player(Character):
         
         # Send stats periodically (e.g., called every 60 frames from State)
         emotion_str = list(self.emotions.keys())[0] if self.emotions else "Neutral"
-        network.send_stats(self.hp, self.max_hp, self.ap, self.max_ap, self.coins, emotion_str, act_text)
+        stats = (self.hp, self.max_hp, self.ap, self.max_ap, self.coins, emotion_str, act_text)
+        if stats == getattr(self, 'last_sent_stats', None): return # Nothing changed since the last send
+        network.send_stats(*stats); self.last_sent_stats = stats
 
     def _update_stamina(self, is_moving):
         self.logic_move.update_stamina(is_moving)
@@ -194,7 +194,10 @@ class ActionLogic:
                     if check_collision(tid): hit_wall = True
                 if hit_wall: b.alive = False; self.p.bullets.remove(b); continue
             bullet_rect = pygame.Rect(b.x-2, b.y-2, 4, 4)
-            targets = [self.p] if b.is_enemy else npcs
+            world = getattr(self.p, 'world', None)
+            if b.is_enemy: targets = [self.p]
+            elif world: targets = [t for _, t in world.query_entities(b.x, b.y, TILE_SIZE * 2, exclude=self.p)] # [Optimization] Only NPCs near the bullet
+            else: targets = npcs
             for t in targets:
                 if t.alive and bullet_rect.colliderect(t.rect): 
                     res = t.take_damage(70)
@@ -65,7 +65,7 @@ class MovementLogic:
             my = dy * speed
             
             self.p.move_single_axis(mx, 0); self.p.move_single_axis(0, my)
-            if mx != 0 or my != 0: is_moving = True
+            if mx != 0 or my != 0: is_moving = True; self.p.predictor.record(mx, my) # Kept for replay on server correction
 
             if dx != 0: self.p.facing_dir = (dx, 0)
             elif dy != 0: self.p.facing_dir = (0, dy)
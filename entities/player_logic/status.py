@@ -55,17 +55,18 @@ class StatusLogic:
         if my_emotion and target_role:
             min_dist_tile = 999
             
-            # [Optimization] Use Spatial Grid instead of iterating all NPCs
-            search_targets = npcs
-            if hasattr(self.p, 'world'):
-                # Search within 30 tiles radius (max emotion range)
-                search_targets = self.p.world.get_nearby_entities(self.p, radius_tiles=30)
-            
-            for n in search_targets:
-                if n.role in target_role and n.alive:
-                    d_px = math.hypot(self.p.rect.centerx - n.rect.centerx, self.p.rect.centery - n.rect.centery)
-                    d_tile = d_px / TILE_SIZE
-                    if d_tile < min_dist_tile: min_dist_tile = d_tile
+            # [Optimization] Role-filtered, distance-sorted grid query (30 tiles = max emotion range):
+            # the first living hit is the nearest, no per-candidate hypot
+            world = getattr(self.p, 'world', None)
+            if world:
+                d_px = world.nearest_entity(self.p.rect.centerx, self.p.rect.centery, 30 * TILE_SIZE, target_role, self.p)[0]
+                if d_px is not None: min_dist_tile = d_px / TILE_SIZE
+            else:
+                for n in npcs:
+                    if n.role in target_role and n.alive:
+                        d_px = math.hypot(self.p.rect.centerx - n.rect.centerx, self.p.rect.centery - n.rect.centery)
+                        d_tile = d_px / TILE_SIZE
+                        if d_tile < min_dist_tile: min_dist_tile = d_tile
             
             level = 0
             if min_dist_tile <= 5: level = 5
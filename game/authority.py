@@ -0,0 +1,61 @@
+import math
+import os
+from settings import TILE_SIZE, FPS, SPEED_RUN, POLICE_SPEED_MULTI, MOVE_SPEED_SLACK
+from world.map_manager import MapManager
+
+# Fastest legal run: every speed emotion maxed (+10% +30% +30%), police, FAST_WORK buff
+MAX_SPEED_PPS = SPEED_RUN * FPS * 1.7 * POLICE_SPEED_MULTI * 1.2 * MOVE_SPEED_SLACK
+MAX_BURST = MAX_SPEED_PPS * 0.25 # Movement that may arrive bunched up after a stall
+HITBOX = TILE_SIZE - 12 # Character hitbox; MOVE x/y is its top-left corner
+
+class MoveValidator:
+    """Server-side check of reported player positions.
+
+    Each mover has a distance budget that refills at the fastest legal speed; a MOVE
+    that travels further than the budget, or ends inside a blocking tile of the
+    server's own collision map, is refused and the last accepted position stands.
+    Doors are treated as open since their state lives on the clients.
+    """
+    def __init__(self, map_file="map.json"):
+        self.map = MapManager()
+        self.map.load_map(map_file)
+        self.width, self.height = self.map.width, self.map.height
+        self.blocked = bytes(m and not d for m, d in zip(self.map.blocks_move, self.map.is_door)) # Flat, y * width + x
+        self.state = {} # {id: [x, y, budget, last time]}
+        self.rejected = 0
+
+    @classmethod
+    def load(cls, map_file="map.json"):
+        """Returns a validator, or None if the map is not available to the server."""
+        if not os.path.exists(map_file):
+            print(f"[SERVER] {map_file} not found, move validation disabled"); return None
+        return cls(map_file)
+
+    def blocked_at(self, x, y):
+        gx0, gy0 = x // TILE_SIZE, y // TILE_SIZE
+        gx1, gy1 = (x + HITBOX - 1) // TILE_SIZE, (y + HITBOX - 1) // TILE_SIZE
+        if gx0 < 0 or gy0 < 0 or gx1 >= self.width or gy1 >= self.height: return True
+        blocked, w = self.blocked, self.width
+        for gy in range(gy0, gy1 + 1):
+            for gx in range(gx0, gx1 + 1):
+                if blocked[gy * w + gx]: return True
+        return False
+
+    def validate(self, mid, x, y, now):
+        """Returns the authoritative (x, y) for a reported position."""
+        st = self.state.get(mid)
+        if st is None:
+            # First fix after spawning: nothing to compare against
+            if self.blocked_at(x, y): return x, y
+            self.state[mid] = [x, y, MAX_BURST, now]; return x, y
+        lx, ly, budget, last = st
+        budget = min(MAX_BURST, budget + MAX_SPEED_PPS * (now - last))
+        dist = math.hypot(x - lx, y - ly)
+        if dist > budget or self.blocked_at(x, y):
+            st[2], st[3] = budget, now; self.rejected += 1
+            return lx, ly
+        st[:] = [x, y, budget - dist, now]
+        return x, y
+
+    def forget(self, mid):
+        self.state.pop(mid, None)
@@ -0,0 +1,117 @@
+import os
+import random
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # No window: the server only needs pygame's clock, Rect and font modules
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import pygame
+from settings import FPS, TICK_RATE
+from world.map_manager import MapManager
+from entities.npc import Dummy
+
+STEPS_PER_TICK = max(1, FPS // TICK_RATE) # Dummy speeds are in pixels per client frame
+STATS_INTERVAL = 1.0 # Seconds between stats pushes per bot, as the host client used to do
+
+class BotSimulation:
+    """Runs the BOT players' behavior trees on the server (headless).
+
+    Bots are master Dummies on a server-side copy of map.json. Human players are
+    mirrored as slave Dummies placed at their last reported position so bots can
+    see, chase and avoid them. step() advances the bots by one server tick and
+    returns what the server has to publish: moved bots, string results of their
+    update (NPC actions) and damage the bots dealt to human players, whose hp
+    stays owned by their own client.
+    """
+    def __init__(self, map_file="map.json"):
+        pygame.init()
+        self.map = MapManager()
+        self.map.load_map(map_file)
+        self.bots = {}    # {id: Dummy} simulated here
+        self.humans = {}  # {id: Dummy} proxies of human players
+        self.entities = []
+        self.last_sent = {} # {id: (x, y, moving, facing)}
+        self.next_stats = 0.0
+
+    @classmethod
+    def load(cls, map_file="map.json"):
+        """Returns a simulation, or None if the map is not available to the server."""
+        if not os.path.exists(map_file):
+            print(f"[SERVER] {map_file} not found, bots stay on the host client"); return None
+        return cls(map_file)
+
+    def _spawn(self):
+        c = self.map.get_spawn_points(zone_id=1)
+        return random.choice(c) if c else (self.map.spawn_x, self.map.spawn_y)
+
+    def _make(self, p, is_master):
+        sx, sy = self._spawn()
+        d = Dummy(sx, sy, None, self.map.width, self.map.height, name=p.get('name') or "Bot", role=p.get('role', 'CITIZEN'), zone_map=self.map.zone_map, map_manager=self.map, is_master=is_master)
+        d.uid = p['id']
+        return d
+
+    def start(self, players):
+        """Builds the match from the server's player table (roles already assigned)."""
+        self.bots, self.humans, self.last_sent = {}, {}, {}
+        for p in players.values():
+            if p.get('group') != 'PLAYER': continue
+            if p.get('type') == 'BOT': self.bots[p['id']] = self._make(p, True)
+            else: self.humans[p['id']] = self._make(p, False)
+        self.entities = list(self.bots.values()) + list(self.humans.values())
+        print(f"[SERVER] Simulating {len(self.bots)} bots")
+
+    def sync_human(self, pid, p):
+        """Mirrors a human player's reported position, role and life into its proxy."""
+        h = self.humans.get(pid)
+        if h is None: return
+        if 'x' in p: h.pos_x, h.pos_y = p['x'], p['y']; h.rect.x, h.rect.y = int(p['x']), int(p['y'])
+        h.facing_dir = tuple(p.get('facing') or (0, 1)); h.is_moving = bool(p.get('is_moving'))
+        h.role = p.get('role', h.role); h.alive = p.get('alive', True)
+
+    def kill(self, eid):
+        ent = self.bots.get(eid) or self.humans.get(eid)
+        if ent: ent.alive = False
+
+    def forget(self, eid):
+        if self.bots.pop(eid, None) or self.humans.pop(eid, None):
+            self.entities = list(self.bots.values()) + list(self.humans.values())
+        self.last_sent.pop(eid, None)
+
+    def morning(self):
+        for b in self.bots.values(): b.morning_process()
+
+    def step(self, phase, day_count):
+        """Advances the bots by one server tick.
+        Returns (moves {id: snapshot record}, actions [(id, action)], hits [(human id, damage)])."""
+        ents = self.entities
+        before = {hid: (h.hp, h.alive) for hid, h in self.humans.items()}
+        actions = []
+        for _ in range(STEPS_PER_TICK):
+            for bid, b in self.bots.items():
+                if not b.alive or b.is_stunned(): continue
+                action = b.update(phase, None, ents, False, [], day_count, [])
+                if isinstance(action, str): actions.append((bid, action))
+        self.map.update_doors(1.0 / TICK_RATE, ents)
+
+        hits = []
+        for hid, h in self.humans.items():
+            # Humans own their hp: report the damage and restore the proxy
+            hp, alive = before[hid]
+            if h.hp < hp: hits.append((hid, hp - h.hp))
+            h.hp, h.alive = hp, alive
+
+        moves = {}
+        for bid, b in self.bots.items():
+            b.popups.clear() # Nobody renders them here
+            fx, fy = b.facing_dir
+            key = (int(b.pos_x), int(b.pos_y), b.is_moving, (fx, fy))
+            if key != self.last_sent.get(bid):
+                self.last_sent[bid] = key
+                moves[bid] = [bid, key[0], key[1], int(fx), int(fy), 1 if b.is_moving else 0]
+        return moves, actions, hits
+
+    def stats_due(self, now):
+        if now < self.next_stats: return False
+        self.next_stats = now + STATS_INTERVAL; return True
+
+    def stats(self, bid):
+        b = self.bots[bid]
+        return {'hp': b.hp, 'max_hp': b.max_hp, 'ap': b.ap, 'max_ap': b.max_ap, 'coins': b.coins,
+                'emotion': next(iter(b.emotions), "Neutral"), 'action': b.current_action_text, 'alive': b.alive}
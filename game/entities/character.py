@@ -212,14 +212,14 @@ class Character(Entity):
         start_gy = max(0, self.rect.top // TILE_SIZE)
         end_gy = min(self.map_height, (self.rect.bottom // TILE_SIZE) + 1)
 
-        collision_cache = getattr(self.map_manager, 'collision_cache', None)
+        blocks_move = getattr(self.map_manager, 'blocks_move', None)
 
         for y in range(start_gy, end_gy):
             for x in range(start_gx, end_gx):
                 is_blocking = False
                 
-                if collision_cache:
-                    if collision_cache[y][x]: is_blocking = True
+                if blocks_move:
+                    if blocks_move[y * self.map_manager.width + x]: is_blocking = True
                 else:
                     tids_to_check = []
                     if self.map_manager:
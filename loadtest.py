@@ -0,0 +1,284 @@
+"""Headless load test for server.py.
+
+Spins up N synthetic clients in one asyncio loop that speak the same protocol as
+NetworkClient: they send UPDATE_PROFILE, START_GAME (first client), MOVE along
+scripted walk paths, CHAT and UPDATE_STATS, and ack delta tables like the real
+client does. Reports relay latency (MOVE send -> WORLD_SNAPSHOT receipt of that
+position by another client), server CPU, bytes in/out, the frames the server shed
+(read from its metrics endpoint, see METRICS_PORT) and snapshot tick gaps.
+
+Usage:
+    python loadtest.py --clients 20 --duration 30            # spawns its own server
+    python loadtest.py --host 127.0.0.1 --port 5555 -n 40    # against a running server
+    python loadtest.py --host ... --metrics-port 0           # ... without reading its metrics
+"""
+import sys
+import os
+import time
+import random
+import json
+import asyncio
+import argparse
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from engine.network.codec import CODECS, BINARY
+from engine.network.protocol import HEADER_SIZE
+from settings import DEFAULT_ROOM, METRICS_PORT, ROOM_WORKERS
+
+TILE = 32
+
+
+def run_server(port, rooms):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from server import GameServer, RoomServer
+    if rooms: RoomServer(port=port).start()
+    else: GameServer(port=port).start()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.sent_at = {}  # {(id, x, y): perf_counter}
+        self.bytes_out = 0 # client -> server
+        self.bytes_in = 0  # server -> client
+        self.frames_in = 0
+        self.tick_gaps = 0
+        self.errors = 0
+        self.shed = None # {'frames_dropped', 'bytes_dropped', 'frames_coalesced'} summed over the server's rooms, None if unavailable
+
+    def percentile(self, p):
+        if not self.latencies: return float('nan')
+        data = sorted(self.latencies)
+        return data[min(len(data) - 1, int(len(data) * p / 100))] * 1000
+
+
+class SyntheticClient:
+    def __init__(self, idx, args, stats, started):
+        self.idx = idx
+        self.args = args
+        self.stats = stats
+        self.room = f"LOAD{idx % args.rooms}" if args.rooms else None
+        self.started = started # asyncio.Event set once this room's START_GAME was sent
+        self.codec = CODECS['json']
+        self.pid = None
+        self.versions = {}
+        self.last_tick = None
+
+        # Walk a square around a home point; homes are spread in clusters across the map
+        cluster = idx % max(1, args.clusters)
+        rng = random.Random(idx)
+        cx = (cluster + 1) * args.map_tiles * TILE // (args.clusters + 1)
+        self.home = (cx + rng.randint(-6, 6) * TILE, args.map_tiles * TILE // 2 + rng.randint(-6, 6) * TILE)
+        self.side = rng.randint(4, 10) * TILE
+        self.phase = rng.random()
+
+    def send(self, data):
+        if self.pid is not None and 'id' not in data: data['id'] = self.pid
+        payload = self.codec.encode(data)
+        frame = len(payload).to_bytes(HEADER_SIZE, 'big') + payload
+        self.writer.write(frame)
+        self.stats.bytes_out += len(frame)
+
+    def position(self, t):
+        # Perimeter walk at ~4 tiles/s
+        per = 4 * self.side
+        d = (t * 4 * TILE + self.phase * per) % per
+        x, y = self.home
+        if d < self.side: return int(x + d), int(y), (1, 0)
+        if d < 2 * self.side: return int(x + self.side), int(y + d - self.side), (0, 1)
+        if d < 3 * self.side: return int(x + 3 * self.side - d), int(y + self.side), (-1, 0)
+        return int(x), int(y + 4 * self.side - d), (0, -1)
+
+    async def run(self, deadline):
+        self.reader, self.writer = await asyncio.open_connection(self.args.host, self.args.port)
+        self.send({"type": "JOIN_ROOM", "room": self.room or DEFAULT_ROOM})
+        recv = asyncio.create_task(self.receive_loop())
+        try:
+            while self.pid is None: await asyncio.sleep(0.01)
+            self.send({"type": "UPDATE_PROFILE", "name": f"Load {self.idx}", "custom": {}})
+            if self.pid == 0: # First client of its room hosts
+                await asyncio.sleep(self.args.ramp)
+                self.send({"type": "START_GAME"}); self.started.set()
+            await self.started.wait()
+
+            interval = 1.0 / self.args.rate
+            loop = asyncio.get_running_loop()
+            t0 = loop.time(); next_send = t0; last = None
+            next_chat = t0 + random.uniform(1, 5); next_stats = t0 + random.random()
+            while loop.time() < deadline:
+                now = loop.time()
+                x, y, facing = self.position(now - t0)
+                if (x, y) != last:
+                    self.stats.sent_at[(self.pid, x, y)] = time.perf_counter()
+                    self.send({"type": "MOVE", "x": x, "y": y, "is_moving": True, "facing": facing}); last = (x, y)
+                if now >= next_chat:
+                    next_chat = now + 5; self.send({"type": "CHAT", "message": f"load {self.idx} says hi"})
+                if now >= next_stats:
+                    next_stats = now + 1
+                    self.send({"type": "UPDATE_STATS", "hp": random.randint(50, 100), "max_hp": 100, "ap": random.randint(0, 100), "max_ap": 100, "coins": self.idx, "emotion": "Neutral", "action": "Walking"})
+                await self.writer.drain()
+                next_send += interval
+                await asyncio.sleep(max(0, next_send - loop.time()))
+            self.send({"type": "LEAVE"}); await self.writer.drain() # Free the player now, not after the reconnect grace
+        finally:
+            recv.cancel()
+            self.writer.close()
+
+    async def receive_loop(self):
+        try:
+            while True:
+                header = await self.reader.readexactly(HEADER_SIZE)
+                body = await self.reader.readexactly(int.from_bytes(header, 'big'))
+                self.stats.bytes_in += HEADER_SIZE + len(body); self.stats.frames_in += 1
+                self.handle(BINARY.decode(body), time.perf_counter())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"[LOAD] Client {self.idx} receive error: {e}")
+
+    def handle(self, msg, now):
+        mtype = msg.get('type')
+        if mtype == 'WELCOME':
+            if self.args.codec in msg.get('codecs', []) and self.args.codec != 'json':
+                self.send({"type": "SET_CODEC", "codec": self.args.codec}); self.codec = CODECS[self.args.codec]
+            self.pid = msg['my_id']
+        elif mtype == 'WORLD_SNAPSHOT':
+            tick = msg['tick']
+            if self.last_tick is not None and tick > self.last_tick + 1: self.stats.tick_gaps += tick - self.last_tick - 1
+            self.last_tick = tick
+            sent_at = self.stats.sent_at
+            for eid, x, y, *_ in msg['entities']:
+                t = sent_at.get((eid, x, y))
+                if t is not None: self.stats.latencies.append(now - t)
+        elif mtype in ('PLAYER_LIST', 'PLAYER_DELTA', 'STATS_DELTA'):
+            table, v = msg.get('table'), msg.get('v', 0)
+            cur = self.versions.get(table)
+            if msg.get('full') or (cur is not None and msg.get('base', 0) <= cur < v):
+                self.versions[table] = v
+                self.send({"type": "ACK", "table": table, "v": v})
+
+
+def cpu_seconds(pid):
+    """utime + stime of a process and its children (room workers), via psutil if available else /proc."""
+    try:
+        import psutil
+        procs = [psutil.Process(pid)]; procs += procs[0].children(recursive=True)
+        return sum(t.user + t.system for t in (p.cpu_times() for p in procs))
+    except ImportError:
+        total = 0.0
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit(): continue
+            try:
+                with open(f"/proc/{entry}/stat") as f: fields = f.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            if int(entry) == pid or int(fields[1]) == pid:
+                total += (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+        return total
+
+
+async def fetch_metrics(host, port):
+    """GETs one metrics endpoint (server.serve_metrics), or None if nothing answers."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 2.0)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(b"GET / HTTP/1.0\r\n\r\n")
+        data = await asyncio.wait_for(reader.read(), 5.0)
+        return json.loads(data.split(b"\r\n\r\n", 1)[1])
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+        return None
+    finally:
+        writer.close()
+
+
+async def collect_shed(args, stats):
+    """Sums the shed counters of every room. Room workers listen on consecutive ports and
+    drop empty rooms, so this runs just before the clients leave."""
+    workers = (ROOM_WORKERS or os.cpu_count() or 1) if args.rooms else 1
+    total = None
+    for port in range(args.metrics_port, args.metrics_port + workers):
+        report = await fetch_metrics(args.host, port)
+        if report is None: continue
+        for room in (report['rooms'].values() if 'rooms' in report else [report]):
+            if total is None: total = {'frames_dropped': 0, 'bytes_dropped': 0, 'frames_coalesced': 0}
+            for k in total: total[k] += room.get(k, 0)
+    stats.shed = total
+
+
+async def run_clients(args, stats):
+    loop = asyncio.get_running_loop()
+    started = [asyncio.Event() for _ in range(max(1, args.rooms))]
+    clients = [SyntheticClient(i, args, stats, started[i % len(started)]) for i in range(args.clients)]
+    deadline = loop.time() + args.ramp + args.duration
+    tasks = []
+    for c in clients:
+        tasks.append(asyncio.create_task(c.run(deadline)))
+        await asyncio.sleep(args.ramp / max(1, args.clients))
+
+    async def prune():
+        # Positions never relayed (filtered by AOI) would otherwise pile up
+        while True:
+            await asyncio.sleep(1)
+            cutoff = time.perf_counter() - 2
+            for k in [k for k, t in stats.sent_at.items() if t < cutoff]: del stats.sent_at[k]
+    pruner = asyncio.create_task(prune())
+    if args.metrics_port:
+        await asyncio.sleep(max(0, deadline - 0.5 - loop.time()))
+        await collect_shed(args, stats)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    pruner.cancel()
+    for r in results:
+        if isinstance(r, Exception): stats.errors += 1; print(f"[LOAD] Client error: {r!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PxANIC server load test")
+    parser.add_argument('-n', '--clients', type=int, default=20)
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help="seconds of measured play after ramp-up")
+    parser.add_argument('--ramp', type=float, default=2.0, help="seconds to connect all clients before START_GAME")
+    parser.add_argument('--rate', type=float, default=60.0, help="MOVE send rate per client (Hz)")
+    parser.add_argument('--codec', default='bin1', choices=list(CODECS))
+    parser.add_argument('--map-tiles', type=int, default=200, help="side of the square area clients walk in")
+    parser.add_argument('--clusters', type=int, default=4, help="number of player clusters spread over the map")
+    parser.add_argument('--rooms', type=int, default=0, help="spread clients over N rooms of a RoomServer (0 = single GameServer)")
+    parser.add_argument('--host', default=None, help="target an already running server instead of spawning one")
+    parser.add_argument('--port', type=int, default=5655)
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT, help="server metrics port, for the frames it shed (0 = don't ask)")
+    args = parser.parse_args()
+
+    server_proc = None
+    if args.host is None:
+        args.host = '127.0.0.1'
+        server_proc = multiprocessing.Process(target=run_server, args=(args.port, args.rooms))
+        server_proc.start(); time.sleep(1.5)
+
+    stats = Stats()
+    cpu0 = cpu_seconds(server_proc.pid) if server_proc else None
+    wall0 = time.perf_counter()
+    asyncio.run(run_clients(args, stats))
+    wall = time.perf_counter() - wall0
+    cpu1 = cpu_seconds(server_proc.pid) if server_proc else None
+
+    if server_proc: server_proc.terminate(); server_proc.join(2)
+
+    print(f"\n[LOAD] {args.clients} clients in {args.rooms or 1} room(s), {args.duration:.0f}s, MOVE {args.rate:.0f} Hz, codec {args.codec}")
+    print(f"  relay latency    p50 {stats.percentile(50):.1f} ms   p99 {stats.percentile(99):.1f} ms   ({len(stats.latencies)} samples)")
+    if cpu0 is not None:
+        print(f"  server CPU       {(cpu1 - cpu0) / wall * 100:.1f}% of one core (including room workers)")
+    print(f"  bytes in/out     {stats.bytes_out / wall / 1024:.1f} KiB/s into server, {stats.bytes_in / wall / 1024:.1f} KiB/s out ({stats.frames_in} frames)")
+    if stats.shed is not None:
+        print(f"  dropped frames   {stats.shed['frames_dropped']} shed by the server ({stats.shed['bytes_dropped'] / 1024:.1f} KiB), {stats.shed['frames_coalesced']} coalesced")
+    elif args.metrics_port:
+        print(f"  dropped frames   unknown (no metrics on port {args.metrics_port})")
+    print(f"  snapshot gaps    {stats.tick_gaps} ticks without a snapshot for a client (AOI filtering and coalescing as well as drops)")
+    if stats.errors: print(f"  errors           {stats.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Replays a match recording (see RECORD_MATCHES) into a headless PlayState.
+
+The server records every message it sent to each client. This driver takes the
+stream one client received, starts a PlayState from its GAME_START and feeds the
+rest back at the recorded times, stepping the game at FPS frames per recorded
+second. --speed 4 runs four times faster than real time, --speed 0 as fast as
+possible. Frame times are measured around update (and draw unless --no-draw), so
+a spike seen in the field can be reproduced and profiled from the recording.
+
+Only the network input is replayed: messages the client sends go nowhere, and
+local randomness is seeded (--seed). Game logic timed by pygame's wall clock
+(cooldowns, interpolation) runs at real speed, so replays are most faithful at
+--speed 1.
+
+Usage:
+    python replay.py recordings/MAIN_20260101_120000.pxrec --list
+    python replay.py recordings/MAIN_20260101_120000.pxrec --pid 1 --speed 4
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+from settings import FPS
+from engine.network.recording import read_recording, OUT
+from engine.network.protocol import decode_payload
+from engine.network.clock import ClockSync
+from systems.network import NetworkManager
+
+
+class ReplayClock(ClockSync):
+    """Server clock estimate on the recording's timeline instead of time.monotonic."""
+    def __init__(self):
+        super().__init__()
+        self.virtual = 0.0
+
+    def now(self): return self.virtual
+
+
+class ReplayClient(NetworkManager):
+    """A NetworkManager whose inbound stream comes from a recording. Nothing is sent."""
+    def __init__(self):
+        super().__init__()
+        self.connected = True
+        self.clock = ReplayClock()
+        self.discarded = 0
+
+    def feed(self, msg):
+        if msg.get('type') == 'PONG': return # The round trip it answered never happened
+        self.events.append(msg)
+
+    def flush(self):
+        self.discarded += len(self.outbox)
+        self.outbox, self.outbox_moves = [], {}
+
+    def disconnect(self):
+        self.connected = False
+
+
+def list_peers(path):
+    peers = {}
+    for t, direction, pid, payload in read_recording(path):
+        p = peers.setdefault(pid, [0, 0, t, t])
+        p[direction] += 1; p[3] = t
+    for pid, (n_in, n_out, t0, t1) in sorted(peers.items()):
+        print(f"  peer {pid:3d}: {n_in:7d} in  {n_out:7d} out  {t0:8.1f}s - {t1:8.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PxANIC match replay")
+    parser.add_argument('recording')
+    parser.add_argument('--pid', type=int, default=0, help="whose view to replay (client id)")
+    parser.add_argument('--speed', type=float, default=1.0, help="multiple of real time, 0 = unpaced")
+    parser.add_argument('--duration', type=float, default=None, help="stop after this many recorded seconds of play")
+    parser.add_argument('--no-draw', action='store_true', help="measure update only")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spike-ms', type=float, default=1000.0 / FPS, help="frames slower than this are listed")
+    parser.add_argument('--list', action='store_true', help="list the peers in the recording and exit")
+    args = parser.parse_args()
+
+    if args.list: list_peers(args.recording); return
+
+    msgs = [(t, decode_payload(payload)) for t, direction, pid, payload in read_recording(args.recording) if direction == OUT and pid == args.pid]
+    start = next((i for i, (_, m) in enumerate(msgs) if m.get('type') == 'GAME_START'), None)
+    if start is None: print(f"[REPLAY] No GAME_START sent to peer {args.pid}"); return
+
+    random.seed(args.seed)
+    from engine.core.game_engine import GameEngine
+    from states.play_state import PlayState
+    g = GameEngine(); net = g.network = ReplayClient()
+
+    # Lobby traffic: who we are and the table versions the in-game deltas build on
+    for _, m in msgs[:start]:
+        if m.get('type') == 'WELCOME': net.my_id = m.get('my_id')
+        elif m.get('type') in ('PLAYER_LIST', 'PLAYER_DELTA', 'STATS_DELTA'): net.accept_delta(m)
+    t0, game_start = msgs[start]
+    g.shared_data['participants'] = list(game_start.get('players', {}).values())
+    g.shared_data['server_bots'] = game_start.get('server_bots', False)
+    net.clock.virtual = t0
+    g.state_machine.push(PlayState(g))
+
+    end = msgs[-1][0] if args.duration is None else min(msgs[-1][0], t0 + args.duration)
+    frame_dt = 1.0 / FPS
+    idx, vt = start + 1, t0
+    frames = []
+    wall0 = time.perf_counter()
+    while vt < end and g.running:
+        vt += frame_dt; net.clock.virtual = vt
+        while idx < len(msgs) and msgs[idx][0] <= vt: net.feed(msgs[idx][1]); idx += 1
+
+        f0 = time.perf_counter()
+        g.update(frame_dt)
+        if not args.no_draw: g.draw()
+        frames.append((time.perf_counter() - f0, vt - t0))
+
+        if args.speed > 0:
+            delay = wall0 + (vt - t0) / args.speed - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+    wall = time.perf_counter() - wall0
+
+    if not frames: print("[REPLAY] Nothing to replay"); return
+    times = sorted(f[0] for f in frames)
+    pct = lambda p: times[min(len(times) - 1, int(len(times) * p / 100))] * 1000
+    spikes = sorted((f for f in frames if f[0] * 1000 > args.spike_ms), reverse=True)
+    print(f"\n[REPLAY] peer {args.pid}: {len(frames)} frames, {vt - t0:.1f}s of play in {wall:.1f}s ({idx - start} messages)")
+    print(f"  frame time       p50 {pct(50):.2f} ms   p95 {pct(95):.2f} ms   p99 {pct(99):.2f} ms   max {times[-1] * 1000:.2f} ms")
+    print(f"  over {args.spike_ms:.1f} ms     {len(spikes)} frames")
+    for ft, at in spikes[:10]: print(f"    {ft * 1000:7.2f} ms at {at:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
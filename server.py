@@ -1,17 +1,41 @@
+import asyncio
+import os
+import secrets
 import socket
+import struct
 import threading
-import json
 import time
-from settings import NETWORK_PORT, BUFFER_SIZE, DEFAULT_PHASE_DURATIONS
+import zlib
+import multiprocessing
+from multiprocessing import reduction
+from settings import ROOM_WORKERS, ROOM_JOIN_TIMEOUT, DEFAULT_ROOM, RECONNECT_GRACE
+from settings import NETWORK_PORT, DEFAULT_PHASE_DURATIONS, DELTA_RESEND_TIMEOUT, TICK_RATE, TILE_SIZE
+from settings import VISION_RADIUS, AOI_MARGIN_TILES, SPECTATOR_SNAPSHOT_INTERVAL, SERVER_AUTHORITATIVE, SERVER_BOTS, RECORD_MATCHES
+from settings import METRICS_HOST, METRICS_PORT, SERVER_UDP, UDP_PORT
+from game.authority import MoveValidator
+from game.bot_sim import BotSimulation
+from core.spatial_grid import SpatialGrid
+from engine.network.protocol import HEADER_SIZE, frame_payload, decode_payload
+from engine.network.codec import CODECS
+from engine.network.connection import ClientConnection
+from engine.network.delta import DeltaTracker
+from engine.network.recording import MatchRecorder, IN
+from engine.network.metrics import ServerMetrics, serve_metrics
+from engine.network.udp import UdpChannel
+
+# Player fields replicated through each delta table (positions travel via MOVE)
+ROSTER_FIELDS = ('id', 'name', 'role', 'group', 'type', 'alive', 'custom')
+STATS_FIELDS = ('id', 'hp', 'max_hp', 'ap', 'max_ap', 'coins', 'emotion', 'action')
 
 class GameServer:
-    def __init__(self):
-        self.host = "0.0.0.0"
-        self.port = NETWORK_PORT
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    def __init__(self, host="0.0.0.0", port=NETWORK_PORT, room=None, authoritative=SERVER_AUTHORITATIVE, server_bots=SERVER_BOTS, record=RECORD_MATCHES):
+        self.host = host
+        self.port = port
+        self.room = room # Room code when hosted by a RoomWorker
+        self.on_empty = None # Called when the last client leaves
+        self._loop_task = None
         
-        self.clients = {} # {socket: pid}
+        self.clients = {} # {ClientConnection: pid}
         self.players = {} # {pid: data}
         self.next_id = 0
         self.game_started = False
@@ -21,55 +45,204 @@ class GameServer:
         self.phases = ["DAWN", "MORNING", "NOON", "AFTERNOON", "EVENING", "NIGHT"]
         self.current_phase_idx = 0
         self.day_count = 1
-        self.state_timer = DEFAULT_PHASE_DURATIONS[self.phases[0]]
-        self.last_tick = time.time()
+        self.phase_end = 0.0 # [Clock Sync] Absolute server time (time.monotonic) at which the current phase ends
         self.news_log = []
+        self.last_news = [] # Last DAILY_NEWS sent, repeated in RESYNC
+        self.deaths = [] # [[id, reason]] this game, repeated in RESYNC
         self.game_over = False
 
-    def start(self):
-        try:
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(10)
-            print(f"[SERVER] Running on {self.host}:{self.port}")
+        # [Reconnect] Session tokens from WELCOME let a dropped client take its player back within RECONNECT_GRACE
+        self.sessions = {} # {token: pid}
+        self.detached = {} # {pid: time.monotonic() deadline} players whose connection dropped
 
-            threading.Thread(target=self.game_loop, daemon=True).start()
+        # [Optimization] Versioned tables: clients receive per-field patches against their acked version
+        self.roster = DeltaTracker('roster', ROSTER_FIELDS, 'PLAYER_LIST', 'PLAYER_DELTA', full_key='participants')
+        self.stats = DeltaTracker('stats', STATS_FIELDS, 'STATS_DELTA', 'STATS_DELTA')
 
-            while self.running:
-                client_sock, addr = self.server_socket.accept()
-                pid = self.next_id
-                self.next_id += 1
-                
-                self.clients[client_sock] = pid
-                self.players[pid] = {
-                    'id': pid, 'name': f"Player {pid+1}", 'role': 'CITIZEN',
-                    'group': 'PLAYER', 'type': 'PLAYER', 'x': -1000, 'y': -1000, 'alive': True
-                }
-
-                thread = threading.Thread(target=self.handle_client, args=(client_sock, pid))
-                thread.daemon = True
-                thread.start()
+        # [Optimization] Fixed-rate tick: MOVEs are collected per entity and sent as one WORLD_SNAPSHOT per tick
+        self.tick = 0
+        self.pending_moves = {} # {id: [id, x, y, fx, fy, moving]}
+
+        # [Optimization] Area of interest: clients only receive movers within their view radius + margin
+        self.grid = SpatialGrid(0, 0)
+        self.positions = {} # {id: latest snapshot record}
+        self.spectator_moves = {} # Moves accumulated for the reduced-rate spectator feed
+        self.aoi_radius = VISION_RADIUS['DAY'] + AOI_MARGIN_TILES
+
+        # [Authority] Player MOVEs are checked against the server's collision map and acked with the accepted position
+        self.validator = MoveValidator.load() if authoritative else None
+        self.move_acks = {} # {pid: (seq, x, y)} latest validated MOVE per client, sent once per tick
+
+        # [Server Bots] Bot behavior trees run here instead of on the host client
+        self.bots = BotSimulation.load() if server_bots else None
+
+        # [Recording] Every message in and out, for post-mortems and replay.py
+        self.record = record
+        self.recorder = None
+
+        # [Metrics] Served as JSON on METRICS_PORT (see metrics_report)
+        self.metrics = ServerMetrics()
+
+        # [UDP] Snapshots and MOVEs travel as datagrams for clients that take the offer in WELCOME
+        self.udp = None # UdpChannel opened by serve() or shared by the RoomWorker
+
+    def start(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
         except Exception as e:
             print(f"[SERVER] Critical Error: {e}")
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port, reuse_address=True)
+        print(f"[SERVER] Running on {self.host}:{self.port}")
+        if METRICS_PORT: await serve_metrics(METRICS_HOST, METRICS_PORT, self.metrics_report)
+        if SERVER_UDP: self.udp = await UdpChannel.open(self.host, UDP_PORT)
+
+        self.open()
+        try:
+            async with server:
+                await server.serve_forever()
         finally:
-            self.server_socket.close()
+            self.close()
+            if self.udp: self.udp.transport.close()
+
+    def open(self):
+        """Starts the game loop on the running event loop (clients are attached via handle_client)."""
+        if self.record: self.recorder = MatchRecorder.create(self.room)
+        self._loop_task = asyncio.create_task(self.game_loop())
 
-    def game_loop(self):
+    def close(self):
+        self.running = False
+        if self._loop_task: self._loop_task.cancel()
+        for conn in list(self.clients): conn.close()
+        if self.recorder: self.recorder.close()
+
+    async def game_loop(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / TICK_RATE
+        next_tick = loop.time()
         while self.running:
-            time.sleep(0.1)
-            if not self.game_started: continue
-            
-            now = time.time()
-            dt = now - self.last_tick
-            self.last_tick = now
-            
-            self.state_timer -= dt
-            if self.state_timer <= 0:
-                self._advance_phase()
+            # Scheduled against absolute deadlines so the rate does not drift with processing time
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay > 0: await asyncio.sleep(delay)
+            else: next_tick = loop.time(); self.metrics.tick_overruns += 1 # Fell behind: skip missed ticks instead of bursting
+            self.tick += 1
+            started = time.perf_counter()
+
+            if self.bots and self.game_started and not self.game_over: self.step_bots()
+            self.flush_snapshot()
+            self.flush_move_acks()
+            self.flush_table(self.roster) # Re-sends unacked patches
+            self.flush_table(self.stats, self._wants_stats)
+            if self.detached: self._expire_sessions()
+            if self.recorder: self.recorder.flush()
+            if self.game_started:
+                # Clients count down to phase_end themselves; TIME_SYNC only goes out when the phase changes
+                if time.monotonic() >= self.phase_end:
+                    self._advance_phase()
                 
-            if int(now) % 5 == 0:
-                self.broadcast({"type": "TIME_SYNC", "phase_idx": self.current_phase_idx, "timer": self.state_timer, "day": self.day_count})
-            
-            self.check_win_conditions()
+                self.check_win_conditions()
+            self.metrics.tick.observe((time.perf_counter() - started) * 1000)
+
+    def flush_snapshot(self):
+        """Sends each client a WORLD_SNAPSHOT of the movers inside its area of interest.
+        Entities that just entered the area are included even if they stand still, and once
+        per second the snapshot is a keyframe of the whole area, so clients whose queued
+        snapshots were coalesced away still converge. Spectators get the full map every
+        SPECTATOR_SNAPSHOT_INTERVAL ticks instead."""
+        moves, self.pending_moves = self.pending_moves, {}
+        for mid, rec in moves.items():
+            self.positions[mid] = rec
+            self.grid.move_point(mid, rec[1] + TILE_SIZE // 2, rec[2] + TILE_SIZE // 2)
+        self.spectator_moves.update(moves)
+
+        keyframe = self.game_started and self.tick % TICK_RATE == 0
+        spectator_tick = self.tick % SPECTATOR_SNAPSHOT_INTERVAL == 0
+        if not moves and not keyframe and not (spectator_tick and self.spectator_moves): return
+
+        records, frames = {}, {} # Entity records are encoded once per codec; identical id sets share a frame
+        for conn, pid in list(self.clients.items()):
+            left = frozenset()
+            if self._is_spectating(pid):
+                if not spectator_tick: continue
+                ids = self.positions.keys() if keyframe else self.spectator_moves.keys()
+                conn.visible = set()
+            else:
+                aoi = self._interest_set(pid)
+                ids = aoi if keyframe else (aoi & moves.keys()) | (aoi - conn.visible)
+                # Entities leaving the area get one last record with moving cleared, so the client
+                # does not keep walking them in place until they come back into view
+                left = frozenset(eid for eid in conn.visible - aoi if eid in self.positions)
+                conn.visible = aoi
+            ids = frozenset(ids) - {pid}
+            if not ids and not left: continue
+
+            codec = conn.codec
+            frame = frames.get((codec, ids, left))
+            if frame is None:
+                parts = []
+                for eid in ids:
+                    part = records.get((codec, eid))
+                    if part is None: part = records[(codec, eid)] = codec.encode_entity(self.positions[eid])
+                    parts.append(part)
+                for eid in left:
+                    part = records.get((codec, eid, 'left'))
+                    if part is None: part = records[(codec, eid, 'left')] = codec.encode_entity(tuple(self.positions[eid][:5]) + (0,))
+                    parts.append(part)
+                frame = frames[(codec, ids, left)] = frame_payload(codec.encode_snapshot(self.tick, keyframe, parts))
+            conn.send_latest(frame, ('SNAPSHOT',))
+        if spectator_tick: self.spectator_moves = {}
+
+    def step_bots(self):
+        """Advances the server-side bots one tick and feeds the results into the normal
+        replication paths: positions into the snapshot, stats into the stats table."""
+        moves, actions, hits = self.bots.step(self.phases[self.current_phase_idx], self.day_count)
+        for bid, rec in moves.items():
+            p = self.players.get(bid)
+            if p is None: continue
+            p.update({'x': rec[1], 'y': rec[2], 'facing': [rec[3], rec[4]], 'is_moving': bool(rec[5])})
+            self.pending_moves[bid] = rec
+        for bid, action in actions: self.broadcast({"type": "NPC_ACTION", "id": bid, "action": action})
+        if hits:
+            hits = dict(hits)
+            for conn, pid in list(self.clients.items()):
+                if pid in hits: self.send_to(conn, {"type": "BOT_DAMAGE", "amount": hits[pid]})
+
+        stats_due = self.bots.stats_due(time.monotonic())
+        for bid in self.bots.bots:
+            p = self.players.get(bid)
+            if p is None: continue
+            st = self.bots.stats(bid)
+            if not st.pop('alive') and p.get('alive', True): self._record_death(bid, "a stabbing incident")
+            elif stats_due: p.update(st); self._touch(bid)
+
+    def flush_move_acks(self):
+        if not self.move_acks: return
+        acks, self.move_acks = self.move_acks, {}
+        for conn, pid in list(self.clients.items()):
+            ack = acks.get(pid)
+            if ack: conn.send_latest(frame_payload(conn.codec.encode({"type": "MOVE_ACK", "seq": ack[0], "x": ack[1], "y": ack[2]})), ('MOVE_ACK',))
+
+    def _wants_stats(self, conn, pid):
+        """Only the spectator panel shows the whole stats table: spectators and the dead."""
+        return self._is_spectating(pid)
+
+    def _is_spectating(self, pid):
+        p = self.players.get(pid)
+        return p is None or p.get('group') == 'SPECTATOR' or not p.get('alive', True)
+
+    def _interest_set(self, pid):
+        """Ids within the interest radius of the client's player, plus of every bot it simulates (the host runs master bots)."""
+        centers = [pid]
+        if pid == 0 and self.bots is None: centers += [bid for bid, p in self.players.items() if p.get('type') == 'BOT']
+        aoi = set()
+        for cid in centers:
+            pos = self.grid.position(cid)
+            if pos: self.grid.query_point(pos[0], pos[1], self.aoi_radius, aoi)
+        return aoi
 
     def _advance_phase(self):
         old_phase = self.phases[self.current_phase_idx]
@@ -82,10 +255,14 @@ class GameServer:
         if new_phase == "MORNING":
             if not self.news_log: self.news_log = ["No special news today."]
             self.broadcast({"type": "DAILY_NEWS", "news": self.news_log})
-            self.news_log = []
+            self.last_news = self.news_log; self.news_log = []
+            if self.bots: self.bots.morning()
+
+        self.phase_end += DEFAULT_PHASE_DURATIONS.get(new_phase, 30) # From the scheduled end, so phases never drift
+        self.broadcast(self.phase_message())
 
-        self.state_timer = DEFAULT_PHASE_DURATIONS.get(new_phase, 30)
-        self.broadcast({"type": "TIME_SYNC", "phase_idx": self.current_phase_idx, "timer": self.state_timer, "day": self.day_count})
+    def phase_message(self):
+        return {"type": "TIME_SYNC", "phase_idx": self.current_phase_idx, "day": self.day_count, "phase_end": self.phase_end, "ts": time.monotonic()}
 
     def check_win_conditions(self):
         if not self.game_started or self.game_over: return
@@ -100,79 +277,168 @@ class GameServer:
         self.game_over = True
         self.broadcast({"type": "GAME_OVER", "winner": winner})
 
-    def handle_client(self, sock, pid):
-        self.send_to(sock, {"type": "WELCOME", "my_id": pid})
+    async def handle_client(self, reader, writer, join=None):
+        """Serves one client stream. Clients open with JOIN_ROOM (already read by the RoomServer
+        acceptor when there is one); a valid session token in it resumes a held player."""
+        first = None
+        if join is None:
+            try:
+                header = await asyncio.wait_for(reader.readexactly(HEADER_SIZE), ROOM_JOIN_TIMEOUT)
+                first = decode_payload(await asyncio.wait_for(reader.readexactly(int.from_bytes(header, 'big')), ROOM_JOIN_TIMEOUT))
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError, KeyError, IndexError, struct.error) as e:
+                print(f"[SERVER] Rejected connection: {e!r}"); writer.close(); return
+            if first.get('type') == 'JOIN_ROOM': join, first = first, None
+
+        token = (join or {}).get('session')
+        pid = self.sessions.get(token) if token else None
+        resumed = pid is not None and pid in self.players
+        if resumed:
+            for old, opid in list(self.clients.items()):
+                if opid == pid: del self.clients[old]; old.close() # Half-open connection we had not noticed yet
+            held = self.detached.pop(pid, None)
+        else:
+            pid = self.next_id
+            self.next_id += 1
+            token = secrets.token_hex(8); self.sessions[token] = pid
+            self.players[pid] = {
+                'id': pid, 'name': f"Player {pid+1}", 'role': 'CITIZEN',
+                'group': 'PLAYER', 'type': 'PLAYER', 'x': -1000, 'y': -1000, 'alive': True
+            }
+            self._touch(pid)
+
+        conn = ClientConnection(reader, writer, pid)
+        conn.recorder = self.recorder; conn.metrics = self.metrics
+        if self.udp: conn.udp = self.udp.register(token, self, conn)
+        self.clients[conn] = pid
+        writer_task = asyncio.create_task(conn.writer_loop())
+
+        self.send_to(conn, {"type": "WELCOME", "my_id": pid, "codecs": list(CODECS), "session": token, "resumed": resumed, "udp": self.udp.port if self.udp else None})
+        if resumed:
+            self.send_to(conn, self.resync_message())
+            away = f" after {time.monotonic() - held + RECONNECT_GRACE:.2f}s" if held else ""
+            print(f"[SERVER] Player {pid} resumed session{away}")
+        elif self.game_started: self.send_to(conn, self.phase_message())
         self.broadcast_player_list()
         try:
-            while self.running:
-                header = sock.recv(4)
-                if not header: break
+            if first: self.process_packet(pid, first, conn)
+            while self.running and not conn.closed:
+                header = await reader.readexactly(HEADER_SIZE)
                 msg_len = int.from_bytes(header, byteorder='big')
-                data = b""
-                while len(data) < msg_len:
-                    packet = sock.recv(msg_len - len(data))
-                    if not packet: break
-                    data += packet
-                if not data: break
+                data = await reader.readexactly(msg_len)
+                if self.recorder: self.recorder.record(IN, pid, data)
                 try:
-                    payload = json.loads(data.decode('utf-8'))
-                    self.process_packet(pid, payload)
-                except json.JSONDecodeError as e:
-                    print(f"[SERVER] JSON Error from {pid}: {e}")
+                    payload = decode_payload(data)
+                    self.metrics.count_in(payload.get('type'), HEADER_SIZE + msg_len)
+                    self.process_packet(pid, payload, conn)
+                except (ValueError, KeyError, IndexError, struct.error) as e:
+                    self.metrics.decode_errors += 1
+                    print(f"[SERVER] Decode Error from {pid}: {e}")
                 except Exception as e:
                     print(f"[SERVER] Packet Error from {pid}: {e}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
         except Exception as e:
             print(f"[SERVER] Client Handler Error: {e}")
         finally:
-            self.remove_client(sock, pid)
+            self.remove_client(conn, pid)
+            writer_task.cancel()
+
+    def remove_client(self, conn, pid):
+        conn.close()
+        if conn.kicked: self.metrics.slow_kicks += 1
+        if self.clients.get(conn) != pid: return # Already replaced by a resumed connection
+        del self.clients[conn]
+        if pid in self.players and self.running and not conn.left:
+            # Hold the player so the client can come back with its session token
+            self.detached[pid] = time.monotonic() + RECONNECT_GRACE
+            print(f"[SERVER] Player {pid} dropped, holding session for {RECONNECT_GRACE:.0f}s")
+            return
+        self._drop_player(pid)
 
-    def remove_client(self, sock, pid):
-        if sock in self.clients: del self.clients[sock]
+    def _drop_player(self, pid):
         if pid in self.players: del self.players[pid]
-        try: sock.close()
-        except: pass
+        self._touch(pid)
+        for token in [t for t, p in self.sessions.items() if p == pid]:
+            del self.sessions[token]
+            if self.udp: self.udp.unregister(token)
         self.broadcast_player_list()
+        if not self.clients and not self.detached and self.on_empty: self.on_empty()
+
+    def _expire_sessions(self):
+        now = time.monotonic()
+        for pid in [p for p, deadline in self.detached.items() if deadline <= now]:
+            del self.detached[pid]
+            print(f"[SERVER] Session of player {pid} expired")
+            self._drop_player(pid)
+
+    def resync_message(self):
+        """Everything a resuming client needs at once: phase, news, deaths and every known position.
+        Roster and stats follow as full tables since the new connection has acked nothing."""
+        return {
+            "type": "RESYNC", "started": self.game_started, "phase_idx": self.current_phase_idx, "day": self.day_count,
+            "phase_end": self.phase_end, "ts": time.monotonic(), "news": self.last_news, "deaths": self.deaths,
+            "entities": list(self.positions.values())
+        }
 
-    def process_packet(self, pid, data):
+    def process_packet(self, pid, data, conn=None):
         ptype = data.get('type')
-        if ptype == 'UPDATE_ROLE':
+        if ptype == 'PING':
+            # [Clock Sync] Echo the client's send time with ours; the client derives RTT and offset
+            if conn: self.send_to(conn, {"type": "PONG", "t0": data.get('t0'), "ts": time.monotonic()})
+        elif ptype == 'LEAVE':
+            if conn: conn.left = True; conn.close() # Deliberate quit: no reconnect grace
+        elif ptype == 'SET_CODEC':
+            if conn and data.get('codec') in CODECS: conn.codec = CODECS[data['codec']]
+        elif ptype == 'ACK':
+            table = {'roster': self.roster, 'stats': self.stats}.get(data.get('table'))
+            v = data.get('v')
+            if conn and table and isinstance(v, int) and conn.acked.get(table.name, -1) < v <= table.version:
+                conn.acked[table.name] = v
+        elif ptype == 'UPDATE_ROLE':
             target_id = data.get('id', pid) # Use provided ID or sender ID
             if target_id in self.players:
-                self.players[target_id]['role'] = data.get('role'); self.broadcast_player_list()
+                self.players[target_id]['role'] = data.get('role'); self._touch(target_id); self.broadcast_player_list()
         elif ptype == 'UPDATE_PROFILE':
             if pid in self.players:
                 self.players[pid]['name'] = data.get('name', self.players[pid]['name'])
                 self.players[pid]['custom'] = data.get('custom', {})
+                self._touch(pid)
                 self.broadcast_player_list()
         elif ptype == 'CHANGE_GROUP':
             tid = data.get('target_id')
             if tid in self.players:
-                self.players[tid]['group'] = data.get('group'); self.broadcast_player_list()
+                self.players[tid]['group'] = data.get('group'); self._touch(tid); self.broadcast_player_list()
         elif ptype == 'ADD_BOT':
             bid = self.next_id; self.next_id += 1
             self.players[bid] = {
                 'id': bid, 'name': data.get('name'), 'role': 'RANDOM',
                 'group': data.get('group'), 'type': 'BOT', 'x': -1000, 'y': -1000, 'alive': True
             }
+            self._touch(bid)
             self.broadcast_player_list()
         elif ptype == 'REMOVE_BOT':
             target_id = data.get('target_id')
             if target_id in self.players and self.players[target_id].get('type') == 'BOT':
                 del self.players[target_id]
+                self._touch(target_id)
                 self.broadcast_player_list()
         elif ptype == 'START_GAME':
             if pid == 0:
                 # [Game Start Logic] Assign Random Roles using Rules
                 from game.rules import RoleManager
                 RoleManager.distribute_roles(list(self.players.values()))
+                for p_id in self.players: self._touch(p_id)
+                if self.bots: self.bots.start(self.players)
                 
-                self.game_started = True; self.last_tick = time.time()
-                self.broadcast({"type": "GAME_START", "players": self.players})
+                self.game_started = True; self.deaths = []
+                self.phase_end = time.monotonic() + DEFAULT_PHASE_DURATIONS[self.phases[self.current_phase_idx]]
+                self.broadcast({"type": "GAME_START", "players": self.players, "server_bots": self.bots is not None})
+                self.broadcast(self.phase_message())
         elif ptype == 'UPDATE_STATS':
             # [Spectator] Receive stats from client and broadcast to spectators (or everyone)
             # Data: hp, ap, coins, emotion, action_text, etc.
             sid = data.get('id', pid)
-            if sid in self.players:
+            if sid in self.players and not (self.bots and sid in self.bots.bots): # Simulated bots report through step_bots
                 self.players[sid].update({
                     'hp': data.get('hp'),
                     'max_hp': data.get('max_hp'),
@@ -182,24 +448,24 @@ class GameServer:
                     'emotion': data.get('emotion'),
                     'action': data.get('action')
                 })
-                # Broadcast only to spectators to save bandwidth? 
-                # For now, broadcast to all effectively updates the "Shared State"
-                self.broadcast({"type": "STATS_UPDATE", "id": sid, "stats": self.players[sid]})
+                self._touch(sid) # Sent as a STATS_DELTA on the next tick
 
         elif ptype == 'ENTITY_DIED':
             victim_id = data.get('victim')
-            reason = data.get('reason', 'natural causes')
-            if victim_id in self.players:
-                self.players[victim_id]['alive'] = False
-                name = self.players[victim_id].get('name', 'Someone')
-                self.news_log.append(f"{name} has died of {reason}.")
-                self.broadcast_player_list() # Update lobby/play lists
+            if victim_id in self.players: self._record_death(victim_id, data.get('reason', 'natural causes'))
 
         elif ptype == 'MOVE':
             mid = data.get('id', pid) # Can be bot ID sent by host
-            if mid in self.players:
-                self.players[mid].update({'x': data['x'], 'y': data['y'], 'facing': data.get('facing'), 'is_moving': data.get('is_moving')})
-                self.broadcast(data, exclude_pid=pid)
+            if mid in self.players and not (self.bots and mid in self.bots.bots):
+                x, y = int(data['x']), int(data['y'])
+                if self.validator and mid == pid:
+                    if self._is_spectating(pid): self.validator.forget(pid)
+                    else: x, y = self.validator.validate(pid, x, y, time.time())
+                    if data.get('seq'): self.move_acks[pid] = (data['seq'], x, y)
+                self.players[mid].update({'x': x, 'y': y, 'facing': data.get('facing'), 'is_moving': data.get('is_moving')})
+                if self.bots: self.bots.sync_human(mid, self.players[mid])
+                fx, fy = data.get('facing') or (0, 1)
+                self.pending_moves[mid] = [mid, x, y, int(fx), int(fy), 1 if data.get('is_moving') else 0]
         
         elif ptype == 'CHAT':
             # Add sender name for convenience
@@ -209,26 +475,204 @@ class GameServer:
                 data['sender_name'] = f"System {pid}"
             self.broadcast(data)
 
+    def _record_death(self, victim_id, reason):
+        p = self.players[victim_id]
+        p['alive'] = False
+        self._touch(victim_id)
+        if self.bots: self.bots.kill(victim_id)
+        self.news_log.append(f"{p.get('name', 'Someone')} has died of {reason}.")
+        self.deaths.append([victim_id, reason])
+        self.broadcast_player_list() # Update lobby/play lists
+
+    def _touch(self, pid):
+        """Records changes to self.players[pid] in the delta tables (call after mutating self.players)."""
+        pdata = self.players.get(pid)
+        if pdata is None:
+            self.roster.remove(pid); self.stats.remove(pid)
+            self.positions.pop(pid, None); self.pending_moves.pop(pid, None); self.spectator_moves.pop(pid, None)
+            self.grid.remove_point(pid); self.move_acks.pop(pid, None)
+            if self.validator: self.validator.forget(pid)
+            if self.bots: self.bots.forget(pid)
+        else:
+            self.roster.update(pid, pdata)
+            if 'hp' in pdata: self.stats.update(pid, pdata)
+
+    def flush_table(self, table, audience=None):
+        """Commits pending changes and sends each client the patch from its acked version.
+        Clients sharing a baseline share one frame; never-acked clients get the full table.
+        With an audience(conn, pid) filter, other clients keep their baseline and catch up
+        from it once they are in the audience again."""
+        version = table.commit()
+        now = time.time()
+        for conn, pid in list(self.clients.items()):
+            if audience and not audience(conn, pid): continue
+            if conn.acked.get(table.name) == version: continue
+            if conn.sent.get(table.name) == version and now - conn.sent_at.get(table.name, 0) < DELTA_RESEND_TIMEOUT: continue
+            conn.enqueue(table.frame_for(conn.acked.get(table.name), conn.codec), key=('TABLE', table.name))
+            conn.sent[table.name] = version; conn.sent_at[table.name] = now
+
     def broadcast_player_list(self):
-        self.broadcast({"type": "PLAYER_LIST", "participants": list(self.players.values())})
+        self.flush_table(self.roster)
 
-    def send_to(self, sock, data):
+    def send_to(self, conn, data):
         try:
-            serialized = json.dumps(data).encode('utf-8')
-            sock.sendall(len(serialized).to_bytes(4, 'big') + serialized)
+            conn.enqueue(frame_payload(conn.codec.encode(data)))
         except Exception as e:
             print(f"[SERVER] Send Error: {e}")
 
-    def broadcast(self, data, exclude_pid=None):
+    def broadcast(self, data, exclude_pid=None, key=None):
+        """Queues data for every client. Frames with a key may be coalesced or dropped for slow clients.
+        The message is encoded at most once per codec and recipients share the read-only frame."""
+        started = time.perf_counter()
         try:
-            serialized = json.dumps(data).encode('utf-8')
-            packet = len(serialized).to_bytes(4, 'big') + serialized
-            for sock, pid in self.clients.items():
-                if pid != exclude_pid:
-                    try: sock.sendall(packet)
-                    except: pass
+            frames = {}
+            for conn, pid in list(self.clients.items()):
+                if pid == exclude_pid: continue
+                frame = frames.get(conn.codec)
+                if frame is None: frame = frames[conn.codec] = frame_payload(conn.codec.encode(data))
+                conn.enqueue(frame, key)
         except Exception as e:
             print(f"[SERVER] Broadcast Error: {e}")
+        self.metrics.broadcast.observe((time.perf_counter() - started) * 1000)
+
+    def metrics_report(self):
+        report = {
+            'room': self.room, 'server_tick': self.tick, 'game_started': self.game_started,
+            'clients': len(self.clients), 'players': len(self.players), 'detached': len(self.detached),
+            'queues': {str(pid): {'depth': len(conn.queue), 'bytes': conn.backlog(), 'dropped': conn.dropped, 'dropped_bytes': conn.dropped_bytes,
+                                  'coalesced': conn.coalesced, 'codec': conn.codec.name}
+                       for conn, pid in self.clients.items()},
+        }
+        report.update(self.metrics.report())
+        return report
+
+
+class RoomServer:
+    """One listening port for many matches.
+
+    The acceptor reads the client's first frame (JOIN_ROOM {room}) and hands the
+    socket to a worker process chosen by hashing the room code, so a room always
+    lives in the same worker. Each worker runs any number of GameServer rooms on
+    its own event loop; a room is created on first join and dropped once empty.
+    """
+    def __init__(self, host="0.0.0.0", port=NETWORK_PORT, workers=ROOM_WORKERS):
+        self.host = host
+        self.port = port
+        self.num_workers = workers or os.cpu_count() or 1
+        self.workers = [] # [(process, pipe)]
+
+    def start(self):
+        for i in range(self.num_workers):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=run_room_worker, args=(child, i), daemon=True)
+            proc.start()
+            self.workers.append((proc, parent))
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"[SERVER] Critical Error: {e}")
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        listener = socket.create_server((self.host, self.port))
+        listener.setblocking(False)
+        print(f"[SERVER] Room server on {self.host}:{self.port} with {self.num_workers} workers")
+        while True:
+            sock, _ = await loop.sock_accept(listener)
+            asyncio.create_task(self.route(sock))
+
+    async def route(self, sock):
+        try:
+            header = await asyncio.wait_for(self._recv_exact(sock, HEADER_SIZE), ROOM_JOIN_TIMEOUT)
+            size = int.from_bytes(header, 'big')
+            if size > 1024: raise ValueError(f"join frame too large ({size})")
+            msg = decode_payload(await asyncio.wait_for(self._recv_exact(sock, size), ROOM_JOIN_TIMEOUT))
+            if msg.get('type') != 'JOIN_ROOM': raise ValueError(f"expected JOIN_ROOM, got {msg.get('type')}")
+            code = str(msg.get('room') or DEFAULT_ROOM).upper()[:16]
+            self.hand_off(code, sock, msg)
+        except (asyncio.TimeoutError, ConnectionError, OSError, ValueError, KeyError) as e:
+            print(f"[SERVER] Rejected connection: {e!r}")
+        finally:
+            sock.close() # The worker owns its own duplicate
+
+    async def _recv_exact(self, sock, n):
+        # Reads exactly n bytes so nothing past the join frame is consumed here
+        loop = asyncio.get_running_loop()
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = await loop.sock_recv(sock, n - len(buf))
+            if not chunk: raise ConnectionError("closed before JOIN_ROOM")
+            buf += chunk
+        return bytes(buf)
+
+    def hand_off(self, code, sock, join):
+        proc, pipe = self.workers[zlib.crc32(code.encode('utf-8')) % len(self.workers)]
+        if os.name == 'nt':
+            pipe.send((code, join, sock.share(proc.pid)))
+        else:
+            pipe.send((code, join, None))
+            reduction.send_handle(pipe, sock.fileno(), proc.pid)
+
+
+class RoomWorker:
+    """Hosts the GameServer rooms that hash to this worker, all on one event loop."""
+    def __init__(self, pipe, index):
+        self.pipe = pipe
+        self.index = index
+        self.rooms = {} # {code: GameServer}
+        self.udp = None # [UDP] One datagram port per worker, shared by its rooms (routed by session token)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.done = asyncio.Event()
+        threading.Thread(target=self._recv_sockets, daemon=True).start()
+        if METRICS_PORT: await serve_metrics(METRICS_HOST, METRICS_PORT + self.index, self.metrics_report)
+        if SERVER_UDP: self.udp = await UdpChannel.open("0.0.0.0", UDP_PORT + self.index)
+        await self.done.wait()
+
+    def _recv_sockets(self):
+        # Blocking pipe reads stay off the event loop
+        try:
+            while True:
+                if not self.pipe.poll(1.0):
+                    # Exit with the acceptor even if it died without closing the pipe
+                    parent = multiprocessing.parent_process()
+                    if parent is not None and not parent.is_alive(): break
+                    continue
+                code, join, share = self.pipe.recv()
+                if share is None: sock = socket.socket(fileno=reduction.recv_handle(self.pipe))
+                else: sock = socket.fromshare(share)
+                asyncio.run_coroutine_threadsafe(self.attach(code, sock, join), self.loop)
+        except (EOFError, OSError):
+            pass # Acceptor went away
+        self.loop.call_soon_threadsafe(self.done.set)
+
+    async def attach(self, code, sock, join):
+        room = self.rooms.get(code)
+        if room is None:
+            room = self.rooms[code] = GameServer(room=code)
+            room.udp = self.udp
+            room.on_empty = lambda: self._drop_room(code)
+            room.open()
+            print(f"[SERVER] Worker {self.index}: opened room {code} ({len(self.rooms)} active)")
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await room.handle_client(reader, writer, join)
+
+    def metrics_report(self):
+        return {'worker': self.index, 'rooms': {code: room.metrics_report() for code, room in self.rooms.items()}}
+
+    def _drop_room(self, code):
+        room = self.rooms.pop(code, None)
+        if room: room.close(); print(f"[SERVER] Worker {self.index}: closed room {code}")
+
+
+def run_room_worker(pipe, index):
+    try:
+        asyncio.run(RoomWorker(pipe, index).run())
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
-    GameServer().start()
\ No newline at end of file
+    RoomServer().start()
@@ -190,4 +190,44 @@ except Exception as e:
 # [Network Settings]
 NETWORK_PORT = 5555
 SERVER_IP = "127.0.0.1" # Localhost default
-BUFFER_SIZE = 4096
\ No newline at end of file
+BUFFER_SIZE = 4096
+RECV_BUFFER_SIZE = 65536 # [Network] Initial client receive buffer (grows for larger frames)
+SEND_QUEUE_LIMIT = 256 # [Server] Max queued outbound frames per client before dropping
+SEND_BUFFER_SOFT_LIMIT = 256 * 1024 # [Server] Outbound backlog (bytes) per client above which stale snapshots/stats are shed
+SEND_BUFFER_HARD_LIMIT = 1024 * 1024 # [Server] Backlog of reliable frames (bytes) that gets a client disconnected at once
+SLOW_CLIENT_GRACE = 5.0 # [Server] Seconds a client may stay above the soft limit before it is disconnected
+DEFAULT_ROOM = 'PUBLIC' # [Network] Room joined when no room code is given
+ROOM_WORKERS = 0 # [Server] Room worker processes (0 = one per CPU core)
+ROOM_JOIN_TIMEOUT = 5.0 # [Server] Seconds a new connection has to send JOIN_ROOM
+NETWORK_CODEC = 'bin1' # [Network] Preferred wire codec ('json' or 'bin1'), negotiated in WELCOME
+TICK_RATE = 20 # [Server] Authoritative ticks per second (20 or 30); also caps client MOVE send rate
+AOI_MARGIN_TILES = 18 # [Server] Interest radius = VISION_RADIUS['DAY'] + margin (covers the 30-tile emotion/heartbeat checks)
+SPECTATOR_SNAPSHOT_INTERVAL = 4 # [Server] Spectators/dead players get full-map snapshots every N ticks
+DELTA_HISTORY = 64 # [Server] Committed roster/stats versions kept for delta snapshots
+DELTA_RESEND_TIMEOUT = 1.0 # [Server] Seconds to wait for an ACK before re-sending a table patch
+INTERP_DELAY = 0.1 # [Network] Remote entities are drawn this many seconds behind the server clock
+INTERP_MAX_EXTRAPOLATION = 0.15 # [Network] Max seconds to dead-reckon past the newest snapshot when packets are late
+INTERP_BUFFER_SIZE = 32 # [Network] Snapshots kept per remote entity
+PREDICTION_HISTORY = 120 # [Network] Unacked local movement inputs kept for replay (~2 s at 60 FPS)
+PREDICTION_TOLERANCE = 2.0 # [Network] Pixels a MOVE_ACK may differ from the prediction before correcting
+SERVER_AUTHORITATIVE = False # [Server] Validate player MOVEs against the server collision map and reply with MOVE_ACK
+MOVE_SPEED_SLACK = 1.5 # [Server] Allowed speed factor over the fastest legal run speed (lag bursts, FPS jitter)
+CLOCK_SYNC_SAMPLES = 8 # [Network] PING/PONG round trips kept for the median clock offset
+CLOCK_SYNC_INTERVAL = 2.0 # [Network] Seconds between clock-sync PINGs once warmed up
+RECONNECT_GRACE = 30.0 # [Server] Seconds a dropped player is held for its session token
+RECONNECT_TIMEOUT = 10.0 # [Network] Seconds the client keeps re-dialling after the connection drops
+# [Server Bots] Run BOT behavior trees on the server (headless, needs map.json) instead of on the host client
+SERVER_BOTS = False
+# [Recording] Write every server message in and out to RECORD_DIR (see replay.py)
+RECORD_MATCHES = False
+RECORD_DIR = "recordings"
+# [Metrics] JSON stats over HTTP on METRICS_HOST (room worker i uses METRICS_PORT + i; 0 disables)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 5556
+# [UDP] Optional datagram channel for MOVE/WORLD_SNAPSHOT/MOVE_ACK, offered in WELCOME (room worker i uses UDP_PORT + i)
+SERVER_UDP = False
+UDP_PORT = 5600
+UDP_TIMEOUT = 3.0 # Seconds without datagrams before either side falls back to TCP
+UDP_MAX_PAYLOAD = 1200 # Larger snapshots go over TCP (stay under a typical path MTU)
+NETWORK_UDP = True # Client: use the UDP channel when the server offers it
+NETWORK_UDP_PORT = 0 # Client: send datagrams here instead of the offered port (e.g. a udp_netem.py proxy)
\ No newline at end of file
@@ -6,8 +6,9 @@ from game.rules import RoleManager
 from managers.resource_manager import ResourceManager
 from engine.audio.sound_manager import SoundManager
 from systems.network import NetworkManager
+from engine.network.delta import apply_delta
 from colors import COLORS
-from settings import MAX_PLAYERS, MAX_SPECTATORS, DEFAULT_PHASE_DURATIONS, MAX_TOTAL_USERS
+from settings import MAX_PLAYERS, MAX_SPECTATORS, DEFAULT_PHASE_DURATIONS, MAX_TOTAL_USERS, DEFAULT_ROOM
 
 from ui.widgets.settings_popup import SettingsPopup
 from ui.widgets.chat_box import ChatBox
@@ -66,6 +67,7 @@ class LobbyState(State):
             # Multiplayer Mode
             if not self.game.network.connected:
                 self.game.network.ip = target_ip
+                self.game.network.room_code = self.game.shared_data.get('room_code') or DEFAULT_ROOM
                 if not self.game.network.connect():
                     print(f"[LOBBY] Failed to connect to {target_ip}")
                     # Fallback to single player or show error? 
@@ -88,9 +90,12 @@ class LobbyState(State):
                 name = self.game.shared_data.get('player_name', 'Player')
                 custom = self.game.shared_data.get('custom', {})
                 self.game.network.send_profile(name, custom)
-            elif e.get('type') == 'PLAYER_LIST':
-                self.participants = e.get('participants', [])
-                self.game.shared_data['participants'] = self.participants
+            elif e.get('type') in ('PLAYER_LIST', 'PLAYER_DELTA'):
+                # [Network] Versioned roster: full list or per-field patch against our last version
+                if self.game.network.accept_delta(e):
+                    rows = apply_delta({p['id']: p for p in self.participants}, e, 'participants')
+                    self.participants = list(rows.values())
+                    self.game.shared_data['participants'] = self.participants
             elif e.get('type') == 'GAME_START':
                 # [Fix] Update participants with assigned roles from Server
                 players_data = e.get('players', {})
@@ -100,6 +105,7 @@ class LobbyState(State):
                     self.participants = players_data # Should be dict, but safety check
                 
                 self.game.shared_data['participants'] = self.participants
+                self.game.shared_data['server_bots'] = e.get('server_bots', False) # Bots run on the server, not on the host
                 
                 from states.play_state import PlayState
                 self.game.state_machine.change(PlayState(self.game))
@@ -256,6 +262,10 @@ class LobbyState(State):
         self._draw_nav_button(screen, "HOME", 10 + btn_w + gap, 10, btn_w, btn_h, 'Nav_Home')
         # Settings Button (Top Right)
         self._draw_nav_button(screen, "CONFIG", w - btn_w - 10, 10, btn_w, btn_h, 'Nav_Settings')
+        # Room code (share this to let friends join)
+        if self.game.network.connected:
+            room_txt = self.bold_font.render(f"ROOM: {self.game.network.room_code}", True, (255, 220, 120))
+            screen.blit(room_txt, (w // 2 - room_txt.get_width() // 2, 15))
 
     def _draw_nav_button(self, screen, text, x, y, w, h, key):
         rect = pygame.Rect(x, y, w, h)
@@ -1,4 +1,6 @@
 import pygame
+import random
+import string
 from engine.core.state import State
 from managers.resource_manager import ResourceManager
 from engine.audio.sound_manager import SoundManager
@@ -131,8 +133,9 @@ class MultiMenuState(State):
             self.popup.handle_event(event)
             if self.popup.done:
                 if self.popup.result:
-                    # Join Game Logic
-                    target_ip = self.popup.result
+                    # Join Game Logic ("IP" or "IP#ROOM")
+                    target_ip, _, room = self.popup.result.partition('#')
+                    self.game.shared_data['room_code'] = room.strip().upper() or None
                     self.sound_manager.play_sfx("CLICK")
                     from states.lobby_state import LobbyState
                     # Pass IP to LobbyState via params or shared_data
@@ -160,12 +163,13 @@ class MultiMenuState(State):
                     self.sound_manager.play_sfx("CLICK")
                     from states.lobby_state import LobbyState
                     self.game.shared_data['server_ip'] = '127.0.0.1' 
+                    self.game.shared_data['room_code'] = ''.join(random.choices(string.ascii_uppercase, k=4))
                     self.game.state_machine.change(LobbyState(self.game))
                 
                 if 'Join' in self.buttons and self.buttons['Join'].collidepoint(mx, my):
                     self.sound_manager.play_sfx("CLICK")
                     w, h = self.game.screen.get_size()
-                    self.popup = InputPopup(w, h, "Enter Server IP", SERVER_IP)
+                    self.popup = InputPopup(w, h, "Enter Server IP (IP#ROOM)", SERVER_IP)
                     
                 if 'Back' in self.buttons and self.buttons['Back'].collidepoint(mx, my):
                     self.sound_manager.play_sfx("CLICK")
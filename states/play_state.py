@@ -21,6 +21,8 @@ from ui import UI
 from entities.bullet import Bullet
 from systems.debug_console import DebugConsole
 from entities.npc import Dummy
+from systems.interpolation import SnapshotClock
+from engine.network.delta import apply_delta, iter_delta
 from ui.widgets.pause_menu import PauseMenu
 from ui.widgets.cctv_view import CCTVViewWidget
 from ui.widgets.chat_box import ChatBox
@@ -42,6 +44,7 @@ class PlayState(State):
         self.fov = None
         self.visible_tiles = set()
         self.tile_alphas = {} 
+        self.tiles_fading = False
         self.zoom_level = 1.5
         self.effect_surf = pygame.Surface((self.game.screen_width, self.game.screen_height), pygame.SRCALPHA)
         self.ui = None
@@ -51,7 +54,18 @@ class PlayState(State):
         self.my_vote_target = None
         self.candidate_rects = []
         self.heartbeat_timer = 0
-        self.last_sent_pos = (0, 0)
+        self.last_sent_pos = (0, 0, False)
+        self.next_move_send = 0 # [Network] MOVE send throttle (TICK_RATE)
+        self.snapshot_clock = SnapshotClock.get_instance() # [Network] Render clock for interpolated remote entities
+        self.net_handlers = {
+            'WORLD_SNAPSHOT': self._on_world_snapshot, 'TIME_SYNC': self._on_time_sync,
+            'STATS_DELTA': self._on_stats_delta, 'DAILY_NEWS': self._on_daily_news,
+            'GAME_OVER': self._on_game_over, 'GAME_START': self._on_game_start,
+            'PLAYER_LIST': self._on_player_list, 'PLAYER_DELTA': self._on_player_list,
+            'CHAT': self._on_chat, 'MOVE_ACK': self._on_move_ack,
+            'RESYNC': self._on_resync, 'SESSION_LOST': self._on_session_lost,
+            'NPC_ACTION': self._on_npc_action, 'BOT_DAMAGE': self._on_bot_damage,
+        }
         
         # [Work Navigation]
         self.work_target_tid = None
@@ -88,6 +102,7 @@ class PlayState(State):
 
     def enter(self, params=None):
         self.logger.info("PLAY", "Entering PlayState...")
+        self.snapshot_clock.reset() # Tick numbering restarts with every game
         self.world.load_map("map.json")
         self.map_renderer = MapRenderer(self.world.map_manager)
         self.camera = Camera(self.game.screen_width, self.game.screen_height, 
@@ -102,7 +117,7 @@ class PlayState(State):
         # [Network] Send Initial Spawn Position
         if self.player and hasattr(self.game, 'network') and self.game.network.connected:
             self.game.network.send_move(int(self.player.pos_x), int(self.player.pos_y), False, (0, 1))
-            self.last_sent_pos = (int(self.player.pos_x), int(self.player.pos_y))
+            self.last_sent_pos = (int(self.player.pos_x), int(self.player.pos_y), False)
 
         self.sound_system.sound_manager.play_music("GAME_THEME")
 
@@ -111,6 +126,98 @@ class PlayState(State):
         elif self.weather == 'FOG': self.ui.show_alert("Dense Fog...", (150, 150, 150)); self.sound_system.sound_manager.play_sfx("ALERT")
         elif self.weather == 'SNOW': self.ui.show_alert("It's Snowing...", (200, 200, 255)); self.sound_system.sound_manager.play_sfx("ALERT")
 
+    # --- Network message handlers (dispatched once per frame from update) ---
+    def _on_world_snapshot(self, e):
+        # [Network] One frame per server tick: [id, x, y, fx, fy, moving] per moved entity
+        entities = self.world.entities_by_id
+        t = self.snapshot_clock.observe(e['tick'])
+        for eid, x, y, fx, fy, moving in e.get('entities', []):
+            ent = entities.get(eid)
+            if isinstance(ent, Dummy) and not ent.is_master: ent.sync_state(x, y, ent.hp, ent.ap, ent.role, bool(moving), (fx, fy), t)
+        if e.get('full'):
+            # [Network] A keyframe lists everything in our area: whoever is missing left it, and if the
+            # server's last record for them was lost (coalesced or dropped datagram) they still walk in place
+            seen = {rec[0] for rec in e.get('entities', [])}
+            for eid, ent in entities.items():
+                if eid in seen or not isinstance(ent, Dummy) or ent.is_master: continue
+                s = ent.interp.samples
+                if s and s[-1][4] and s[-1][0] < t: ent.interp.push(t, s[-1][1], s[-1][2], s[-1][3], False)
+
+    def _on_move_ack(self, e):
+        # [Authority] Server-accepted position for one of our MOVEs; rewinds and replays if we mispredicted
+        if self.player.predictor.reconcile(self.player, e['seq'], e['x'], e['y']):
+            if self.world.spatial_grid: self.world.spatial_grid.update_entity(self.player)
+
+    def _on_time_sync(self, e):
+        clock = self.game.network.clock
+        clock.observe(e['ts'])
+        self.time_system.sync_phase(e['phase_idx'], e['day'], e['phase_end'], clock)
+
+    def _on_stats_delta(self, e):
+        # [Spectator] Sync detailed stats for Dummy entities (only changed fields are sent)
+        if self.game.network.accept_delta(e):
+            for eid, fields in iter_delta(e):
+                ent = self.world.entities_by_id.get(eid)
+                if ent is not None and hasattr(ent, 'sync_stats'): ent.sync_stats(fields)
+
+    def _on_resync(self, e):
+        # [Reconnect] One full-state message after resuming a session, instead of replaying what was missed
+        clock = self.game.network.clock
+        clock.observe(e['ts'])
+        if e.get('started'): self.time_system.sync_phase(e['phase_idx'], e['day'], e['phase_end'], clock)
+        entities = self.world.entities_by_id
+        for eid, x, y, fx, fy, moving in e.get('entities', []):
+            ent = entities.get(eid)
+            if isinstance(ent, Dummy) and not ent.is_master: ent.sync_state(x, y, ent.hp, ent.ap, ent.role, bool(moving), (fx, fy))
+        for vid, _ in e.get('deaths', []):
+            ent = entities.get(vid)
+            if isinstance(ent, Dummy): ent.alive = False
+        if e.get('news') and e['news'] != getattr(self.ui, 'news_text', None): self.ui.show_daily_news(e['news'])
+        self.player.predictor.reset()
+        self.ui.show_alert("Reconnected", (100, 255, 100))
+
+    def _on_session_lost(self, e):
+        # The server already forgot our player and WELCOMEd us as someone new: drop that stranger and go back to the lobby
+        self.ui.show_alert("Connection lost: session expired", (255, 100, 100))
+        self.game.network.disconnect()
+        pygame.time.set_timer(pygame.USEREVENT + 10, 3000)
+
+    # [Server Bots] Results of bots simulated by the server
+    def _on_npc_action(self, e):
+        ent = self.world.entities_by_id.get(e.get('id'))
+        if isinstance(ent, Dummy): self._handle_npc_action(e.get('action'), ent, 0)
+
+    def _on_bot_damage(self, e):
+        if self.player.alive and self.player.role != "SPECTATOR": self.player.take_damage(e.get('amount', 0))
+
+    def _on_daily_news(self, e): self.ui.show_daily_news(e.get('news', []))
+
+    def _on_game_over(self, e):
+        winner = e.get('winner', 'Unknown')
+        self.ui.show_alert(f"GAME OVER! {winner} WIN!", (255, 255, 0))
+        # Wait 5 seconds and return to lobby?
+        pygame.time.set_timer(pygame.USEREVENT + 10, 5000)
+
+    # [Fix] Handle Role Updates & Game Start
+    def _on_game_start(self, e):
+        for pdata in e.get('players', {}).values(): self._sync_role(pdata.get('id'), pdata.get('role'))
+
+    def _on_player_list(self, e):
+        if self.game.network.accept_delta(e):
+            rows = apply_delta({p['id']: p for p in self.game.shared_data.get('participants', [])}, e, 'participants')
+            self.game.shared_data['participants'] = list(rows.values())
+            for pid, fields in iter_delta(e, 'participants'):
+                if 'role' in fields: self._sync_role(pid, fields['role'])
+
+    def _on_chat(self, e):
+        self.chat_box.add_message(e.get('sender_name', 'System'), e.get('message', ''))
+
+    def _sync_role(self, eid, new_role):
+        ent = self.world.entities_by_id.get(eid)
+        if ent is None or not new_role or not ent.alive or ent.role == new_role: return
+        if isinstance(ent, Dummy): ent.set_role(new_role)
+        elif ent is self.player and ent.role != "SPECTATOR": ent.change_role(new_role)
+
     def on_phase_change(self, old_phase, new_phase):
         if old_phase == "AFTERNOON": self.show_vote_ui = False; self._process_voting_results()
 
@@ -129,58 +236,31 @@ class PlayState(State):
                 self.game.network.send_death(self.player.uid, "starvation/fatigue")
             self.player.change_role("SPECTATOR"); self.ui.show_alert("YOU DIED!", (255, 0, 0))
         if hasattr(self.game, 'network') and self.game.network.connected:
-            for e in self.game.network.get_events():
-                if e.get('type') == 'MOVE' and e.get('id') in self.world.entities_by_id:
-                    ent = self.world.entities_by_id[e['id']]
-                    if isinstance(ent, Dummy): ent.sync_state(e['x'], e['y'], 100, 100, 'CITIZEN', e['is_moving'], e['facing'])
-                elif e.get('type') == 'TIME_SYNC': self.time_system.sync_time(e['phase_idx'], e['timer'], e['day'])
-                elif e.get('type') == 'STATS_UPDATE':
-                    # [Spectator] Sync detailed stats for Dummy entities
-                    eid = e.get('id')
-                    if eid in self.world.entities_by_id:
-                        ent = self.world.entities_by_id[eid]
-                        if hasattr(ent, 'sync_stats'):
-                            ent.sync_stats(e['stats'])
-                elif e.get('type') == 'DAILY_NEWS':
-                    self.ui.show_daily_news(e.get('news', []))
-                elif e.get('type') == 'GAME_OVER':
-                    winner = e.get('winner', 'Unknown')
-                    self.ui.show_alert(f"GAME OVER! {winner} WIN!", (255, 255, 0))
-                    # Wait 5 seconds and return to lobby?
-                    pygame.time.set_timer(pygame.USEREVENT + 10, 5000)
-                
-                # [Fix] Handle Role Updates & Game Start
-                elif e.get('type') in ['GAME_START', 'PLAYER_LIST']:
-                    players = e.get('players', {})
-                    for pid, pdata in players.items():
-                        if pid in self.world.entities_by_id:
-                            ent = self.world.entities_by_id[pid]
-                            new_role = pdata.get('role')
-                            if isinstance(ent, Dummy) and ent.role != new_role:
-                                ent.set_role(new_role)
-                        elif isinstance(ent, Player): ent.change_role(new_role)
-                elif e.get('type') == 'CHAT':
-                    sender = e.get('sender_name', 'System')
-                    msg = e.get('message', '')
-                    self.chat_box.add_message(sender, msg)
-        if self.player.alive:
-            curr_pos = (int(self.player.pos_x), int(self.player.pos_y))
+            self.game.network.dispatch(self.net_handlers)
+            self.snapshot_clock.update()
+        # [Optimization] MOVEs are sent at most once per server tick; the server only forwards the latest anyway
+        send_moves = False
+        if pygame.time.get_ticks() >= self.next_move_send:
+            self.next_move_send = pygame.time.get_ticks() + 1000 // TICK_RATE; send_moves = True
+        if self.player.alive and send_moves:
+            curr_pos = (int(self.player.pos_x), int(self.player.pos_y), self.player.is_moving)
             if curr_pos != self.last_sent_pos and hasattr(self.game, 'network') and self.game.network.connected:
-                self.game.network.send_move(curr_pos[0], curr_pos[1], self.player.is_moving, self.player.facing_dir); self.last_sent_pos = curr_pos
+                seq = self.player.predictor.mark_sent(curr_pos[0], curr_pos[1])
+                self.game.network.send_move(curr_pos[0], curr_pos[1], self.player.is_moving, self.player.facing_dir, seq); self.last_sent_pos = curr_pos
         if hasattr(self.game, 'network') and self.game.network.connected:
             for n in self.npcs:
                 if n.is_master:
-                    n_pos = (int(n.pos_x), int(n.pos_y))
-                    if not hasattr(n, 'last_sent_pos'): n.last_sent_pos = (0, 0)
-                    if n_pos != n.last_sent_pos: self.game.network.send({"type": "MOVE", "id": n.uid, "x": n_pos[0], "y": n_pos[1], "is_moving": n.is_moving, "facing": n.facing_dir}); n.last_sent_pos = n_pos
+                    n_pos = (int(n.pos_x), int(n.pos_y), n.is_moving)
+                    if not hasattr(n, 'last_sent_pos'): n.last_sent_pos = (0, 0, False)
+                    if send_moves and n_pos != n.last_sent_pos: self.game.network.send({"type": "MOVE", "id": n.uid, "x": n_pos[0], "y": n_pos[1], "is_moving": n.is_moving, "facing": n.facing_dir}); n.last_sent_pos = n_pos
                     
-                    # [Spectator Refinement] Sync Bot Stats (Throttled?)
-                    # Every 60 frames (approx 1 sec) or check timer
-                    if not hasattr(n, 'stats_sync_timer'): n.stats_sync_timer = 0
+                    # [Spectator Refinement] Sync Bot Stats, at most once a second and only when they changed
+                    if not hasattr(n, 'stats_sync_timer'): n.stats_sync_timer = 0; n.last_sent_stats = None
                     if pygame.time.get_ticks() > n.stats_sync_timer:
                         n.stats_sync_timer = pygame.time.get_ticks() + 1000
                         emotion_str = list(n.emotions.keys())[0] if n.emotions else "Neutral"
-                        self.game.network.send_stats(n.hp, n.max_hp, n.ap, n.max_ap, n.coins, emotion_str, getattr(n, 'current_action_text', 'Idle'), eid=n.uid)
+                        stats = (n.hp, n.max_hp, n.ap, n.max_ap, n.coins, emotion_str, getattr(n, 'current_action_text', 'Idle'))
+                        if stats != n.last_sent_stats: self.game.network.send_stats(*stats, eid=n.uid); n.last_sent_stats = stats
         
         # Update Work Target Navigation
         now = pygame.time.get_ticks()
@@ -215,7 +295,8 @@ class PlayState(State):
                     if p['text'] == "OPEN_SHOP": self.ui.toggle_vending_machine(); self.player.popups.remove(p); break
             self.player.update_bullets(self.npcs)
         if self.player.role in ["CITIZEN", "DOCTOR", "FARMER", "MINER", "FISHER"] and self.current_phase == "NIGHT":
-            nearest = min([math.hypot(n.rect.centerx-self.player.rect.centerx, n.rect.centery-self.player.rect.centery) for n in self.npcs if n.role == "MAFIA" and n.alive] + [float('inf')])
+            nearest = self.world.nearest_entity(self.player.rect.centerx, self.player.rect.centery, 640, ("MAFIA",), self.player)[0]
+            if nearest is None: nearest = float('inf')
             if nearest < 640:
                 self.player.emotions['ANXIETY'] = int((640 - nearest) / 60)
                 if pygame.time.get_ticks() - self.heartbeat_timer > max(300, int(nearest * 2)):
@@ -234,21 +315,30 @@ class PlayState(State):
         else: self.camera.update(self.player.rect.centerx, self.player.rect.centery)
 
         # FOV & Rendering Prep
-        if self.player.role == "SPECTATOR":
-            rad = 100 # Unlimited vision for spectator
-            direction = None
-        else:
+        # [Optimization] Spectators see everything (the renderer, entity culling and lighting skip them): no FOV to cast
+        if self.player.role != "SPECTATOR":
             rad = self.player.get_vision_radius(self.lighting.current_vision_factor, self.world.is_blackout, self.weather)
             direction = None
             if self.player.role == "POLICE" and self.player.flashlight_on and self.current_phase in ['EVENING', 'NIGHT', 'DAWN']:
                 direction = self.player.facing_dir
-        
-        self.visible_tiles = self.fov.cast_rays(self.player.rect.centerx, self.player.rect.centery, rad, direction, 60)
-        for tile in self.visible_tiles: self.tile_alphas[tile] = min(255, self.tile_alphas.get(tile, 0) + 15)
+
+            visible_tiles = self.fov.cast_rays(self.player.rect.centerx, self.player.rect.centery, rad, direction, 60)
+            # [Optimization] The FOV cache hands back the same set while nothing changed: once the fade has settled there is nothing to do
+            if visible_tiles is not self.visible_tiles or self.tiles_fading:
+                self.visible_tiles = visible_tiles
+                self.tiles_fading = self._fade_tiles(visible_tiles)
+
+    def _fade_tiles(self, visible_tiles):
+        """Steps tile_alphas towards the visible set; returns True while any tile is still fading."""
+        fading = False
+        for tile in visible_tiles:
+            alpha = self.tile_alphas.get(tile, 0)
+            if alpha < 255: self.tile_alphas[tile] = min(255, alpha + 15); fading = True
         for tile in list(self.tile_alphas.keys()):
-            if tile not in self.visible_tiles:
-                self.tile_alphas[tile] -= 15
+            if tile not in visible_tiles:
+                self.tile_alphas[tile] -= 15; fading = True
                 if self.tile_alphas[tile] <= 0: del self.tile_alphas[tile]
+        return fading
 
     def _update_spectator_camera(self):
         keys = pygame.key.get_pressed()
@@ -311,8 +401,7 @@ class PlayState(State):
         self.sound_system.process_sound_effect((s_type, fx_x, fx_y, rad, source_role), self.player)
 
     def _handle_v_action(self):
-        targets = sorted([(math.hypot(n.rect.centerx-self.player.rect.centerx, n.rect.centery-self.player.rect.centery), n) for n in self.npcs if n.alive], key=lambda x: x[0])
-        target = targets[0][1] if targets and targets[0][0] <= 100 else None
+        target = self.world.nearest_entity(self.player.rect.centerx, self.player.rect.centery, 100, exclude=self.player)[1]
         if self.player.role == "DOCTOR":
             res = self.player.do_heal(target)
             if res: self.player.add_popup(res[0] if isinstance(res, tuple) else res, (200, 200, 255))
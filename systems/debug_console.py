@@ -25,7 +25,8 @@ class DebugConsole:
             'time': self.cmd_time,
             'god': self.cmd_god,
             'kill': self.cmd_kill,
-            'money': self.cmd_money
+            'money': self.cmd_money,
+            'net': self.cmd_net
         }
 
     def toggle(self):
@@ -101,7 +102,7 @@ class DebugConsole:
     # --- Commands ---
 
     def cmd_help(self, args):
-        return "Commands: spawn, give, tp, time, god, kill, money"
+        return "Commands: spawn, give, tp, time, god, kill, money, net"
 
     def cmd_spawn(self, args):
         if not args: return "Usage: /spawn [role]"
@@ -166,3 +167,7 @@ class DebugConsole:
         amount = int(args[0]) if args else 100
         self.play_state.player.coins += amount
         return f"Added {amount} coins"
+
+    def cmd_net(self, args):
+        m = self.play_state.player.predictor.metrics()
+        return f"Pred: {m['corrections']}/{m['acks']} corrected, avg {m['avg_error']:.1f}px max {m['max_error']:.1f}px, replayed {m['replayed_inputs']}, pending {m['pending_inputs']}"
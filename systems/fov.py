@@ -1,200 +1,182 @@
 import math
-import pygame
-from settings import TILE_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, INDOOR_ZONES
-from world.tiles import check_collision, TRANSPARENT_TILES
+from collections import OrderedDict
+from settings import TILE_SIZE
+
+# Octant-pair quadrants for shadowcasting: (x per col, y per col, x per depth, y per depth), facing N, E, S, W
+QUADRANTS = ((1, 0, 0, -1), (0, 1, 1, 0), (1, 0, 0, 1), (0, 1, -1, 0))
+QUADRANT_ANGLES = (270, 0, 90, 180) # Screen angles (y down) of each quadrant's axis
+RAY_PENETRATION = TILE_SIZE / 4.0   # Light polygon edges reach this far into the tile that stops them
+OCTANT_DIRS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)) # Facing, quantized to 45 degrees
 
 class FOV:
+    """Field of view over precomputed opacity grids.
+
+    [Optimization] Visible tiles come from symmetric shadowcasting instead of marching
+    up to 120 rays tile by tile, and the light polygon from a grid walk (one step per
+    tile boundary) over the same grids. Opacity comes from MapManager's flag grids; the
+    outdoor grid is patched through MapManager.tile_listeners when a tile changes (doors).
+
+    Visible sets are kept in a small LRU keyed by (tile, radius bucket, facing octant,
+    cone width, map revision): standing still, walking within a tile or stepping back
+    onto a recent tile costs a dict lookup. The light polygon follows the
+    exact pixel position, so only the last one is kept (idle frames reuse it).
+    """
+    CACHE_SIZE = 64      # Visible sets kept
+    RADIUS_STEP = 0.25   # Radius bucket, in tiles (the vision radius eases in and out at dusk/dawn)
+
     def __init__(self, map_width, map_height, map_manager):
         self.map_width = map_width
         self.map_height = map_height
         self.map_manager = map_manager
-        
+
         self.sin_table = {}
         self.cos_table = {}
         for deg in range(361):
             rad = math.radians(deg)
             self.sin_table[deg] = math.sin(rad)
             self.cos_table[deg] = math.cos(rad)
-        
-    def cast_rays(self, px, py, radius, direction=None, angle_width=60):
-        visible_tiles = set()
-        
-        cx, cy = int(px // TILE_SIZE), int(py // TILE_SIZE)
-        visible_tiles.add((cx, cy)) 
-        
-        if radius <= 0: return visible_tiles
-
-        player_zone = 0
-        if 0 <= cx < self.map_width and 0 <= cy < self.map_height:
-            player_zone = self.map_manager.zone_map[cy][cx]
-        is_player_indoors = (player_zone in INDOOR_ZONES)
-
-        max_dist_px = radius * TILE_SIZE
-        step_size = TILE_SIZE / 2.0  
-        
+
+        # Flat (y * width + x), 1 = stops sight. Viewers inside see through everything but
+        # solid non-glass tiles (MapManager.blocks_sight); viewers outside additionally can't
+        # see past indoor tiles that aren't glass (the tile itself is still visible).
+        self.opaque_out = bytearray(map_width * map_height)
+        self.cache = OrderedDict() # {(tx, ty, radius, octant, angle_width, revision): visible set}
+        self._poly_key = None
+        self._poly = None
+        self.rebuild()
+        map_manager.tile_listeners.append(self.on_tile_changed)
+
+    # --- Opacity ---
+    def rebuild(self):
+        mm = self.map_manager
+        self.opaque_out = bytearray(s or (i and not g) for s, i, g in zip(mm.blocks_sight, mm.is_indoor, mm.is_glass))
+        self.cache.clear()
+
+    def on_tile_changed(self, gx, gy):
+        # Runs after MapManager patched its grids and bumped its revision, which retires cached results
+        if 0 <= gx < self.map_width and 0 <= gy < self.map_height:
+            mm = self.map_manager
+            i = gy * self.map_width + gx
+            self.opaque_out[i] = mm.blocks_sight[i] or (mm.is_indoor[i] and not mm.is_glass[i])
+            self.cache.clear()
+
+    # --- Queries ---
+    def _key(self, px, py, radius, direction, angle_width):
+        """(cache key, bucketed radius, octant direction or None) for a query."""
+        radius = round(radius / self.RADIUS_STEP) * self.RADIUS_STEP
+        octant = None
         if direction and (direction[0] != 0 or direction[1] != 0):
-            center_angle = math.degrees(math.atan2(direction[1], direction[0]))
-            if center_angle < 0: center_angle += 360
-            
-            start_angle = int(center_angle - angle_width / 2)
-            end_angle = int(center_angle + angle_width / 2)
-            angle_step = 2
-        else:
-            start_angle = 0
-            end_angle = 360
-            angle_step = 3 
-
-        wall_data = self.map_manager.map_data['wall']
-        obj_data = self.map_manager.map_data['object']
-        zone_data = self.map_manager.zone_map
-        width, height = self.map_width, self.map_height
-        
-        sin_tbl = self.sin_table
-        cos_tbl = self.cos_table
-
-        for angle_deg in range(start_angle, end_angle, angle_step):
-            norm_deg = angle_deg % 360
-            sin_a = sin_tbl[norm_deg]
-            cos_a = cos_tbl[norm_deg]
-            
-            current_dist = 0
-            while current_dist < max_dist_px:
-                current_dist += step_size
-                
-                nx = px + cos_a * current_dist
-                ny = py + sin_a * current_dist
-                
-                gx, gy = int(nx // TILE_SIZE), int(ny // TILE_SIZE)
-                
-                if not (0 <= gx < width and 0 <= gy < height):
-                    break
-                
-                visible_tiles.add((gx, gy))
-
-                # Collision & Visibility Check
-                w_val = wall_data[gy][gx]
-                tid_wall = w_val[0] if isinstance(w_val, (tuple, list)) else w_val
-                
-                is_blocking = False
-                is_transparent = False
-
-                # Wall Check
-                if tid_wall != 0:
-                    if check_collision(tid_wall): is_blocking = True
-                    if tid_wall in TRANSPARENT_TILES: is_transparent = True
-                
-                # Object Check
-                if not is_blocking:
-                    o_val = obj_data[gy][gx]
-                    tid_obj = o_val[0] if isinstance(o_val, (tuple, list)) else o_val
-                    if tid_obj != 0:
-                        if check_collision(tid_obj): is_blocking = True
-                        if tid_obj in TRANSPARENT_TILES: is_transparent = True
-
-                # Zone Logic (Indoor/Outdoor)
-                target_zone = zone_data[gy][gx]
-                is_target_indoors = (target_zone in INDOOR_ZONES)
-                
-                if not is_player_indoors and is_target_indoors:
-                    # Outside looking In
-                    if is_transparent:
-                        pass # Can see through glass
-                    elif is_blocking:
-                        break # Wall blocks view
-                    else:
-                        break # Floor inside is not visible unless through glass
-                
-                if is_blocking and not is_transparent:
-                    break
+            octant = round(math.atan2(direction[1], direction[0]) / (math.pi / 4)) % 8
+        key = (int(px // TILE_SIZE), int(py // TILE_SIZE), radius, octant, angle_width, self.map_manager.revision)
+        return key, radius, (None if octant is None else OCTANT_DIRS[octant])
+
+    def _opacity_at(self, cx, cy):
+        """Opacity grid that applies to a viewer on tile (cx, cy)."""
+        w, h = self.map_width, self.map_height
+        inside = 0 <= cx < w and 0 <= cy < h
+        return self.map_manager.blocks_sight if inside and self.map_manager.is_indoor[cy * w + cx] else self.opaque_out
+
+    def cast_rays(self, px, py, radius, direction=None, angle_width=60):
+        """Set of visible (tx, ty) from pixel (px, py). direction limits it to an angle_width
+        degree cone. The set is shared with the cache: callers must not mutate it."""
+        key, radius, direction = self._key(px, py, radius, direction, angle_width)
+        cache = self.cache
+        visible_tiles = cache.get(key)
+        if visible_tiles is not None:
+            cache.move_to_end(key); return visible_tiles
+
+        cx, cy = key[0], key[1]
+        visible_tiles = {(cx, cy)}
+        if radius > 0:
+            # The viewer's own tile never blocks: someone in a closet or a bed looks out of it
+            self._shadowcast(cx, cy, radius, self._opacity_at(cx, cy), direction, angle_width, visible_tiles)
+        cache[key] = visible_tiles
+        if len(cache) > self.CACHE_SIZE: cache.popitem(last=False)
         return visible_tiles
 
     def get_poly_points(self, px, py, radius, direction=None, angle_width=60):
-        points = []
-        points.append((px, py)) 
+        """Light polygon [(px, py), hit points...] for the same query as cast_rays."""
+        key, radius, direction = self._key(px, py, radius, direction, angle_width)
+        key = (px, py) + key
+        if key == self._poly_key: return self._poly
+
+        points = [(px, py)]
+        if radius > 0:
+            self._polygon(px, py, radius * TILE_SIZE, self._opacity_at(key[2], key[3]), direction, angle_width, points)
+        self._poly_key = key
+        self._poly = points
+        return points
 
-        if radius <= 0: return points
+    # --- Visible tiles: symmetric shadowcasting ---
+    def _shadowcast(self, ox, oy, radius, opaque, direction, angle_width, visible):
+        """Rows are scanned outward per quadrant; slopes are kept as integer fractions
+        (num, den) so tie rounding and the symmetry test are exact."""
+        w, h = self.map_width, self.map_height
+        r_sq = 4 * radius * radius # Tiles whose nearest point is within radius, like the old ray ends (in half tiles)
+        max_depth = int(radius + 0.5)
+        cone = None
+        if direction is not None:
+            center = math.degrees(math.atan2(direction[1], direction[0])) % 360
+            half = angle_width / 2.0
+            cone = math.radians(half)
 
-        cx, cy = int(px // TILE_SIZE), int(py // TILE_SIZE)
-        player_zone = 0
-        if 0 <= cx < self.map_width and 0 <= cy < self.map_height:
-             player_zone = self.map_manager.zone_map[cy][cx]
-        is_player_indoors = (player_zone in INDOOR_ZONES)
+        for (cxm, cym, dxm, dym), axis in zip(QUADRANTS, QUADRANT_ANGLES):
+            if cone is not None and abs((center - axis + 180) % 360 - 180) > 45 + half: continue
+            rows = [(1, -1, 1, 1, 1)] # depth, start slope num/den, end slope num/den
+            while rows:
+                depth, sn, sd, en, ed = rows.pop()
+                if depth > max_depth: continue
+                min_col = (2 * depth * sn + sd) // (2 * sd)  # round half up (depth * start)
+                max_col = -((ed - 2 * depth * en) // (2 * ed)) # round half down (depth * end)
+                bx, by = ox + dxm * depth, oy + dym * depth
+                dd = (2 * depth - 1) ** 2
+                prev = -1 # -1 none yet, 0 floor, 1 wall
+                for col in range(min_col, max_col + 1):
+                    x, y = bx + cxm * col, by + cym * col
+                    on_map = 0 <= x < w and 0 <= y < h
+                    wall = opaque[y * w + x] if on_map else 1
+                    if on_map and (wall or (col * sd >= depth * sn and col * ed <= depth * en)):
+                        near = 2 * abs(col) - 1
+                        if (near * near if near > 0 else 0) + dd <= r_sq:
+                            if cone is None: visible.add((x, y))
+                            else:
+                                # Inside the cone if any part of the tile is: widen the cone by half a tile
+                                vx, vy = x - ox, y - oy
+                                off = abs((math.degrees(math.atan2(vy, vx)) - center + 180) % 360 - 180)
+                                if math.radians(off) <= cone + math.atan2(0.5, math.hypot(vx, vy)): visible.add((x, y))
+                    if prev == 1 and not wall: sn, sd = 2 * col - 1, 2 * depth
+                    elif prev == 0 and wall: rows.append((depth + 1, sn, sd, 2 * col - 1, 2 * depth))
+                    prev = 1 if wall else 0
+                if prev == 0: rows.append((depth + 1, sn, sd, en, ed))
 
-        max_dist_px = radius * TILE_SIZE
-        step_size = 16.0 
-        
+    # --- Light polygon: grid walk per angle ---
+    def _polygon(self, px, py, max_dist, opaque, direction, angle_width, points):
         start_angle, end_angle, angle_step = 0, 360, 2
-        if direction and (direction[0] != 0 or direction[1] != 0):
+        if direction is not None:
             center_angle = math.degrees(math.atan2(direction[1], direction[0]))
             if center_angle < 0: center_angle += 360
-            
             start_angle = int(center_angle - angle_width / 2)
             end_angle = int(center_angle + angle_width / 2)
             angle_step = 1
 
-        width, height = self.map_width, self.map_height
-        wall_data = self.map_manager.map_data['wall']
-        obj_data = self.map_manager.map_data['object']
-        zone_data = self.map_manager.zone_map
-        
-        sin_tbl = self.sin_table
-        cos_tbl = self.cos_table
-
+        w, h, ts = self.map_width, self.map_height, TILE_SIZE
+        gx0, gy0 = int(px // ts), int(py // ts)
+        inf = float('inf')
+        sin_tbl, cos_tbl = self.sin_table, self.cos_table
         for angle_deg in range(start_angle, end_angle + 1, angle_step):
             norm_deg = angle_deg % 360
-            sin_a = sin_tbl[norm_deg]
-            cos_a = cos_tbl[norm_deg]
-            
-            current_dist = 0
-            hit_x, hit_y = px, py
-            
-            while current_dist < max_dist_px:
-                current_dist += step_size
-                nx = px + cos_a * current_dist
-                ny = py + sin_a * current_dist
-                
-                gx, gy = int(nx // TILE_SIZE), int(ny // TILE_SIZE)
-                
-                if not (0 <= gx < width and 0 <= gy < height):
-                    hit_x, hit_y = nx, ny
-                    break
-                
-                is_blocking = False
-                is_transparent = False
-                
-                # Wall
-                w_val = wall_data[gy][gx]
-                tid_wall = w_val[0] if isinstance(w_val, (tuple, list)) else w_val
-                if tid_wall != 0:
-                    if check_collision(tid_wall): is_blocking = True
-                    if tid_wall in TRANSPARENT_TILES: is_transparent = True
-                
-                # Object
-                if not is_blocking:
-                    o_val = obj_data[gy][gx]
-                    tid_obj = o_val[0] if isinstance(o_val, (tuple, list)) else o_val
-                    if tid_obj != 0:
-                        if check_collision(tid_obj): is_blocking = True
-                        if tid_obj in TRANSPARENT_TILES: is_transparent = True
-
-                # Zone Logic
-                target_zone = zone_data[gy][gx]
-                is_target_indoors = (target_zone in INDOOR_ZONES)
-                
-                if not is_player_indoors and is_target_indoors:
-                    if is_transparent:
-                        pass # Glass -> Continue ray
-                    elif is_blocking:
-                        is_blocking = True # Wall -> Block
-                    else:
-                        is_blocking = True # Floor inside -> Block visibility from outside
-                
-                if is_blocking and not is_transparent:
-                    hit_x, hit_y = nx, ny
-                    break
-                
-                hit_x, hit_y = nx, ny
-            
-            points.append((hit_x, hit_y))
-            
-        return points
\ No newline at end of file
+            cos_a, sin_a = cos_tbl[norm_deg], sin_tbl[norm_deg]
+            gx, gy = gx0, gy0
+            if cos_a > 1e-9: step_x, t_dx, t_x = 1, ts / cos_a, ((gx + 1) * ts - px) / cos_a
+            elif cos_a < -1e-9: step_x, t_dx, t_x = -1, ts / -cos_a, (px - gx * ts) / -cos_a
+            else: step_x, t_dx, t_x = 0, inf, inf
+            if sin_a > 1e-9: step_y, t_dy, t_y = 1, ts / sin_a, ((gy + 1) * ts - py) / sin_a
+            elif sin_a < -1e-9: step_y, t_dy, t_y = -1, ts / -sin_a, (py - gy * ts) / -sin_a
+            else: step_y, t_dy, t_y = 0, inf, inf
+            while True:
+                if t_x < t_y: t = t_x; t_x += t_dx; gx += step_x
+                else: t = t_y; t_y += t_dy; gy += step_y
+                if t >= max_dist: dist = max_dist; break
+                if not (0 <= gx < w and 0 <= gy < h): dist = t; break # Map edge
+                if opaque[gy * w + gx]: dist = min(t + RAY_PENETRATION, max_dist); break
+            points.append((px + cos_a * dist, py + sin_a * dist))
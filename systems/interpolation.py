@@ -0,0 +1,82 @@
+import time
+from collections import deque
+from settings import TICK_RATE, TILE_SIZE, INTERP_DELAY, INTERP_MAX_EXTRAPOLATION, INTERP_BUFFER_SIZE
+
+class SnapshotClock:
+    """Maps WORLD_SNAPSHOT ticks onto the local clock.
+
+    The server ticks at a fixed, drift-free TICK_RATE, so tick / TICK_RATE is a
+    server timestamp. The offset to the local clock tracks the least delayed
+    snapshot (jitter only ever makes packets late) and relaxes slowly upwards.
+    Remote entities are drawn at render_time = server now - INTERP_DELAY.
+    """
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = SnapshotClock()
+        return cls._instance
+
+    def __init__(self):
+        self.offset = None # local - server seconds
+        self.render_time = 0.0
+
+    def reset(self):
+        self.offset = None; self.render_time = 0.0
+
+    def observe(self, tick):
+        """Returns the server time of a snapshot tick and refines the clock offset."""
+        t = tick / TICK_RATE
+        off = time.perf_counter() - t
+        if self.offset is None or off < self.offset or off - self.offset > 1.0: self.offset = off # Resync on restart/stall
+        else: self.offset += (off - self.offset) * 0.01
+        return t
+
+    def update(self):
+        """Called once per frame before remote entities are moved."""
+        if self.offset is not None: self.render_time = time.perf_counter() - self.offset - INTERP_DELAY
+        return self.render_time
+
+
+class Interpolator:
+    """Ring buffer of (t, x, y, facing, moving) snapshots for one remote entity.
+    sample() interpolates between the two snapshots bracketing the render time and
+    dead-reckons for at most INTERP_MAX_EXTRAPOLATION once it runs past the newest."""
+    __slots__ = ('samples', 'vx', 'vy')
+    TELEPORT_DIST = TILE_SIZE * 5
+
+    def __init__(self):
+        self.samples = deque(maxlen=INTERP_BUFFER_SIZE)
+        self.vx = self.vy = 0.0
+
+    def push(self, t, x, y, facing, moving):
+        s = self.samples
+        if s:
+            lt, lx, ly, lf, lm = s[-1]
+            if t < lt: return # Out of order
+            if t == lt: s[-1] = (t, x, y, facing, moving); return # Keyframe repeat of the same tick
+            if abs(x - lx) + abs(y - ly) > self.TELEPORT_DIST or t - lt > 1.0:
+                s.clear(); self.vx = self.vy = 0.0 # Teleport, or back in view after a long gap: snap
+            else:
+                if not lm and t - lt > 1.5 / TICK_RATE:
+                    # Was standing still: start moving one tick before this snapshot, not at the old one
+                    # (a gap of more than one tick; tick / TICK_RATE is not exact, so compare with slack)
+                    lt = t - 1.0 / TICK_RATE; s.append((lt, lx, ly, lf, lm))
+                self.vx = (x - lx) / (t - lt); self.vy = (y - ly) / (t - lt)
+        s.append((t, x, y, facing, moving))
+
+    def sample(self, rt):
+        """Returns (x, y, facing, moving) at server time rt, or None if nothing was received yet."""
+        s = self.samples
+        if not s: return None
+        while len(s) > 1 and s[1][0] <= rt: s.popleft()
+        t0, x0, y0, f0, m0 = s[0]
+        if len(s) > 1:
+            t1, x1, y1, f1, m1 = s[1]
+            k = (rt - t0) / (t1 - t0)
+            if k <= 0: return x0, y0, f0, m0
+            return x0 + (x1 - x0) * k, y0 + (y1 - y0) * k, f1, m0 or m1
+        if not m0 or rt <= t0: return x0, y0, f0, m0
+        dt = min(rt - t0, INTERP_MAX_EXTRAPOLATION)
+        return x0 + self.vx * dt, y0 + self.vy * dt, f0, m0
@@ -21,8 +21,10 @@ class NetworkManager(NetworkClient):
     def send_start_game(self):
         self.send({"type": "START_GAME"})
 
-    def send_move(self, x, y, is_moving, facing_dir):
-        self.send({"type": "MOVE", "x": x, "y": y, "is_moving": is_moving, "facing": facing_dir})
+    def send_move(self, x, y, is_moving, facing_dir, seq=None):
+        data = {"type": "MOVE", "x": x, "y": y, "is_moving": is_moving, "facing": facing_dir}
+        if seq: data['seq'] = seq # Input sequence for MOVE_ACK reconciliation
+        self.send(data)
 
     def send_stats(self, hp, max_hp, ap, max_ap, coins, emotion, action_text, eid=None):
         data = {
@@ -0,0 +1,76 @@
+import math
+from collections import deque
+from settings import PREDICTION_HISTORY, PREDICTION_TOLERANCE
+
+class MovePredictor:
+    """Client-side prediction for the local player.
+
+    Every movement input applied locally gets a sequence number and is kept until
+    the server acknowledges a MOVE sent after it. Sending a MOVE also consumes a
+    sequence number and remembers the position that was reported. A MOVE_ACK
+    carries the server's position for that seq; if it differs from what we
+    reported, the player is put back there and the still-unacked inputs are
+    replayed through the normal collision code (move_single_axis).
+    """
+    def __init__(self, history=PREDICTION_HISTORY):
+        self.seq = 0
+        self.inputs = deque(maxlen=history) # [(seq, mx, my)] applied but not yet acked
+        self.sent = deque(maxlen=history)   # [(seq, x, y)] positions reported in MOVEs
+
+        # Metrics
+        self.acks = 0
+        self.corrections = 0
+        self.replayed = 0
+        self.last_error = 0.0
+        self.max_error = 0.0
+        self.total_error = 0.0
+
+    def reset(self):
+        self.inputs.clear(); self.sent.clear()
+
+    def record(self, mx, my):
+        """Called after an input (mx, my) was applied locally."""
+        self.seq += 1
+        self.inputs.append((self.seq, mx, my))
+
+    def mark_sent(self, x, y):
+        """Returns the seq to put in a MOVE reporting position (x, y)."""
+        self.seq += 1
+        self.sent.append((self.seq, x, y))
+        return self.seq
+
+    def reconcile(self, player, seq, x, y):
+        """Applies a MOVE_ACK. Returns True if the player had to be corrected."""
+        sent = self.sent
+        while sent and sent[0][0] < seq: sent.popleft()
+        if not sent or sent[0][0] != seq: return False # Stale or already handled
+        _, px, py = sent.popleft()
+        inputs = self.inputs
+        while inputs and inputs[0][0] < seq: inputs.popleft()
+        self.acks += 1
+
+        err = math.hypot(x - px, y - py)
+        if err <= PREDICTION_TOLERANCE: return False
+
+        # Rewind to the authoritative position and re-apply what the server has not seen yet
+        player.pos_x, player.pos_y = float(x), float(y)
+        player.rect.x, player.rect.y = int(x), int(y)
+        for _, mx, my in inputs:
+            player.move_single_axis(mx, 0); player.move_single_axis(0, my)
+        self.replayed += len(inputs)
+        sent.clear() # MOVEs still in flight were predicted from the wrong base; the next one re-reports
+
+        self.corrections += 1
+        self.last_error = err
+        self.max_error = max(self.max_error, err)
+        self.total_error += err
+        return True
+
+    def metrics(self):
+        return {
+            'acks': self.acks, 'corrections': self.corrections,
+            'correction_rate': self.corrections / self.acks if self.acks else 0.0,
+            'avg_error': self.total_error / self.corrections if self.corrections else 0.0,
+            'max_error': self.max_error, 'last_error': self.last_error,
+            'replayed_inputs': self.replayed, 'pending_inputs': len(self.inputs),
+        }
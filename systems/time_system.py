@@ -25,6 +25,8 @@ class TimeSystem:
         self.mafia_last_seen_zone = None
 
         self.on_phase_change = None 
+        self.phase_end = None # [Clock Sync] Server time the current phase ends (online)
+        self.clock = None
         self.on_morning = None 
 
     def init_timer(self):
@@ -49,12 +51,19 @@ class TimeSystem:
         self.state_timer = timer
         self.day_count = day
 
+    def sync_phase(self, phase_idx, day, phase_end, clock):
+        """Called when a TIME_SYNC packet is received: the phase ends at phase_end on the server clock."""
+        self.phase_end = phase_end; self.clock = clock
+        self.sync_time(phase_idx, max(0.0, phase_end - clock.server_now()), day)
+
     def update(self, dt):
         # Only update locally if offline
         if not (hasattr(self.game, 'network') and self.game.network.connected):
             self.state_timer -= dt
             if self.state_timer <= 0:
                 self._advance_phase()
+        elif self.phase_end is not None:
+            self.state_timer = max(0.0, self.phase_end - self.clock.server_now()) # Counted down locally, no jumps
             
         # Update Weather Particles (Always)
         if self.weather in ['RAIN', 'SNOW']:
@@ -0,0 +1,52 @@
+import pytest
+
+from game.authority import MoveValidator, MAX_BURST, MAX_SPEED_PPS
+from settings import TILE_SIZE
+
+
+@pytest.fixture(scope='module')
+def validator():
+    return MoveValidator.load()
+
+
+def _free_next_to_blocked(v):
+    # A free tile with a blocked tile to its right
+    for gy in range(v.height):
+        for gx in range(v.width - 1):
+            x, y = gx * TILE_SIZE + 4, gy * TILE_SIZE + 4
+            if not v.blocked_at(x, y) and v.blocked[gy * v.width + gx + 1]: return x, y
+    pytest.skip("no wall on the map")
+
+
+def test_accepts_walking(validator):
+    x, y = _free_next_to_blocked(validator)
+    assert validator.validate('walk', x, y, 0.0) == (x, y)
+    assert validator.validate('walk', x, y - 1, 0.1) == (x, y - 1)
+
+
+def test_rejects_walking_into_a_wall(validator):
+    x, y = _free_next_to_blocked(validator)
+    validator.validate('wall', x, y, 0.0)
+    rejected = validator.rejected
+    assert validator.validate('wall', x + TILE_SIZE, y, 1.0) == (x, y)
+    assert validator.rejected == rejected + 1
+
+
+def _free_at_distance(v, x, y, dist):
+    d = int(dist)
+    return next((x + dx, y + dy) for dx, dy in ((-d, 0), (0, d), (0, -d), (d, 0)) if not v.blocked_at(x + dx, y + dy))
+
+
+def test_rejects_moves_beyond_the_distance_budget(validator):
+    x, y = _free_next_to_blocked(validator)
+    validator.validate('fast', x, y, 0.0)
+    assert validator.validate('fast', *_free_at_distance(validator, x, y, MAX_BURST * 1.5), 100.0) == (x, y) # Too far even fully refilled
+    far = _free_at_distance(validator, x, y, MAX_BURST * 0.8)
+    assert validator.validate('fast', *far, 100.0) == far
+    assert validator.validate('fast', x, y, 100.0) == far # Budget spent
+    assert validator.validate('fast', x, y, 100.0 + MAX_BURST * 0.8 / MAX_SPEED_PPS) == (x, y) # Refilled at top speed
+
+
+def test_off_map_is_blocked(validator):
+    assert validator.blocked_at(-1, 0)
+    assert validator.blocked_at(validator.width * TILE_SIZE, 0)
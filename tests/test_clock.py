@@ -0,0 +1,35 @@
+import pytest
+
+from engine.network.clock import ClockSync
+
+
+def test_offset_from_symmetric_round_trips():
+    clock = ClockSync()
+    # Server clock runs 100 s ahead; 40 ms round trips
+    for i in range(5):
+        t0 = i * 1.0
+        clock.add(t0, t0 + 0.02 + 100.0, t1=t0 + 0.04)
+    assert clock.ready
+    assert clock.offset == pytest.approx(100.0)
+    assert clock.rtt == pytest.approx(0.04)
+
+
+def test_slow_round_trips_do_not_move_the_offset():
+    clock = ClockSync()
+    for i in range(8):
+        t0 = i * 1.0
+        if i % 3 == 2: clock.add(t0, t0 + 0.01 + 50.0, t1=t0 + 0.5) # Queued on the way back
+        else: clock.add(t0, t0 + 0.01 + 50.0, t1=t0 + 0.02)
+    assert clock.offset == pytest.approx(50.0)
+
+
+def test_observe_only_until_first_pong():
+    clock = ClockSync()
+    clock.observe(clock.now() + 10.0)
+    assert clock.offset == pytest.approx(10.0, abs=0.01)
+    assert not clock.ready
+    clock.add(0.0, 20.01, t1=0.02)
+    clock.observe(clock.now() + 10.0)
+    assert clock.offset == pytest.approx(20.0)
+    clock.reset()
+    assert clock.offset is None and not clock.ready
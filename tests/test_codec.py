@@ -0,0 +1,43 @@
+import pytest
+
+from engine.network.codec import JSON, BINARY, CODECS, payload_type
+from engine.network.protocol import decode_payload
+
+MESSAGES = [
+    {'type': 'MOVE', 'id': 3, 'x': 640, 'y': -12, 'facing': [1, -1], 'is_moving': True, 'seq': 42},
+    {'type': 'MOVE', 'id': 3, 'x': 640, 'y': 12, 'facing': [0, 1], 'is_moving': False},
+    {'type': 'WORLD_SNAPSHOT', 'tick': 900, 'full': True, 'entities': [[1, 10, 20, 0, 1, 1], [7, -5, 3, -1, 0, 0]]},
+    {'type': 'TIME_SYNC', 'phase_idx': 2, 'day': 3, 'phase_end': 1234.5, 'ts': 99.25},
+    {'type': 'UPDATE_STATS', 'id': 5, 'hp': 80, 'max_hp': 100, 'ap': 37.5, 'max_ap': 100, 'coins': 12, 'emotion': 'FEAR', 'action': 'Working'},
+    {'type': 'STATS_DELTA', 'table': 'stats', 'base': 4, 'v': 6, 'changed': [[5, {'hp': 70, 'action': 'Idle'}], [9, {}]], 'removed': [2, 8]},
+    {'type': 'STATS_DELTA', 'table': 'stats', 'v': 6, 'full': True, 'rows': [{'hp': 100, 'coins': 3, 'id': 1}]},
+    {'type': 'ACK', 'table': 'roster', 'v': 17},
+    {'type': 'MOVE_ACK', 'seq': 8, 'x': 320, 'y': 448},
+]
+
+
+@pytest.mark.parametrize('msg', MESSAGES, ids=lambda m: m['type'])
+def test_binary_round_trip(msg):
+    payload = BINARY.encode(msg)
+    assert payload[0] != 0x7B # Took the struct layout, not the JSON fallback
+    assert payload_type(payload) == msg['type']
+    assert decode_payload(payload) == msg
+
+
+def test_snapshot_parts_match_full_encode():
+    recs = [(1, 10, 20, 0, 1, 1), (2, 30, 40, 1, 0, 0)]
+    for codec in CODECS.values():
+        payload = codec.encode_snapshot(5, False, [codec.encode_entity(r) for r in recs])
+        assert decode_payload(payload) == {'type': 'WORLD_SNAPSHOT', 'tick': 5, 'full': False, 'entities': [list(r) for r in recs]}
+
+
+@pytest.mark.parametrize('msg', [
+    {'type': 'MOVE', 'id': 1, 'x': 2 ** 40, 'y': 0, 'facing': [0, 1], 'is_moving': False}, # Out of int32 range
+    {'type': 'MOVE', 'id': 1, 'x': 0, 'y': 0, 'facing': [0, 1], 'is_moving': False, 'note': 'x'}, # Key outside the layout
+    {'type': 'MOVE_ACK', 'seq': 1, 'x': 'left', 'y': 0}, # Wrong value type
+    {'type': 'CHAT', 'msg': 'hi'}, # No layout
+])
+def test_falls_back_to_json(msg):
+    payload = BINARY.encode(msg)
+    assert payload == JSON.encode(msg)
+    assert decode_payload(payload) == msg
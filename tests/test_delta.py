@@ -0,0 +1,66 @@
+from engine.network.client import NetworkClient
+from engine.network.codec import JSON, BINARY
+from engine.network.delta import DeltaTracker, apply_delta
+from engine.network.protocol import decode_payload, HEADER_SIZE
+
+FIELDS = ('id', 'hp', 'max_hp', 'ap', 'max_ap', 'coins', 'emotion', 'action')
+
+
+def _decode(frame):
+    return decode_payload(bytes(frame[HEADER_SIZE:]))
+
+
+def _table(history=8):
+    t = DeltaTracker('stats', FIELDS, 'STATS_DELTA', 'STATS_DELTA', history=history)
+    t.update(1, {'id': 1, 'hp': 100, 'coins': 0}); t.update(2, {'id': 2, 'hp': 50, 'coins': 5})
+    t.commit()
+    return t
+
+
+def test_update_reports_only_changes():
+    t = _table()
+    assert not t.update(1, {'id': 1, 'hp': 100, 'unknown': 3})
+    assert t.update(1, {'hp': 90})
+    assert t.commit() == 2
+    assert t.commit() == 2 # Nothing pending: same version
+
+
+def test_diff_merges_versions():
+    t = _table()
+    t.update(1, {'hp': 90}); t.commit()
+    t.update(1, {'coins': 4}); t.remove(2); t.commit()
+    t.update(3, {'id': 3, 'hp': 10}); t.commit()
+    changed, removed = t.diff(1)
+    assert changed == {1: {'hp': 90, 'coins': 4}, 3: {'id': 3, 'hp': 10}}
+    assert removed == {2}
+    assert t.diff(t.version) == ({}, set())
+
+
+def test_diff_outside_history_is_none():
+    t = _table(history=2)
+    for hp in (90, 80, 70): t.update(1, {'hp': hp}); t.commit()
+    assert t.diff(1) is None
+    assert t.diff(2) is not None
+
+
+def test_frames_bring_a_client_up_to_date():
+    t = _table()
+    for codec in (JSON, BINARY):
+        rows = apply_delta({}, _decode(t.frame_for(None, codec)))
+        t.update(1, {'hp': 60, 'action': 'Idle'}); t.remove(2); t.commit()
+        rows = apply_delta(rows, _decode(t.frame_for(t.version - 1, codec)))
+        assert rows == t.rows
+        t.update(2, {'id': 2, 'hp': 40}); t.commit()
+
+
+def test_accept_delta_acks_in_order():
+    client = NetworkClient(); client.connected = True
+    assert client.accept_delta({'table': 'stats', 'v': 3, 'full': True, 'rows': []})
+    assert client.outbox[-1] == {'type': 'ACK', 'table': 'stats', 'v': 3}
+    assert client.accept_delta({'table': 'stats', 'base': 3, 'v': 5, 'changed': [], 'removed': []})
+    assert client.table_versions['stats'] == 5
+    # Stale patch, and one whose base is ahead of what we have: neither applies nor acks
+    assert not client.accept_delta({'table': 'stats', 'base': 2, 'v': 4, 'changed': [], 'removed': []})
+    assert not client.accept_delta({'table': 'stats', 'base': 6, 'v': 7, 'changed': [], 'removed': []})
+    assert not client.accept_delta({'table': 'roster', 'base': 0, 'v': 1, 'changed': [], 'removed': []})
+    assert len(client.outbox) == 2
@@ -0,0 +1,87 @@
+import math
+import random
+
+import pytest
+
+from settings import TILE_SIZE, INDOOR_ZONES
+from world.map_manager import MapManager
+from world.tiles import check_collision, TRANSPARENT_TILES
+from systems.fov import FOV
+
+CLOSET, BED = 8320209, 8321211
+
+
+def _tid(v):
+    return v[0] if isinstance(v, (tuple, list)) else v
+
+
+def reference_cast(mm, px, py, radius):
+    """The ray marcher FOV.cast_rays replaced (omnidirectional), except that the viewer's
+    own tile never stops a ray: it used to blind anyone standing in a closet or a bed."""
+    cx, cy = int(px // TILE_SIZE), int(py // TILE_SIZE)
+    visible = {(cx, cy)}
+    player_in = mm.zone_map[cy][cx] in INDOOR_ZONES
+    for deg in range(0, 360, 3):
+        cos_a, sin_a = math.cos(math.radians(deg)), math.sin(math.radians(deg))
+        dist = 0
+        while dist < radius * TILE_SIZE:
+            dist += TILE_SIZE / 2.0
+            gx, gy = int((px + cos_a * dist) // TILE_SIZE), int((py + sin_a * dist) // TILE_SIZE)
+            if not (0 <= gx < mm.width and 0 <= gy < mm.height): break
+            visible.add((gx, gy))
+            if (gx, gy) == (cx, cy): continue
+            tid_wall, tid_obj = _tid(mm.map_data['wall'][gy][gx]), _tid(mm.map_data['object'][gy][gx])
+            blocking = tid_wall != 0 and check_collision(tid_wall)
+            transparent = tid_wall in TRANSPARENT_TILES
+            if not blocking and tid_obj != 0:
+                blocking = check_collision(tid_obj); transparent = transparent or tid_obj in TRANSPARENT_TILES
+            if not player_in and mm.zone_map[gy][gx] in INDOOR_ZONES and not transparent: break
+            if blocking and not transparent: break
+    return visible
+
+
+@pytest.fixture(scope='module')
+def mm():
+    m = MapManager(); m.load_map('map.json')
+    return m
+
+
+def _tiles_with(mm, tid):
+    return [(x, y) for y in range(mm.height) for x in range(mm.width) if _tid(mm.map_data['object'][y][x]) == tid]
+
+
+def _center(x, y):
+    return x * TILE_SIZE + TILE_SIZE / 2, y * TILE_SIZE + TILE_SIZE / 2
+
+
+def test_matches_reference_at_tile_centres(mm):
+    fov = FOV(mm.width, mm.height, mm)
+    rng = random.Random(7)
+    free = [(x, y) for y in range(mm.height) for x in range(mm.width) if not mm.check_any_collision(x, y)]
+    old_total = missing = extra = 0
+    for x, y in rng.sample(free, 150):
+        radius = rng.choice([3, 5, 7, 9])
+        old = reference_cast(mm, *_center(x, y), radius)
+        new = fov.cast_rays(*_center(x, y), radius)
+        old_total += len(old); missing += len(old - new); extra += len(new - old)
+    # Rays and shadowcasting disagree only on grazing edge tiles
+    assert missing / old_total < 0.02
+    assert extra / old_total < 0.04
+
+
+@pytest.mark.parametrize('tid', [CLOSET, BED])
+def test_viewer_in_furniture_sees_out(mm, tid):
+    fov = FOV(mm.width, mm.height, mm)
+    for x, y in _tiles_with(mm, tid)[:5]:
+        old = reference_cast(mm, *_center(x, y), 5)
+        new = fov.cast_rays(*_center(x, y), 5)
+        assert len(new) > 1
+        assert len(old & new) >= 0.9 * len(old)
+
+
+def test_polygon_leaves_the_viewers_tile(mm):
+    fov = FOV(mm.width, mm.height, mm)
+    x, y = _tiles_with(mm, CLOSET)[0]
+    px, py = _center(x, y)
+    points = fov.get_poly_points(px, py, 5)
+    assert max(math.hypot(qx - px, qy - py) for qx, qy in points[1:]) > TILE_SIZE
@@ -0,0 +1,47 @@
+import pytest
+
+from settings import TICK_RATE, INTERP_MAX_EXTRAPOLATION
+from systems.interpolation import Interpolator
+
+DT = 1.0 / TICK_RATE
+
+
+def test_empty_buffer():
+    assert Interpolator().sample(1.0) is None
+
+
+def test_interpolates_between_bracketing_snapshots():
+    it = Interpolator()
+    it.push(0.0, 0, 0, (1, 0), True); it.push(DT, 10, 20, (0, 1), True)
+    x, y, facing, moving = it.sample(DT / 4)
+    assert (x, y) == pytest.approx((2.5, 5.0))
+    assert facing == (0, 1) and moving
+    assert it.sample(-1.0) == (0, 0, (1, 0), True) # Before the oldest: hold it
+
+
+def test_extrapolation_is_capped():
+    it = Interpolator()
+    it.push(0.0, 0, 0, (1, 0), True); it.push(DT, 10, 0, (1, 0), True)
+    x, _, _, _ = it.sample(DT + 10.0)
+    assert x == pytest.approx(10 + 10 / DT * INTERP_MAX_EXTRAPOLATION)
+
+
+def test_standing_still_does_not_drift():
+    it = Interpolator()
+    it.push(0.0, 0, 0, (1, 0), True); it.push(DT, 10, 0, (1, 0), False)
+    assert it.sample(5.0) == (10, 0, (1, 0), False)
+
+
+def test_start_after_idle_gap_moves_over_one_tick():
+    it = Interpolator()
+    it.push(0.0, 0, 0, (1, 0), False); it.push(10 * DT, 10, 0, (1, 0), True)
+    assert it.sample(8 * DT)[0] == 0 # Still standing until one tick before the move
+    assert it.sample(9.5 * DT)[0] == pytest.approx(5)
+
+
+def test_teleport_and_out_of_order():
+    it = Interpolator()
+    it.push(0.0, 0, 0, (1, 0), True); it.push(DT, 10, 0, (1, 0), True)
+    it.push(DT / 2, 500, 500, (1, 0), True) # Late packet: ignored
+    it.push(2 * DT, 5000, 0, (1, 0), True)  # Teleport: snap
+    assert list(it.samples) == [(2 * DT, 5000, 0, (1, 0), True)]
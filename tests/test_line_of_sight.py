@@ -0,0 +1,62 @@
+import pytest
+
+from settings import TILE_SIZE
+from world.map_manager import MapManager
+from world.tiles import check_collision, TILE_DATA, TRANSPARENT_TILES, HIDEABLE_TILES
+from entities.npc import Dummy
+
+GLASS_WALL, CLOSET = 3220010, 8320209
+
+
+def old_rule(tid_wall, tid_obj):
+    """Dummy.has_line_of_sight's per-tile test before the flag grids: wall layer, then object layer."""
+    if tid_wall != 0 and check_collision(tid_wall):
+        if tid_wall not in TRANSPARENT_TILES: return True
+    if tid_obj != 0 and check_collision(tid_obj):
+        if tid_obj not in TRANSPARENT_TILES and tid_obj not in HIDEABLE_TILES: return True
+    return False
+
+
+@pytest.fixture
+def mm():
+    m = MapManager(); m.load_map('map.json')
+    return m
+
+
+def _solid(layer_lo, layer_hi):
+    return next(t for t in TILE_DATA if layer_lo <= t < layer_hi and check_collision(t) and t not in TRANSPARENT_TILES and t not in HIDEABLE_TILES)
+
+
+def test_flag_grids_match_old_rule(mm):
+    for y in range(mm.height):
+        for x in range(mm.width):
+            i = y * mm.width + x
+            expected = old_rule(mm.get_tile(x, y, 'wall'), mm.get_tile(x, y, 'object'))
+            assert bool(mm.wall_blocks_sight[i] or mm.object_blocks_sight[i]) == expected, (x, y)
+
+
+def _open_row(mm):
+    # Four empty tiles in a row: viewer, the tile under test, an empty gap, target
+    for y in range(mm.height):
+        for x in range(mm.width - 3):
+            if all(mm.get_tile(x + k, y, 'wall') == 0 and mm.get_tile(x + k, y, 'object') == 0 and not mm.check_any_collision(x + k, y) for k in range(4)):
+                return x, y
+    pytest.skip("no open row on the map")
+
+
+@pytest.mark.parametrize('wall, obj, blocked', [
+    (0, 0, False),
+    (GLASS_WALL, 0, False),
+    (0, CLOSET, False),               # Hiding spots are seen over
+    (GLASS_WALL, None, True),         # An opaque object behind glass still blocks
+    (None, CLOSET, True),             # An opaque wall blocks whatever object is on it
+])
+def test_has_line_of_sight(mm, wall, obj, blocked):
+    x, y = _open_row(mm)
+    if wall is None: wall = _solid(3000000, 5000000)
+    if obj is None: obj = _solid(5000000, 10000000)
+    if wall: mm.set_tile(x + 1, y, wall, layer='wall')
+    if obj: mm.set_tile(x + 1, y, obj, layer='object')
+    viewer = Dummy(x * TILE_SIZE, y * TILE_SIZE, mm.map_data, mm.width, mm.height, map_manager=mm, zone_map=mm.zone_map)
+    target = Dummy((x + 3) * TILE_SIZE, y * TILE_SIZE, mm.map_data, mm.width, mm.height, map_manager=mm, zone_map=mm.zone_map)
+    assert viewer.has_line_of_sight(target) is not blocked
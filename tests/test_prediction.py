@@ -0,0 +1,46 @@
+import pygame
+
+from settings import PREDICTION_TOLERANCE
+from systems.prediction import MovePredictor
+
+
+class Walker:
+    """Stands in for the player: move_single_axis just moves."""
+    def __init__(self, x, y):
+        self.pos_x, self.pos_y = float(x), float(y)
+        self.rect = pygame.Rect(int(x), int(y), 20, 20)
+
+    def move_single_axis(self, dx, dy):
+        self.pos_x += dx; self.pos_y += dy
+        self.rect.x, self.rect.y = int(self.pos_x), int(self.pos_y)
+
+
+def _walk(pred, player, steps):
+    for _ in range(steps): player.move_single_axis(2, 0); player.move_single_axis(0, 0); pred.record(2, 0)
+
+
+def test_matching_ack_does_not_correct():
+    pred, player = MovePredictor(), Walker(0, 0)
+    _walk(pred, player, 3); seq = pred.mark_sent(player.pos_x, player.pos_y)
+    assert not pred.reconcile(player, seq, player.pos_x + PREDICTION_TOLERANCE, player.pos_y)
+    assert (player.pos_x, pred.acks, pred.corrections) == (6, 1, 0)
+
+
+def test_correction_replays_unacked_inputs():
+    pred, player = MovePredictor(), Walker(0, 0)
+    _walk(pred, player, 3); seq = pred.mark_sent(player.pos_x, player.pos_y) # Reported x=6
+    _walk(pred, player, 2) # Not seen by the server yet
+    assert pred.reconcile(player, seq, 0, 0) # Server refused the move
+    assert (player.pos_x, player.rect.x) == (4, 4)
+    assert pred.corrections == 1 and pred.replayed == 2 and pred.last_error == 6
+    assert not pred.sent # In-flight MOVEs were based on the wrong position
+
+
+def test_stale_and_repeated_acks_are_ignored():
+    pred, player = MovePredictor(), Walker(0, 0)
+    _walk(pred, player, 1); first = pred.mark_sent(player.pos_x, player.pos_y)
+    _walk(pred, player, 1); second = pred.mark_sent(player.pos_x, player.pos_y)
+    assert not pred.reconcile(player, second, 4, 0)
+    assert not pred.reconcile(player, first, 100, 100) # Older than the last ack
+    assert not pred.reconcile(player, second, 100, 100) # Already handled
+    assert (player.pos_x, pred.acks) == (4, 1)
@@ -0,0 +1,49 @@
+from engine.network.codec import JSON, BINARY
+from engine.network.protocol import decode_payload, HEADER_SIZE
+from server import GameServer
+from settings import TILE_SIZE
+
+
+class Conn:
+    """Captures what flush_snapshot hands to a client connection."""
+    def __init__(self, codec):
+        self.codec = codec
+        self.visible = set()
+        self.frames = []
+
+    def send_latest(self, frame, key):
+        self.frames.append(decode_payload(bytes(frame[HEADER_SIZE:])))
+
+    def last_entities(self):
+        return {rec[0]: rec for rec in self.frames[-1]['entities']}
+
+
+def _server(codec):
+    srv = GameServer(server_bots=False, record=False)
+    srv.players = {0: {'id': 0, 'type': 'PLAYER'}, 1: {'id': 1, 'type': 'PLAYER'}}
+    conn = Conn(codec); srv.clients = {conn: 0}
+    return srv, conn
+
+
+def test_entity_leaving_the_area_stops_moving():
+    for codec in (JSON, BINARY):
+        srv, conn = _server(codec)
+        srv.pending_moves = {0: [0, 0, 0, 0, 1, 0], 1: [1, 5 * TILE_SIZE, 0, 1, 0, 1]}
+        srv.flush_snapshot(); srv.tick += 1
+        assert conn.last_entities()[1][5] == 1
+        far = (srv.aoi_radius + 5) * TILE_SIZE
+        srv.pending_moves = {1: [1, far, 0, 1, 0, 1]}
+        srv.flush_snapshot(); srv.tick += 1
+        assert conn.last_entities() == {1: [1, far, 0, 1, 0, 0]} # Last record, moving cleared
+        srv.pending_moves = {1: [1, far + 10, 0, 1, 0, 1]}
+        srv.flush_snapshot()
+        assert len(conn.frames) == 2 # Out of the area: nothing more about it
+
+
+def test_keyframe_lists_the_whole_area():
+    srv, conn = _server(JSON)
+    srv.pending_moves = {0: [0, 0, 0, 0, 1, 0], 1: [1, 5 * TILE_SIZE, 0, 1, 0, 1]}
+    srv.flush_snapshot()
+    srv.game_started = True; srv.tick = 20
+    srv.flush_snapshot()
+    assert conn.frames[-1]['full'] and set(conn.last_entities()) == {1}
@@ -0,0 +1,59 @@
+import math
+import random
+
+import pytest
+
+from core.spatial_grid import SpatialGrid
+from settings import TILE_SIZE
+
+ROLES = ('CITIZEN', 'POLICE', 'MAFIA')
+
+
+@pytest.fixture(params=[(100, 100), (0, 0)], ids=['map', 'growing'])
+def grid(request):
+    # (0, 0) is the server's grid, which grows to fit instead of clamping
+    g = SpatialGrid(*request.param)
+    rng = random.Random(3)
+    points = {}
+    for uid in range(300):
+        x, y = rng.uniform(-50, 100 * TILE_SIZE + 50), rng.uniform(-50, 100 * TILE_SIZE + 50)
+        role = rng.choice(ROLES)
+        g.move_point(uid, x, y, role); points[uid] = (x, y, role)
+    for uid in range(0, 300, 7): # Moves and removals keep the cell lists consistent
+        x, y, role = points[uid]
+        if uid % 2: g.remove_point(uid); del points[uid]
+        else: x += 400; g.move_point(uid, x, y); points[uid] = (x, y, role)
+    return g, points
+
+
+def _brute(points, x, y, r=math.inf, roles=None, exclude=None):
+    out = [(math.hypot(px - x, py - y), uid) for uid, (px, py, role) in points.items()
+           if uid != exclude and (roles is None or role in roles)]
+    return sorted(d for d in out if d[0] <= r)
+
+
+def test_query_radius_matches_brute_force(grid):
+    g, points = grid
+    rng = random.Random(4)
+    for _ in range(50):
+        x, y, r = rng.uniform(-100, 3300), rng.uniform(-100, 3300), rng.uniform(0, 600)
+        roles = rng.choice([None, ('MAFIA',), ('CITIZEN', 'POLICE')])
+        got = g.query_radius(x, y, r, roles=roles, exclude=5)
+        assert [uid for _, uid in got] == [uid for _, uid in _brute(points, x, y, r, roles, 5)]
+
+
+def test_k_nearest_matches_brute_force(grid):
+    g, points = grid
+    rng = random.Random(5)
+    for _ in range(50):
+        x, y, k = rng.uniform(-100, 3300), rng.uniform(-100, 3300), rng.randint(1, 12)
+        max_radius = rng.choice([None, 200, 900])
+        got = g.k_nearest(x, y, k, roles=('CITIZEN', 'MAFIA'), exclude=8, max_radius=max_radius)
+        expected = _brute(points, x, y, math.inf if max_radius is None else max_radius, ('CITIZEN', 'MAFIA'), 8)[:k]
+        assert [d for d, _ in got] == pytest.approx([d for d, _ in expected])
+
+
+def test_k_nearest_predicate():
+    g = SpatialGrid(100, 100)
+    for uid in range(10): g.move_point(uid, uid * 100, 0)
+    assert [uid for _, uid in g.k_nearest(0, 0, 3, predicate=lambda uid: uid % 2)] == [1, 3, 5]
@@ -0,0 +1,105 @@
+"""Local loss and latency simulator for the UDP channel (see SERVER_UDP).
+
+Sits between clients and the server's UDP port and forwards datagrams both ways,
+dropping, delaying, jittering (and so reordering) and duplicating them. Point a
+client at it with NETWORK_UDP_PORT = the --listen port; the TCP control stream
+still goes straight to the server.
+
+Usage:
+    python udp_netem.py --listen 5700 --target 127.0.0.1:5600 --loss 0.05 --delay 80 --jitter 30
+    python loadtest.py ...   # or a game client with NETWORK_UDP_PORT = 5700
+"""
+import sys
+import os
+import random
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from settings import UDP_PORT
+
+
+class Impairment:
+    """Decides the fate of each datagram: dropped, or delivered after some delay (possibly twice)."""
+    def __init__(self, loss, delay_ms, jitter_ms, duplicate):
+        self.loss = loss
+        self.delay = delay_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.duplicate = duplicate
+        self.stats = {'in': 0, 'dropped': 0, 'duplicated': 0}
+
+    def schedule(self, loop, deliver, data):
+        self.stats['in'] += 1
+        if random.random() < self.loss: self.stats['dropped'] += 1; return
+        copies = 2 if random.random() < self.duplicate else 1
+        if copies == 2: self.stats['duplicated'] += 1
+        for _ in range(copies):
+            loop.call_later(max(0.0, random.gauss(self.delay, self.jitter) if self.jitter else self.delay), deliver, data)
+
+
+class Upstream(asyncio.DatagramProtocol):
+    """Our socket towards the server for one client address; replies go back to that client."""
+    def __init__(self, proxy, client_addr):
+        self.proxy = proxy
+        self.client_addr = client_addr
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.proxy.down.schedule(self.proxy.loop, self.proxy.to_client(self.client_addr), data)
+
+
+class Proxy(asyncio.DatagramProtocol):
+    def __init__(self, target, up, down):
+        self.target = target
+        self.up = up     # client -> server
+        self.down = down # server -> client
+        self.loop = asyncio.get_running_loop()
+        self.transport = None
+        self.upstreams = {} # {client addr: Upstream}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def to_client(self, addr):
+        return lambda data: self.transport.sendto(data, addr)
+
+    def datagram_received(self, data, addr):
+        up = self.upstreams.get(addr)
+        if up is None:
+            up = self.upstreams[addr] = Upstream(self, addr)
+            self.loop.create_task(self.loop.create_datagram_endpoint(lambda: up, remote_addr=self.target))
+            print(f"[NETEM] New client {addr[0]}:{addr[1]}")
+        self.up.schedule(self.loop, lambda d: up.transport and up.transport.sendto(d), data)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="PxANIC UDP loss/latency simulator")
+    parser.add_argument('--listen', type=int, default=UDP_PORT + 100, help="port clients send to")
+    parser.add_argument('--target', default=f"127.0.0.1:{UDP_PORT}", help="server UDP host:port")
+    parser.add_argument('--loss', type=float, default=0.0, help="drop probability per datagram (each way)")
+    parser.add_argument('--delay', type=float, default=0.0, help="one-way delay in ms")
+    parser.add_argument('--jitter', type=float, default=0.0, help="delay standard deviation in ms (reorders)")
+    parser.add_argument('--duplicate', type=float, default=0.0, help="duplication probability per datagram")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None: random.seed(args.seed)
+    host, port = args.target.rsplit(':', 1)
+    make = lambda: Impairment(args.loss, args.delay, args.jitter, args.duplicate)
+    up, down = make(), make()
+    loop = asyncio.get_running_loop()
+    await loop.create_datagram_endpoint(lambda: Proxy((host, int(port)), up, down), local_addr=("127.0.0.1", args.listen))
+    print(f"[NETEM] 127.0.0.1:{args.listen} -> {host}:{port}  loss {args.loss:.0%}  delay {args.delay:.0f}±{args.jitter:.0f} ms  dup {args.duplicate:.0%}")
+    while True:
+        await asyncio.sleep(5.0)
+        print(f"[NETEM] up {up.stats}  down {down.stats}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -38,7 +38,7 @@ class InputPopup:
                 self.done = True
                 self.active = False
             else:
-                if len(self.text) < 20: # Limit length
+                if len(self.text) < 32: # Limit length (IP#ROOM)
                     self.text += event.unicode
                     
         elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -158,14 +158,8 @@ class MinimapWidget(UIWidget):
                 my = mm_rect.y + 2 + ((cy + TILE_SIZE//2) / map_h) * (mm_h - 4)
                 
                 # Check motion near CCTV
-                motion_detected = False
-                # Check NPCs
-                for n in self.game.npcs:
-                    if n.alive and getattr(n, 'is_moving', False):
-                        dist_sq = (n.rect.centerx - (cx+16))**2 + (n.rect.centery - (cy+16))**2
-                        if dist_sq < (5 * TILE_SIZE)**2: # 5 tile radius
-                            motion_detected = True
-                            break
+                # Check NPCs moving within a 5 tile radius
+                motion_detected = self.game.world.nearest_entity(cx + 16, cy + 16, 5 * TILE_SIZE, exclude=player, where=lambda n: getattr(n, 'is_moving', False))[1] is not None
                 
                 # Draw CCTV Dot
                 col = (150, 0, 255) # Purple
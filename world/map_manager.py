@@ -1,8 +1,8 @@
 import json
 import os
 import pygame
-from settings import TILE_SIZE
-from world.tiles import check_collision, NEW_ID_MAP, TILE_DATA, BED_TILES, HIDEABLE_TILES
+from settings import TILE_SIZE, INDOOR_ZONES
+from world.tiles import check_collision, get_tile_category, NEW_ID_MAP, TILE_DATA, BED_TILES, HIDEABLE_TILES, TRANSPARENT_TILES
 
 class MapManager:
     def __init__(self):
@@ -12,7 +12,15 @@ class MapManager:
             'object': []
         }
         self.zone_map = []
-        self.collision_cache = []  # [최적화] 충돌 맵 캐시 추가
+        # [Optimization] Per-tile flag grids, flat (y * width + x), one byte per cell.
+        # Built by build_flag_grids after a load and patched by set_tile (doors go through it).
+        self.blocks_move = bytearray()  # Solid for walking (beds, hiding spots and broken doors excluded)
+        self.blocks_sight = bytearray() # Solid wall/object that is not glass
+        self.is_glass = bytearray()     # Glass wall or glass door (see through even when solid)
+        self.is_door = bytearray()      # Door object in any state
+        self.is_indoor = bytearray()    # Zone in INDOOR_ZONES
+        self.wall_blocks_sight = bytearray()   # NPC line of sight: solid wall that is not glass
+        self.object_blocks_sight = bytearray() # NPC line of sight: solid object that is neither glass nor a hiding spot
         self.width = 0
         self.height = 0
         self.spawn_x = 100
@@ -20,6 +28,8 @@ class MapManager:
         self.tile_cache = {}
         self.tile_cooldowns = {}
         self.open_doors = {}
+        self.tile_listeners = []  # [Optimization] Called with (gx, gy) after set_tile (e.g. FOV opacity)
+        self.revision = 0 # [Optimization] Bumped on every tile change, for caches derived from the map (FOV)
         
         self.name_to_tid = {data['name']: tid for tid, data in TILE_DATA.items()}
 
@@ -65,32 +75,57 @@ class MapManager:
             if pos not in self.tile_cache[tid]:
                 self.tile_cache[tid].append(pos)
         
-        # [최적화] 타일 변경 시 해당 위치의 충돌 캐시만 즉시 갱신
-        self._update_collision_at(gx, gy)
+        # [최적화] 타일 변경 시 해당 위치의 플래그만 즉시 갱신
+        self._update_flags_at(gx, gy)
+        self.revision += 1
+        for listener in self.tile_listeners: listener(gx, gy)
 
-    # [최적화] 단일 타일 충돌 갱신 헬퍼
-    def _update_collision_at(self, x, y):
+    # [최적화] 단일 타일 플래그 갱신 헬퍼
+    def _update_flags_at(self, x, y):
         if not (0 <= x < self.width and 0 <= y < self.height): return
-        
+        i = y * self.width + x
+        if i >= len(self.blocks_move): return # Grids not built yet (map being created)
+
+        tid_floor = self.map_data['floor'][y][x][0]
+        tid_wall = self.map_data['wall'][y][x][0]
+        tid_obj = self.map_data['object'][y][x][0]
+
+        # 각 레이어별 충돌 체크 (예외 타일은 이동 가능)
         is_blocked = False
-        
-        # 각 레이어별 충돌 체크
-        for layer in ['floor', 'wall', 'object']:
-            tid = self.map_data[layer][y][x][0]
-            if tid != 0 and check_collision(tid):
-                # 예외 타일(이동 가능) 체크
-                if tid not in BED_TILES and tid not in HIDEABLE_TILES and tid != 5310005:
-                    is_blocked = True
-                    break
-            
-        self.collision_cache[y][x] = is_blocked
+        for tid in (tid_floor, tid_wall, tid_obj):
+            if tid != 0 and check_collision(tid) and tid not in BED_TILES and tid not in HIDEABLE_TILES and tid != 5310005:
+                is_blocked = True
+                break
+
+        # Sight: the wall decides if it is solid, otherwise the object does
+        is_solid = check_collision(tid_wall)
+        is_glass = tid_wall in TRANSPARENT_TILES
+        if not is_solid:
+            is_solid = check_collision(tid_obj)
+            is_glass = is_glass or tid_obj in TRANSPARENT_TILES
+
+        self.blocks_move[i] = is_blocked
+        self.blocks_sight[i] = is_solid and not is_glass
+        self.is_glass[i] = is_glass
+        self.is_door[i] = tid_obj != 0 and get_tile_category(tid_obj) == 5
+        self.is_indoor[i] = self.zone_map[y][x] in INDOOR_ZONES
+        self.wall_blocks_sight[i] = tid_wall != 0 and check_collision(tid_wall) and tid_wall not in TRANSPARENT_TILES
+        self.object_blocks_sight[i] = tid_obj != 0 and check_collision(tid_obj) and tid_obj not in TRANSPARENT_TILES and tid_obj not in HIDEABLE_TILES
 
-    # [최적화] 전체 맵 로드 시 충돌 맵 전체 빌드
-    def build_collision_cache(self):
-        self.collision_cache = [[False for _ in range(self.width)] for _ in range(self.height)]
+    # [최적화] 전체 맵 로드 시 플래그 그리드 전체 빌드
+    def build_flag_grids(self):
+        self.revision += 1
+        size = self.width * self.height
+        self.blocks_move = bytearray(size)
+        self.blocks_sight = bytearray(size)
+        self.is_glass = bytearray(size)
+        self.is_door = bytearray(size)
+        self.is_indoor = bytearray(size)
+        self.wall_blocks_sight = bytearray(size)
+        self.object_blocks_sight = bytearray(size)
         for y in range(self.height):
             for x in range(self.width):
-                self._update_collision_at(x, y)
+                self._update_flags_at(x, y)
 
     def get_spawn_points(self, zone_id=1):
         points = []
@@ -102,12 +137,12 @@ class MapManager:
         return points
 
     def check_any_collision(self, gx, gy):
-        # [최적화] 캐시된 2차원 배열 조회로 대체 (O(1))
+        # [최적화] 플래그 그리드 조회 (O(1))
         # [수정] 맵 밖은 이동 불가(True)로 처리해야 함
         if not (0 <= gx < self.width and 0 <= gy < self.height):
             return True 
         
-        return self.collision_cache[gy][gx]
+        return self.blocks_move[gy * self.width + gx]
 
     def update_doors(self, dt, entities):
         now = pygame.time.get_ticks()
@@ -217,7 +252,7 @@ class MapManager:
                         
             self.zone_map = data.get('zones', [[0 for _ in range(self.width)] for _ in range(self.height)])
             # [최적화] 맵 로드 후 캐시 생성
-            self.build_collision_cache()
+            self.build_flag_grids()
             self.build_tile_cache()
             
             for y in range(self.height):
@@ -256,7 +291,7 @@ class MapManager:
             for x in range(2, 5): self.zone_map[y][x] = 1
         self.open_doors = {}
         self.build_tile_cache()
-        self.build_collision_cache() # [최적화]
+        self.build_flag_grids() # [최적화]
 
     def is_tile_on_cooldown(self, gx, gy):
         now = pygame.time.get_ticks()